@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""Shiki DAG Analysis — DAG の構造検査（反復 Tarjan SCC、O(V+E)）
+
+再帰を使わないので、長い依存チェーン（10 万ノード規模）でも再帰上限に当たらない。
+1 回の解析で以下をまとめて検出する:
+
+  - cycles:            循環（強連結成分ごとに構成ノードと具体的な循環経路）
+  - duplicate_nodes:   重複した node_id
+  - dangling_edges:    存在しない node_id を参照するエッジ
+  - unreachable:       どのルート（入次数 0 のノード）からも到達できないノード（循環の下流）
+  - batch_violations:  依存先より前（または同じ）バッチに置かれたノード
+
+Usage:
+    python3 scripts/dag_analysis.py <dag_file> [--json]
+
+Exit: 0 if no issues, 1 otherwise.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+from typing import Any, Dict, List, Union
+
+from dag_model import Dag
+
+# Each issue category is listed in full in analyze_dag()'s result, but
+# format_issues() only spells out this many entries per category.
+MAX_REPORTED = 50
+
+
+def strongly_connected_components(succ: List[List[int]]) -> List[List[int]]:
+    """Iterative Tarjan. Components come out in reverse topological order."""
+    n = len(succ)
+    order = [-1] * n
+    low = [0] * n
+    on_stack = [False] * n
+    stack: List[int] = []
+    components: List[List[int]] = []
+    counter = 0
+
+    for root in range(n):
+        if order[root] != -1:
+            continue
+        order[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        work_nodes = [root]
+        work_pos = [0]
+
+        while work_nodes:
+            v = work_nodes[-1]
+            pos = work_pos[-1]
+            edges = succ[v]
+            if pos < len(edges):
+                work_pos[-1] = pos + 1
+                w = edges[pos]
+                if order[w] == -1:
+                    order[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = True
+                    work_nodes.append(w)
+                    work_pos.append(0)
+                elif on_stack[w] and order[w] < low[v]:
+                    low[v] = order[w]
+                continue
+
+            work_nodes.pop()
+            work_pos.pop()
+            if work_nodes:
+                parent = work_nodes[-1]
+                if low[v] < low[parent]:
+                    low[parent] = low[v]
+            if low[v] == order[v]:
+                component = []
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = False
+                    component.append(w)
+                    if w == v:
+                        break
+                components.append(component)
+
+    return components
+
+
+def _cycle_path(component: List[int], succ: List[List[int]]) -> List[int]:
+    """One concrete cycle inside a cyclic SCC (first node repeated at the end)."""
+    members = set(component)
+    seen: Dict[int, int] = {}
+    path: List[int] = []
+    v = component[-1]
+    while v not in seen:
+        seen[v] = len(path)
+        path.append(v)
+        v = next(w for w in succ[v] if w in members)
+    return path[seen[v]:] + [v]
+
+
+def analyze_dag(dag: Union[Dag, Dict[str, Any]]) -> Dict[str, Any]:
+    """Structural analysis of a DAG (Dag or parsed document) in O(V+E).
+
+    Returns a dict with "cycles" (list of {"nodes", "path"}), "duplicate_nodes",
+    "dangling_edges" (list of {"edge", "from", "to"}), "unreachable",
+    "batch_violations" (list of {"from", "to", "from_batch", "to_batch"}) and
+    "topological_order" (node ids, or None when the graph has a cycle).
+    """
+    dag = Dag.of(dag)
+    ids = dag.ids
+    succ = dag.succ
+    pred = dag.pred
+    batches = [dag.batch(v) for v in range(len(ids))]
+
+    components = strongly_connected_components(succ)
+    cycles = []
+    cyclic_component = [-1] * len(ids)
+    for component in components:
+        if len(component) > 1 or component[0] in succ[component[0]]:
+            for v in component:
+                cyclic_component[v] = len(cycles)
+            path = _cycle_path(component, succ)
+            cycles.append({
+                "nodes": sorted(ids[v] for v in component),
+                "path": [ids[v] for v in path],
+            })
+
+    # Reachability from the roots (nodes with no predecessors)
+    reached = [False] * len(ids)
+    frontier = [v for v in range(len(ids)) if not pred[v]]
+    for v in frontier:
+        reached[v] = True
+    while frontier:
+        v = frontier.pop()
+        for w in succ[v]:
+            if not reached[w]:
+                reached[w] = True
+                frontier.append(w)
+    unreachable = [ids[v] for v in range(len(ids)) if not reached[v]]
+
+    # A dependency must sit in a strictly earlier batch than its dependent
+    # (edges inside a cycle are already reported as the cycle)
+    batch_violations = []
+    for v, edges in enumerate(succ):
+        if batches[v] is None:
+            continue
+        for w in edges:
+            if cyclic_component[v] != -1 and cyclic_component[v] == cyclic_component[w]:
+                continue
+            if batches[w] is not None and batches[v] >= batches[w]:
+                batch_violations.append({
+                    "from": ids[v],
+                    "to": ids[w],
+                    "from_batch": batches[v],
+                    "to_batch": batches[w],
+                })
+
+    topological_order = None
+    if not cycles:
+        topological_order = [ids[component[0]] for component in reversed(components)]
+
+    return {
+        "nodes": len(ids),
+        "edges": dag.edge_count,
+        "cycles": cycles,
+        "duplicate_nodes": dag.duplicates,
+        "dangling_edges": [{"edge": i, "from": src, "to": dst} for i, src, dst in dag.dangling],
+        "unreachable": unreachable,
+        "batch_violations": batch_violations,
+        "topological_order": topological_order,
+    }
+
+
+def _capped(lines: List[str], total: int, what: str) -> List[str]:
+    if total > MAX_REPORTED:
+        lines = lines[:MAX_REPORTED] + [f"... and {total - MAX_REPORTED} more {what}"]
+    return lines
+
+
+def _cycle_text(path: List[str]) -> str:
+    if len(path) > MAX_REPORTED + 1:
+        return " -> ".join(path[:MAX_REPORTED] + ["...", path[-1]]) + f" ({len(path) - 1} nodes)"
+    return " -> ".join(path)
+
+
+def _id_list(node_ids: List[str]) -> str:
+    shown = ", ".join(node_ids[:MAX_REPORTED])
+    if len(node_ids) > MAX_REPORTED:
+        shown += f", ... (+{len(node_ids) - MAX_REPORTED})"
+    return shown
+
+
+def format_issues(report: Dict[str, Any]) -> List[str]:
+    """Human-readable issue lines for an analyze_dag() report."""
+    lines: List[str] = []
+    lines += _capped(
+        [f"Cycle detected in DAG involving nodes {_cycle_text(c['path'])}" for c in report["cycles"][:MAX_REPORTED + 1]],
+        len(report["cycles"]), "cycles",
+    )
+    lines += _capped(
+        [f"Duplicate node_id: {node_id}" for node_id in report["duplicate_nodes"][:MAX_REPORTED + 1]],
+        len(report["duplicate_nodes"]), "duplicate node ids",
+    )
+    lines += _capped(
+        [f"Edge #{e['edge']} ({e['from']} -> {e['to']}) references an unknown node"
+         for e in report["dangling_edges"][:MAX_REPORTED + 1]],
+        len(report["dangling_edges"]), "dangling edges",
+    )
+    if report["unreachable"]:
+        lines.append(
+            f"{len(report['unreachable'])} node(s) unreachable from any root (blocked by a cycle): "
+            f"{_id_list(report['unreachable'])}"
+        )
+    lines += _capped(
+        [f"Batch order violation: {v['from']} (batch {v['from_batch']}) must run before "
+         f"{v['to']} (batch {v['to_batch']})" for v in report["batch_violations"][:MAX_REPORTED + 1]],
+        len(report["batch_violations"]), "batch order violations",
+    )
+    return lines
+
+
+def main() -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Analyze the structure of a Shiki DAG file")
+    parser.add_argument("dag_file", help="Path to a .shiki/dag/*.json file")
+    parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    args = parser.parse_args()
+
+    try:
+        dag = Dag.load(args.dag_file)
+    except (json.JSONDecodeError, OSError) as e:
+        print(f"[ERROR] {args.dag_file}: {e}", file=sys.stderr)
+        return 1
+
+    report = analyze_dag(dag)
+    issues = format_issues(report)
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print(f"{args.dag_file}: {report['nodes']} nodes, {report['edges']} edges")
+        for line in issues:
+            print(f"  [ISSUE] {line}")
+        if not issues:
+            print("  [OK] No structural issues")
+    return 1 if issues else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
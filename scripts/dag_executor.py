@@ -0,0 +1,641 @@
+#!/usr/bin/env python3
+"""Shiki DAG Executor — DAG の実行（ready キュー / バッチ）
+
+2 つのスケジュールを持つ:
+
+  ready（既定）: 依存先（depends_on エッジの from）がすべて completed になったノードを
+                 即座にディスパッチする。同時実行は max_parallel_batch まで。
+                 バッチ境界で待たないので、重さが不揃いな DAG で壁時計時間が短くなる。
+                 context.target_files が重なるノードは同時に走らせない（先行ノードの終了を待つ）
+  batch:         batch 番号順に、バッチ内の全ノードが終わるまで待ってから次へ進む（従来方式）。
+                 ファイルの重なりは dag_scheduler.py がバッチを分けることで避ける
+
+ノードの実行はバックエンドに委譲する:
+
+  github（既定）: shiki-worktree-worker.yml を `gh workflow run` で起動し、
+                  タスクファイルの status をポーリングして完了を検知する
+  local:          ノードごとに worktree_manager.create_worktree で worktree を作り、
+                  エンジンコマンドをサブプロセスとして実行する（CLI モード、`shiki dag run`）。
+                  終了コード 0 で completed、worktree の変更をコミットして現在のブランチへマージする
+
+ノードの状態が変わるたびに DAG ファイルを書き直す（tmp + os.replace）。completed の
+ノードは再実行しないので、途中で止まった DAG は同じコマンドで再開できる。
+
+Usage:
+    python3 scripts/dag_executor.py <dag_file>
+    python3 scripts/dag_executor.py <dag_file> --schedule batch
+    python3 scripts/dag_executor.py <dag_file> --max-parallel 8 --timeout-minutes 45
+    python3 scripts/dag_executor.py [dag_file] --backend local
+    python3 scripts/dag_executor.py [dag_file] --backend local --engine-cmd 'make test'
+    python3 scripts/dag_executor.py <dag_file> --ignore-overlap   # target_files の重なりを無視
+
+--engine-cmd のテンプレートでは {task_id} {node_id} {task_file} {worktree} {dag_file} {prompt} が
+シェルクォート済みで展開される。同じ値は環境変数 SHIKI_TASK_ID / SHIKI_NODE_ID /
+SHIKI_TASK_FILE / SHIKI_WORKTREE / SHIKI_DAG_FILE でも渡される。
+
+Exit: 0 if no node failed, 1 otherwise.
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import os
+import shlex
+import signal
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from dag_model import Dag
+from dag_scheduler import load_target_files, overlap_graph, read_dag_setting
+
+DEFAULT_MAX_PARALLEL = 4
+DEFAULT_TIMEOUT_MINUTES = 30
+DEFAULT_POLL_INTERVAL = 30
+LOCAL_POLL_INTERVAL = 1
+
+# Default local engine commands by engine family (node "engine": codex / claude-*)
+ENGINE_COMMANDS = {
+    "codex": "codex exec --sandbox workspace-write {prompt}",
+    "claude": "claude -p {prompt}",
+}
+LOCAL_PROMPT = (
+    "Read AGENTS.md and the task in {task_file}. Implement it in this worktree, "
+    "run its acceptance checks, write a report to .shiki/reports/{task_id}.md "
+    "and set the task status to review."
+)
+
+# Node statuses that will not change any more during a run
+SETTLED = ("completed", "failed", "skipped")
+
+
+# ---------------------------------------------------------------------------
+# Backends
+# ---------------------------------------------------------------------------
+
+class GitHubBackend:
+    """Run nodes as shiki-worktree-worker.yml workflow runs."""
+
+    def __init__(self, dag_file: str, repo: str, tasks_dir: str = ".shiki/tasks"):
+        self.dag_file = dag_file
+        self.repo = repo
+        self.tasks_dir = tasks_dir
+
+    def dispatch(self, node: Dict[str, Any]) -> bool:
+        """Create the node's branch and start a worker. False if dispatch failed."""
+        task_id = node["task_id"]
+        branch = node.get("worktree_branch") or f"shiki/task-{task_id}"
+        try:
+            subprocess.run(["git", "checkout", "-b", branch], check=True, capture_output=True, text=True)
+            subprocess.run(["git", "checkout", "-"], check=True, capture_output=True, text=True)
+        except subprocess.CalledProcessError:
+            # Branch may already exist
+            pass
+
+        # engine=auto lets the worker's engine_router decide the optimal engine
+        # with automatic fallback if primary fails
+        try:
+            subprocess.run([
+                "gh", "workflow", "run", "shiki-worktree-worker.yml",
+                "-f", f"task_id={task_id}",
+                "-f", f"worktree_branch={branch}",
+                "-f", "engine=auto",
+                "-f", f"dag_file={self.dag_file}",
+                "-f", f"node_id={node['node_id']}",
+                "--repo", self.repo,
+            ], check=True, capture_output=True, text=True)
+        except (subprocess.CalledProcessError, OSError) as e:
+            print(f"  WARNING: Failed to dispatch worker for {node['node_id']}: {getattr(e, 'stderr', e)}")
+            return False
+        return True
+
+    def poll(self, nodes: List[Dict[str, Any]]) -> Dict[str, str]:
+        """node_id → "completed" / "failed" for running nodes whose task has finished."""
+        subprocess.run(["git", "pull", "--rebase", "origin", "main"], capture_output=True, text=True)
+        finished: Dict[str, str] = {}
+        for node in nodes:
+            task_file = os.path.join(self.tasks_dir, f"{node['task_id']}.json")
+            try:
+                with open(task_file, encoding="utf-8") as f:
+                    status = json.load(f).get("status", "pending")
+            except (json.JSONDecodeError, OSError):
+                continue
+            if status in ("completed", "review"):
+                finished[node["node_id"]] = "completed"
+            elif status == "failed":
+                finished[node["node_id"]] = "failed"
+        return finished
+
+    def finish(self, node: Dict[str, Any]) -> bool:
+        """Merge a completed node's branch. False (merge aborted) on conflict."""
+        # Same branch dispatch() created (a null worktree_branch means the default)
+        branch = node.get("worktree_branch") or f"shiki/task-{node['task_id']}"
+        try:
+            subprocess.run(["git", "merge", f"origin/{branch}", "--no-edit"],
+                           check=True, capture_output=True, text=True)
+            print(f"  Merged branch {branch}")
+            return True
+        except subprocess.CalledProcessError as e:
+            print(f"  WARNING: Merge conflict on {branch}: {e.stderr}")
+            subprocess.run(["git", "merge", "--abort"], capture_output=True, text=True)
+            return False
+
+    def cancel(self, node: Dict[str, Any]) -> None:
+        """Dispatched workflow runs are left to finish on their own."""
+
+
+class LocalBackend:
+    """Run nodes on this machine: one git worktree and one engine process per node.
+
+    Concurrency is bounded by the executor's max_parallel (one process per
+    node in flight). Engine output goes to .shiki/state/dag-runs/<dag_id>/<node_id>.log.
+    """
+
+    def __init__(self, dag_file: str, dag_id: str, engine_cmd: Optional[str] = None,
+                 cleanup: bool = True):
+        from worktree_manager import get_repo_root
+
+        self.dag_file = os.path.abspath(dag_file)
+        self.engine_cmd = engine_cmd
+        self.cleanup = cleanup
+        self.repo_root = get_repo_root()
+        self.log_dir = Path(self.repo_root) / ".shiki" / "state" / "dag-runs" / dag_id
+        self.processes: Dict[str, Tuple[subprocess.Popen, Any]] = {}
+        self.worktrees: Dict[str, str] = {}
+        self.prepared: Dict[str, str] = {}
+
+    def command_for(self, node: Dict[str, Any], worktree: str) -> Optional[str]:
+        """Shell command for a node, or None if its engine cannot run locally."""
+        template = self.engine_cmd
+        if template is None:
+            engine = node.get("engine", "codex")
+            template = ENGINE_COMMANDS.get("claude" if engine.startswith("claude") else engine)
+        if template is None:
+            return None
+        fields = {
+            "task_id": node["task_id"],
+            "node_id": node["node_id"],
+            "task_file": f".shiki/tasks/{node['task_id']}.json",
+            "worktree": worktree,
+            "dag_file": self.dag_file,
+        }
+        fields["prompt"] = LOCAL_PROMPT.format(**fields)
+        return template.format(**{key: shlex.quote(value) for key, value in fields.items()})
+
+    def prepare(self, nodes: List[Dict[str, Any]]) -> None:
+        """Create the worktrees for a group of nodes about to be dispatched in one go."""
+        from worktree_manager import create_worktrees
+
+        specs = [(node.get("worktree_branch") or f"shiki/task-{node['task_id']}", node["task_id"])
+                 for node in nodes]
+        try:
+            self.prepared.update(create_worktrees(specs))
+        except subprocess.CalledProcessError as e:
+            # dispatch() retries per node and reports which one failed
+            print(f"  WARNING: Batch worktree creation failed: {e.stderr}")
+
+    def dispatch(self, node: Dict[str, Any]) -> bool:
+        """Create the node's worktree (unless prepared) and start its engine. False if that failed."""
+        from worktree_manager import create_worktree
+
+        task_id = node["task_id"]
+        branch = node.get("worktree_branch") or f"shiki/task-{task_id}"
+        worktree = self.prepared.pop(branch, None)
+        if worktree is None:
+            try:
+                worktree = create_worktree(branch, task_id)
+            except subprocess.CalledProcessError as e:
+                print(f"  WARNING: Failed to create worktree for {node['node_id']}: {e.stderr}")
+                return False
+
+        command = self.command_for(node, worktree)
+        if command is None:
+            print(f"  WARNING: Engine '{node.get('engine')}' of {node['node_id']} cannot run locally")
+            return False
+
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        log_path = self.log_dir / f"{node['node_id']}.log"
+        log = open(log_path, "w", encoding="utf-8")
+        env = dict(os.environ,
+                   SHIKI_TASK_ID=task_id,
+                   SHIKI_NODE_ID=node["node_id"],
+                   SHIKI_TASK_FILE=f".shiki/tasks/{task_id}.json",
+                   SHIKI_WORKTREE=worktree,
+                   SHIKI_DAG_FILE=self.dag_file)
+        try:
+            process = subprocess.Popen(command, shell=True, cwd=worktree, env=env,
+                                       stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+                                       start_new_session=True)
+        except OSError as e:
+            log.close()
+            print(f"  WARNING: Failed to start engine for {node['node_id']}: {e}")
+            return False
+        self.processes[node["node_id"]] = (process, log)
+        self.worktrees[node["node_id"]] = worktree
+        node["worktree_branch"] = branch
+        node["log"] = os.path.relpath(log_path, self.repo_root)
+        return True
+
+    def poll(self, nodes: List[Dict[str, Any]]) -> Dict[str, str]:
+        """node_id → "completed" / "failed" for engine processes that have exited."""
+        finished: Dict[str, str] = {}
+        for node in nodes:
+            entry = self.processes.get(node["node_id"])
+            if entry is None:
+                continue
+            process, log = entry
+            returncode = process.poll()
+            if returncode is None:
+                continue
+            log.close()
+            del self.processes[node["node_id"]]
+            node["exit_code"] = returncode
+            finished[node["node_id"]] = "completed" if returncode == 0 else "failed"
+        return finished
+
+    def finish(self, node: Dict[str, Any]) -> bool:
+        """Commit the worktree's changes and merge its branch into the current branch."""
+        from worktree_manager import cleanup_worktree, run_git
+
+        branch = node["worktree_branch"]
+        worktree = self.worktrees.pop(node["node_id"], None)
+        if worktree is not None:
+            # --sparse: engines in sparse worktrees may add files outside the checkout
+            run_git(["add", "-A", "--sparse", "--", ".", ":(exclude).shiki/state/worktree-*.json"], cwd=worktree, check=False)
+            rc, _, _ = run_git(["diff", "--cached", "--quiet"], cwd=worktree, check=False)
+            if rc != 0:
+                run_git(["commit", "-m", f"shiki: {node['task_id']} ({node['node_id']})"], cwd=worktree, check=False)
+
+        rc, _, stderr = run_git(["merge", "--no-edit", branch], cwd=self.repo_root, check=False)
+        if rc != 0:
+            print(f"  WARNING: Merge conflict on {branch}: {stderr[:500]}")
+            run_git(["merge", "--abort"], cwd=self.repo_root, check=False)
+            return False
+        print(f"  Merged branch {branch}")
+        if self.cleanup and worktree is not None:
+            # Everything worth keeping was committed and merged above; what is left
+            # (the executor's own .shiki/state metadata) is not worth a warning
+            cleanup_worktree(branch, warn_dirty=False)
+        return True
+
+    def cancel(self, node: Dict[str, Any]) -> None:
+        """Terminate a node's engine process group (timeout or interrupt)."""
+        entry = self.processes.pop(node["node_id"], None)
+        if entry is None:
+            return
+        process, log = entry
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+            process.wait(timeout=10)
+        except (OSError, subprocess.TimeoutExpired):
+            process.kill()
+        log.close()
+
+
+# ---------------------------------------------------------------------------
+# Executor
+# ---------------------------------------------------------------------------
+
+class DagExecutor:
+    """Drive a DAG file to completion through a backend.
+
+    The backend needs dispatch(node) -> bool, poll(nodes) -> {node_id: status},
+    finish(node) -> bool and cancel(node) (see GitHubBackend / LocalBackend).
+    An optional prepare(nodes) is called before a group of nodes is dispatched.
+    conflicts (see dag_scheduler.overlap_graph) keeps nodes with overlapping
+    target files from running at the same time in the ready schedule.
+    """
+
+    def __init__(
+        self,
+        dag_file: str,
+        backend: Any,
+        max_parallel: int = DEFAULT_MAX_PARALLEL,
+        timeout_s: float = DEFAULT_TIMEOUT_MINUTES * 60,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic,
+        dag: Optional[Dag] = None,
+        conflicts: Optional[List[Set[int]]] = None,
+    ):
+        self.dag_file = dag_file
+        self.backend = backend
+        self.max_parallel = max_parallel
+        self.timeout_s = timeout_s
+        self.poll_interval = poll_interval
+        self.sleep = sleep
+        self.clock = clock
+
+        self.dag = dag if dag is not None else Dag.load(dag_file)
+        self.ids = self.dag.ids
+        self.succ = self.dag.succ
+        self.pred = self.dag.pred
+        self.nodes = self.dag.nodes
+        self.conflicts = conflicts
+        self.failed_nodes: List[str] = []
+
+    # -- state helpers ---------------------------------------------------
+
+    def _save(self) -> None:
+        self.dag.save(self.dag_file)
+
+    def _set_status(self, v: int, status: str) -> None:
+        self.dag.set_status(v, status)
+        now = datetime.now(timezone.utc).isoformat()
+        if status == "running":
+            self.nodes[v]["started_at"] = now
+        elif status in SETTLED:
+            self.nodes[v]["finished_at"] = now
+        if status == "failed":
+            self.failed_nodes.append(self.ids[v])
+            self._prune(v)
+
+    def _prune(self, failed: int) -> None:
+        """Skip every pending node downstream of a failed one, in one traversal.
+
+        Each skipped node records the failed node (skipped_by) and the
+        dependency it was reached through (skip_reason), so nothing below a
+        failure gets a worktree, a branch or a worker.
+        """
+        skipped = []
+        for w, via in self.dag.descendants([failed]):
+            if self.dag.status(w) != "pending":
+                continue
+            self.dag.set_status(w, "skipped")
+            node = self.nodes[w]
+            node["skipped_by"] = self.ids[failed]
+            node["skip_reason"] = (f"dependency {self.ids[via]} failed" if via == failed
+                                   else f"upstream {self.ids[failed]} failed (via {self.ids[via]})")
+            node["finished_at"] = datetime.now(timezone.utc).isoformat()
+            skipped.append(self.ids[w])
+        if skipped:
+            shown = ", ".join(skipped[:10]) + (f", ... (+{len(skipped) - 10})" if len(skipped) > 10 else "")
+            print(f"  Node {self.ids[failed]} failed: skipping {len(skipped)} downstream node(s): {shown}")
+
+    def _complete(self, v: int) -> None:
+        """Backend reported success: merge, then mark completed (or failed on conflict)."""
+        self._set_status(v, "completed" if self.backend.finish(self.nodes[v]) else "failed")
+
+    def _prepare(self) -> None:
+        """Everything not completed runs (again); mark the DAG running.
+
+        Skipped nodes are re-evaluated too: the failure that skipped them may
+        be retried in this run.
+        """
+        for v in range(len(self.ids)):
+            if self.dag.status(v) != "completed":
+                self.dag.set_status(v, "pending")
+                self.nodes[v].pop("skipped_by", None)
+                self.nodes[v].pop("skip_reason", None)
+        self.dag.data["status"] = "running"
+
+    # -- ready-queue schedule ----------------------------------------------
+
+    def run_ready(self) -> None:
+        """Dispatch each node as soon as all of its dependencies are completed."""
+        n = len(self.ids)
+        unsettled = [0] * n
+        for v in range(n):
+            unsettled[v] = sum(1 for u in self.pred[v] if self.dag.status(u) not in SETTLED)
+        self.dag.metadata["schedule"] = "ready"
+        self.dag.metadata.pop("current_batch", None)
+
+        # Ready nodes go out in (batch, input order): batches from dag_scheduler.py
+        # put critical-path nodes first
+        ready: List[Any] = []
+
+        def order(v: int) -> Any:
+            batch = self.nodes[v].get("batch")
+            return (batch if isinstance(batch, int) else 0, v)
+
+        def settle(v: int) -> None:
+            # Failures have already pruned their whole downstream subgraph,
+            # so a pending successor with no unsettled dependencies is ready
+            for w in self.succ[v]:
+                unsettled[w] -= 1
+                if unsettled[w] == 0 and self.dag.status(w) == "pending":
+                    heapq.heappush(ready, (order(w), w))
+
+        for v in range(n):
+            if self.dag.status(v) == "pending" and unsettled[v] == 0:
+                heapq.heappush(ready, (order(v), v))
+
+        running: Dict[int, float] = {}
+        print(f"DAG {self.dag.data.get('dag_id')}: {n} nodes, ready-queue schedule, "
+              f"max {self.max_parallel} in flight")
+
+        prepare = getattr(self.backend, "prepare", None)
+        while ready or running:
+            changed = False
+            group = []
+            held = []
+            while ready and len(running) + len(group) < self.max_parallel:
+                item = heapq.heappop(ready)
+                # Overlapping target files wait for the node in flight to merge first
+                if self.conflicts is not None and any(w in running or w in group for w in self.conflicts[item[1]]):
+                    held.append(item)
+                else:
+                    group.append(item[1])
+            for item in held:
+                heapq.heappush(ready, item)
+            if prepare is not None and len(group) > 1:
+                prepare([self.nodes[v] for v in group])
+            for v in group:
+                node = self.nodes[v]
+                print(f"  Dispatching node {self.ids[v]} (task {node.get('task_id')}, "
+                      f"engine: {node.get('engine', 'codex')})")
+                if self.backend.dispatch(node):
+                    self._set_status(v, "running")
+                    running[v] = self.clock()
+                else:
+                    self._set_status(v, "failed")
+                    settle(v)
+                changed = True
+            if changed:
+                self._save()
+            if not running:
+                continue
+
+            self.sleep(self.poll_interval)
+            finished = self.backend.poll([self.nodes[v] for v in running])
+            now = self.clock()
+            for v in list(running):
+                status = finished.get(self.ids[v])
+                if status is None and now - running[v] >= self.timeout_s:
+                    print(f"  Node {self.ids[v]}: timed out, marking as failed")
+                    self.backend.cancel(self.nodes[v])
+                    status = "timeout"
+                if status is None:
+                    continue
+                del running[v]
+                if status == "completed":
+                    self._complete(v)
+                else:
+                    self._set_status(v, "failed")
+                print(f"  Node {self.ids[v]}: {self.nodes[v]['status']} "
+                      f"({len(running)} running, {len(ready)} ready)")
+                settle(v)
+                changed = True
+            if changed:
+                self._save()
+
+    # -- batch schedule ------------------------------------------------------
+
+    def run_batches(self) -> None:
+        """Run batch by batch, waiting for every node of a batch before the next."""
+        batches = self.dag.batches()
+        total_batches = max(batches) + 1 if batches else 0
+        self.dag.metadata["total_batches"] = total_batches
+        self.dag.metadata["schedule"] = "batch"
+        print(f"DAG {self.dag.data.get('dag_id')}: {total_batches} batches, {len(self.nodes)} nodes")
+
+        for batch_num in sorted(batches):
+            members = batches[batch_num]
+            self.dag.metadata["current_batch"] = batch_num
+            print(f"\n{'=' * 60}")
+            print(f"Batch {batch_num}/{total_batches - 1}: {len(members)} nodes")
+            print(f"{'=' * 60}")
+
+            # Nodes below an earlier failure were already skipped by _prune()
+            dispatched = []
+            group = [v for v in members if self.dag.status(v) == "pending"]
+            if getattr(self.backend, "prepare", None) is not None and len(group) > 1:
+                self.backend.prepare([self.nodes[v] for v in group])
+            for v in group:
+                node = self.nodes[v]
+                print(f"  Dispatching node {self.ids[v]} (task {node.get('task_id')}, "
+                      f"engine: {node.get('engine', 'codex')})")
+                if self.backend.dispatch(node):
+                    self._set_status(v, "running")
+                    dispatched.append(v)
+                else:
+                    self._set_status(v, "failed")
+            self._save()
+
+            if not dispatched:
+                print("  No nodes dispatched in this batch, moving to next")
+                continue
+
+            print(f"\n  Waiting for {len(dispatched)} workers (max {int(self.timeout_s) // 60} min)...")
+            started = self.clock()
+            waiting = list(dispatched)
+            while waiting and self.clock() - started < self.timeout_s:
+                self.sleep(self.poll_interval)
+                finished = self.backend.poll([self.nodes[v] for v in waiting])
+                for v in list(waiting):
+                    status = finished.get(self.ids[v])
+                    if status is not None:
+                        waiting.remove(v)
+                        if status == "completed":
+                            self._complete(v)
+                        else:
+                            self._set_status(v, "failed")
+            if not waiting:
+                print(f"  All workers in batch {batch_num} completed")
+            for v in waiting:
+                print(f"  Node {self.ids[v]}: timed out, marking as failed")
+                self.backend.cancel(self.nodes[v])
+                self._set_status(v, "failed")
+            self._save()
+
+    # -- entry point ---------------------------------------------------------
+
+    def run(self, schedule: str = "ready") -> Dict[str, int]:
+        """Execute the DAG and write the final state. Returns status counts."""
+        self._prepare()
+        self._save()
+        try:
+            if schedule == "batch":
+                self.run_batches()
+            else:
+                self.run_ready()
+        except KeyboardInterrupt:
+            # Running nodes stay "running" in the file and are re-run on resume
+            for v in range(len(self.ids)):
+                if self.dag.status(v) == "running":
+                    self.backend.cancel(self.nodes[v])
+            self._save()
+            raise
+
+        counts = self.dag.status_counts()
+        self.dag.data["status"] = "failed" if counts["failed"] else "completed"
+        self._save()
+
+        print(f"\nDAG execution complete: {counts['completed']}/{len(self.nodes)} completed, "
+              f"{counts['failed']} failed, {counts['skipped']} skipped")
+        if self.failed_nodes:
+            print(f"Failed nodes: {', '.join(self.failed_nodes)}")
+        return counts
+
+
+def main() -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Execute a Shiki DAG")
+    parser.add_argument("dag_file", nargs="?",
+                        help="Path to a .shiki/dag/*.json file (default: most recent DAG)")
+    parser.add_argument("--backend", choices=("github", "local"), default="github",
+                        help="github: shiki-worktree-worker.yml runs (default); "
+                             "local: worktree + engine process per node")
+    parser.add_argument("--engine-cmd", default=None,
+                        help="local: command template for every node (default: by node engine)")
+    parser.add_argument("--keep-worktrees", action="store_true",
+                        help="local: keep worktrees of merged nodes")
+    parser.add_argument("--schedule", choices=("ready", "batch"), default="ready",
+                        help="ready: dispatch as soon as dependencies complete (default); "
+                             "batch: wait for each batch")
+    parser.add_argument("--max-parallel", type=int, default=None,
+                        help="Nodes in flight (default: github.dag.max_parallel_batch)")
+    parser.add_argument("--timeout-minutes", type=int, default=None,
+                        help="Per node (ready) or per batch (batch) timeout "
+                             "(default: github.dag.timeout_minutes)")
+    parser.add_argument("--ignore-overlap", action="store_true",
+                        help="ready: run nodes with overlapping context.target_files concurrently")
+    parser.add_argument("--poll-interval", type=float, default=None,
+                        help=f"Seconds between status polls (default: {DEFAULT_POLL_INTERVAL} github, "
+                             f"{LOCAL_POLL_INTERVAL} local)")
+    args = parser.parse_args()
+
+    dag_file = args.dag_file
+    if dag_file is None:
+        candidates = sorted(Path(".shiki/dag").glob("*.json"), key=lambda p: p.stat().st_mtime)
+        if not candidates:
+            print("[ERROR] No DAG file given and none found in .shiki/dag/", file=sys.stderr)
+            return 1
+        dag_file = str(candidates[-1])
+
+    max_parallel = args.max_parallel or read_dag_setting("max_parallel_batch", DEFAULT_MAX_PARALLEL)
+    timeout_minutes = args.timeout_minutes or read_dag_setting("timeout_minutes", DEFAULT_TIMEOUT_MINUTES)
+
+    try:
+        dag = Dag.load(dag_file)
+        if args.backend == "local":
+            dag_id = dag.data.get("dag_id") or Path(dag_file).stem
+            backend: Any = LocalBackend(dag_file, dag_id, engine_cmd=args.engine_cmd,
+                                        cleanup=not args.keep_worktrees)
+            poll_interval = args.poll_interval or LOCAL_POLL_INTERVAL
+        else:
+            backend = GitHubBackend(dag_file, os.environ.get("GITHUB_REPOSITORY", ""))
+            poll_interval = args.poll_interval or DEFAULT_POLL_INTERVAL
+        conflicts = None if args.ignore_overlap else overlap_graph(load_target_files(dag))
+        executor = DagExecutor(dag_file, backend, max_parallel=max_parallel,
+                               timeout_s=timeout_minutes * 60, poll_interval=poll_interval, dag=dag,
+                               conflicts=conflicts)
+    except (json.JSONDecodeError, OSError, subprocess.CalledProcessError) as e:
+        print(f"[ERROR] {dag_file}: {e}", file=sys.stderr)
+        return 1
+
+    try:
+        counts = executor.run(args.schedule)
+    except KeyboardInterrupt:
+        print(f"\nInterrupted; DAG state saved to {dag_file} (run again to resume)", file=sys.stderr)
+        return 130
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
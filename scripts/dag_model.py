@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""Shiki DAG Model — DAG ファイルの共通インメモリ表現
+
+DAG JSON を 1 回読み込んで以下を構築する（O(V+E)）:
+
+  - node_id → 整数インデックス、インデックス → ノード dict
+  - 順方向（succ: from → to）と逆方向（pred: to → from）の隣接リスト
+  - ステータス別件数（set_status() 経由の更新で維持）
+
+dag_analysis / dag_scheduler / dag_executor / dag_to_mermaid / validate_shiki が共有する。
+ノード dict は元の JSON の dict そのものなので、変更は save() でそのまま書き出される。
+
+Usage (library):
+    from dag_model import Dag
+    dag = Dag.load(".shiki/dag/DAG-1.json")
+    for dep in dag.predecessors("N-T-0003"): ...
+    dag.set_status(dag.index["N-T-0003"], "running")
+    dag.save(".shiki/dag/DAG-1.json")
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+NODE_STATUSES = ("pending", "running", "completed", "failed", "skipped")
+
+
+class Dag:
+    """A DAG document with id-indexed nodes, adjacency lists and status counts.
+
+    Nodes without a node_id are ignored and duplicate node ids keep their
+    first entry (the rest are listed in `duplicates`). Edges that reference
+    unknown node ids are listed in `dangling` as (edge index, from, to) and
+    left out of the adjacency lists.
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+        self.ids: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.nodes: List[Dict[str, Any]] = []
+        self.duplicates: List[str] = []
+        for node in data.get("nodes", []):
+            node_id = node.get("node_id")
+            if node_id is None:
+                continue
+            if node_id in self.index:
+                self.duplicates.append(node_id)
+                continue
+            self.index[node_id] = len(self.ids)
+            self.ids.append(node_id)
+            self.nodes.append(node)
+
+        self.succ: List[List[int]] = [[] for _ in self.ids]
+        self.pred: List[List[int]] = [[] for _ in self.ids]
+        self.dangling: List[Tuple[int, Any, Any]] = []
+        for i, edge in enumerate(data.get("edges", [])):
+            src = self.index.get(edge.get("from"))
+            dst = self.index.get(edge.get("to"))
+            if src is None or dst is None:
+                self.dangling.append((i, edge.get("from"), edge.get("to")))
+                continue
+            self.succ[src].append(dst)
+            self.pred[dst].append(src)
+
+        self._counts: Dict[str, int] = {}
+        for node in self.nodes:
+            status = node.get("status", "pending")
+            self._counts[status] = self._counts.get(status, 0) + 1
+
+    @classmethod
+    def load(cls, path: str) -> "Dag":
+        """Read a DAG JSON file (raises OSError / json.JSONDecodeError)."""
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    @classmethod
+    def of(cls, dag: Union["Dag", Dict[str, Any]]) -> "Dag":
+        """Accept either a Dag or a parsed DAG document."""
+        return dag if isinstance(dag, Dag) else cls(dag)
+
+    def save(self, path: str) -> None:
+        """Atomically write the document with a fresh metadata.updated_at."""
+        self.metadata["updated_at"] = datetime.now(timezone.utc).isoformat()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    # -- lookups -------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        return self.data.setdefault("metadata", {})
+
+    @property
+    def edge_count(self) -> int:
+        return sum(len(edges) for edges in self.succ)
+
+    def node(self, node_id: str) -> Optional[Dict[str, Any]]:
+        v = self.index.get(node_id)
+        return None if v is None else self.nodes[v]
+
+    def successors(self, node_id: str) -> List[str]:
+        """Nodes that depend on node_id."""
+        return [self.ids[w] for w in self.succ[self.index[node_id]]]
+
+    def predecessors(self, node_id: str) -> List[str]:
+        """Nodes node_id depends on."""
+        return [self.ids[u] for u in self.pred[self.index[node_id]]]
+
+    def descendants(self, sources: List[int]) -> List[Tuple[int, int]]:
+        """Every node reachable from sources (excluding them), breadth-first.
+
+        Returns (node, via) pairs where via is the predecessor it was first
+        reached through. O(V+E) for any number of sources.
+        """
+        seen = set(sources)
+        found: List[Tuple[int, int]] = []
+        frontier = list(sources)
+        while frontier:
+            next_frontier = []
+            for v in frontier:
+                for w in self.succ[v]:
+                    if w not in seen:
+                        seen.add(w)
+                        found.append((w, v))
+                        next_frontier.append(w)
+            frontier = next_frontier
+        return found
+
+    def batch(self, v: int) -> Optional[int]:
+        """Batch number of node v, or None if missing / not an int."""
+        batch = self.nodes[v].get("batch")
+        return batch if isinstance(batch, int) else None
+
+    def batches(self) -> Dict[int, List[int]]:
+        """batch number → node indices in input order (missing batch counts as 0)."""
+        groups: Dict[int, List[int]] = {}
+        for v in range(len(self.ids)):
+            batch = self.batch(v)
+            groups.setdefault(batch if batch is not None else 0, []).append(v)
+        return groups
+
+    # -- status --------------------------------------------------------------
+
+    def status(self, v: int) -> str:
+        return self.nodes[v].get("status", "pending")
+
+    def set_status(self, v: int, status: str) -> None:
+        """Change node v's status and keep the counters in step."""
+        old = self.status(v)
+        self._counts[old] -= 1
+        self._counts[status] = self._counts.get(status, 0) + 1
+        self.nodes[v]["status"] = status
+
+    def status_counts(self) -> Dict[str, int]:
+        """Count per node status (every NODE_STATUSES key is present)."""
+        counts = {status: 0 for status in NODE_STATUSES}
+        for status, count in self._counts.items():
+            if count:
+                counts[status] = count
+        return counts
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""Shiki DAG Scheduler — クリティカルパスに基づくバッチ自動割当
+
+DAG の edges と各ノードの estimated_tokens から batch 番号を計算し直す。
+shiki-dag-executor.yml はバッチを順番に実行し、バッチ内の最も遅いノードを待つため、
+バッチの所要時間はその中の最大コストになる。予測メイクスパン = Σ(バッチ内最大コスト)。
+
+割当はリストスケジューリング:
+  1. 各ノードの bottom level（自身からシンクまでの最長経路コスト）を求める
+  2. 依存がすべて前のバッチに入ったノードを ready とし、bottom level 最大のノードでバッチを開く
+  3. そのバッチの所要時間を延ばさないノードで空き枠を埋め、残りの枠は bottom level 順に埋める
+  4. 1 バッチのノード数は github.dag.max_parallel_batch まで
+  5. 同じファイルに触れるタスク（context.target_files が重なる）は同じバッチに入れない
+
+5 はタスクの target_files から作るファイル重複グラフの彩色で、並列実行したブランチが
+マージ時に衝突して（merge --abort で）ノードごとやり直しになるのを事前に避ける。
+ディレクトリ（末尾 /）やグロブは、その配下のファイルすべてと重なるものとして扱う。
+
+Usage:
+    python3 scripts/dag_scheduler.py <dag_file>                 # バッチを書き換え、予測を表示
+    python3 scripts/dag_scheduler.py <dag_file> --dry-run       # 書き換えずに比較だけ表示
+    python3 scripts/dag_scheduler.py <dag_file> --max-parallel 6
+    python3 scripts/dag_scheduler.py <dag_file> --force         # 現行より悪くても書き換える
+    python3 scripts/dag_scheduler.py <dag_file> --ignore-overlap  # target_files の重複を無視
+
+現行のバッチ割当が速い場合は書き換えない（ただし batch 欠落・max_parallel 超過・
+依存順違反・同じバッチ内のファイル重複がある場合は常に書き換える）。
+
+Exit: 0 on success, 1 if the DAG has a cycle or cannot be read.
+"""
+
+from __future__ import annotations
+
+import bisect
+import heapq
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+from dag_analysis import strongly_connected_components
+from dag_model import Dag
+from task_index import open_index
+
+DEFAULT_MAX_PARALLEL = 4
+
+
+def read_dag_setting(name: str, default: int, config_path: str = ".shiki/config.yaml") -> int:
+    """github.dag.<name> from config.yaml (simple line parser, positive ints only)."""
+    try:
+        with open(config_path, encoding="utf-8") as f:
+            for line in f:
+                stripped = line.strip()
+                if stripped.startswith(f"{name}:"):
+                    value = stripped.split(":", 1)[1].split("#")[0].strip()
+                    if value.isdigit() and int(value) > 0:
+                        return int(value)
+    except OSError:
+        pass
+    return default
+
+
+def node_costs(dag: Dag) -> List[float]:
+    """estimated_tokens per node; nodes without one get the median estimate."""
+    raw = []
+    for node in dag.nodes:
+        value = node.get("estimated_tokens")
+        raw.append(float(value) if isinstance(value, (int, float)) and value > 0 else None)
+    known = sorted(v for v in raw if v is not None)
+    default = known[len(known) // 2] if known else 1.0
+    return [v if v is not None else default for v in raw]
+
+
+def _overlap_key(path: Any) -> Optional[Tuple[str, bool]]:
+    """Normalise a target_files entry to (path, is_directory).
+
+    A glob is widened to the directory holding its first wildcard.
+    """
+    if not isinstance(path, str):
+        return None
+    path = path.strip()
+    while path.startswith("./"):
+        path = path[2:]
+    path = path.lstrip("/")
+    wildcard = min((i for i in (path.find(c) for c in "*?[") if i >= 0), default=-1)
+    if wildcard >= 0:
+        path = path[:path.rfind("/", 0, wildcard) + 1]
+        return path, True
+    if not path:
+        return None
+    return path, path.endswith("/")
+
+
+def load_target_files(dag: Dag, tasks_dir: str = ".shiki/tasks") -> List[List[str]]:
+    """context.target_files of each node's task (empty if unknown)."""
+    files: List[List[str]] = [[] for _ in dag.ids]
+    if not os.path.isdir(tasks_dir):
+        return files
+    with open_index(tasks_dir) as index:
+        for v, node in enumerate(dag.nodes):
+            entry = index.get(node.get("task_id", ""))
+            if entry is None or "error" in entry:
+                continue
+            try:
+                with open(entry["path"], encoding="utf-8") as f:
+                    targets = (json.load(f).get("context") or {}).get("target_files")
+            except (json.JSONDecodeError, OSError, AttributeError):
+                continue
+            if isinstance(targets, list):
+                files[v] = targets
+    return files
+
+
+def overlap_graph(target_files: List[List[str]]) -> List[Set[int]]:
+    """Nodes whose target files overlap, as adjacency sets.
+
+    Uses a path -> nodes index, so the cost is linear in the number of
+    entries (plus a binary search per directory) and the number of edges.
+    """
+    n = len(target_files)
+    exact: Dict[str, Set[int]] = {}
+    dirs: Dict[str, Set[int]] = {}
+    for v, paths in enumerate(target_files):
+        for path in paths:
+            key = _overlap_key(path)
+            if key is not None:
+                (dirs if key[1] else exact).setdefault(key[0], set()).add(v)
+
+    adjacency: List[Set[int]] = [set() for _ in range(n)]
+
+    def connect(group_a: Set[int], group_b: Set[int]) -> None:
+        for v in group_a:
+            for w in group_b:
+                if v != w:
+                    adjacency[v].add(w)
+                    adjacency[w].add(v)
+
+    for owners in exact.values():
+        connect(owners, owners)
+    file_keys = sorted(exact)
+    dir_keys = sorted(dirs)
+    for directory, owners in dirs.items():
+        connect(owners, owners)
+        # Everything below the directory ("" is the whole tree)
+        for keys, table in ((file_keys, exact), (dir_keys, dirs)):
+            i = bisect.bisect_left(keys, directory)
+            while i < len(keys) and keys[i].startswith(directory):
+                connect(owners, table[keys[i]])
+                i += 1
+    return adjacency
+
+
+def bottom_levels(succ: List[List[int]], costs: List[float], topo: List[int]) -> List[float]:
+    """Longest path cost from each node to a sink, including the node itself."""
+    level = list(costs)
+    for v in reversed(topo):
+        best = 0.0
+        for w in succ[v]:
+            if level[w] > best:
+                best = level[w]
+        level[v] = costs[v] + best
+    return level
+
+
+def batch_makespan(batches: List[Optional[int]], costs: List[float]) -> float:
+    """Σ over batches of the slowest node in the batch (barrier execution)."""
+    slowest: Dict[int, float] = {}
+    for b, cost in zip(batches, costs):
+        key = b if b is not None else 0
+        if cost > slowest.get(key, 0.0):
+            slowest[key] = cost
+    return sum(slowest.values())
+
+
+def schedule_batches(
+    succ: List[List[int]],
+    pred: List[List[int]],
+    costs: List[float],
+    max_parallel: int,
+    conflicts: Optional[List[Set[int]]] = None,
+) -> Tuple[List[int], List[float]]:
+    """Assign batch numbers to an acyclic graph. Returns (batches, bottom_levels).
+
+    Nodes adjacent in conflicts (overlapping files) never share a batch: a
+    ready node that conflicts with one already chosen waits for a later
+    batch, which greedily colours the overlap graph in bottom-level order.
+    Runs in O((V + E) log V) plus the conflict checks.
+    """
+    n = len(succ)
+    components = strongly_connected_components(succ)
+    topo = [component[0] for component in reversed(components)]
+    level = bottom_levels(succ, costs, topo)
+
+    remaining = [len(p) for p in pred]
+    # Ready nodes ordered by bottom level (highest first), ties by input order
+    ready = [(-level[v], v) for v in range(n) if remaining[v] == 0]
+    heapq.heapify(ready)
+    batches = [-1] * n
+    batch_num = 0
+
+    while ready:
+        _, head = heapq.heappop(ready)
+        chosen = [head]
+        limit = costs[head]
+        deferred = []
+        # Fill: first nodes that do not lengthen the batch, then the rest
+        held = []
+        while ready and len(chosen) < max_parallel:
+            item = heapq.heappop(ready)
+            if conflicts is not None and not conflicts[item[1]].isdisjoint(chosen):
+                held.append(item)
+            elif costs[item[1]] <= limit:
+                chosen.append(item[1])
+            else:
+                deferred.append(item)
+        for item in deferred:
+            if len(chosen) < max_parallel and (conflicts is None or conflicts[item[1]].isdisjoint(chosen)):
+                chosen.append(item[1])
+            else:
+                heapq.heappush(ready, item)
+        for item in held:
+            heapq.heappush(ready, item)
+
+        for v in chosen:
+            batches[v] = batch_num
+        for v in chosen:
+            for w in succ[v]:
+                remaining[w] -= 1
+                if remaining[w] == 0:
+                    heapq.heappush(ready, (-level[w], w))
+        batch_num += 1
+
+    return batches, level
+
+
+def schedule_dag(dag: Union[Dag, Dict[str, Any]], max_parallel: int,
+                 conflicts: Optional[List[Set[int]]] = None) -> Dict[str, Any]:
+    """Compute a new batching for a DAG (does not modify it).
+
+    Returns {"batches": {node_id: batch}, "current_makespan", "scheduled_makespan",
+    "critical_path", "total_batches", "current_batches", "current_valid",
+    "current_overlaps", "max_parallel"}. current_valid is False when a node
+    has no batch, a batch is wider than max_parallel, a dependency is not in
+    an earlier batch or two nodes in one batch overlap in conflicts (see
+    overlap_graph; current_overlaps counts those pairs).
+    Raises ValueError when the graph has a cycle.
+    """
+    dag = Dag.of(dag)
+    ids = dag.ids
+    succ = dag.succ
+    pred = dag.pred
+
+    for component in strongly_connected_components(succ):
+        if len(component) > 1 or component[0] in succ[component[0]]:
+            raise ValueError(f"DAG has a cycle involving {', '.join(sorted(ids[v] for v in component)[:10])}")
+
+    costs = node_costs(dag)
+    batches, level = schedule_batches(succ, pred, costs, max_parallel, conflicts)
+
+    # The current batching is only a fair baseline if the executor can run it as-is
+    current = [dag.batch(v) for v in range(len(ids))]
+    widths: Dict[Optional[int], int] = {}
+    for b in current:
+        widths[b] = widths.get(b, 0) + 1
+    current_overlaps = 0
+    if conflicts is not None:
+        current_overlaps = sum(1 for v in range(len(ids)) for w in conflicts[v]
+                               if v < w and current[v] is not None and current[v] == current[w])
+    current_valid = (
+        None not in widths
+        and max(widths.values(), default=0) <= max_parallel
+        and all(current[v] < current[w] for v in range(len(ids)) for w in succ[v])
+        and current_overlaps == 0
+    )
+
+    return {
+        "batches": dict(zip(ids, batches)),
+        "current_makespan": batch_makespan(current, costs),
+        "scheduled_makespan": batch_makespan(batches, costs),
+        "critical_path": max(level) if level else 0.0,
+        "total_batches": max(batches) + 1 if batches else 0,
+        "current_batches": len(widths),
+        "current_valid": current_valid,
+        "current_overlaps": current_overlaps,
+        "max_parallel": max_parallel,
+    }
+
+
+def apply_schedule(dag: Dag, result: Dict[str, Any]) -> None:
+    """Write batch numbers and schedule metadata into the DAG document."""
+    for node_id, batch in result["batches"].items():
+        dag.nodes[dag.index[node_id]]["batch"] = batch
+    metadata = dag.metadata
+    metadata["total_batches"] = result["total_batches"]
+    metadata["max_parallel"] = result["max_parallel"]
+    metadata["predicted_makespan_tokens"] = int(result["scheduled_makespan"])
+
+
+def main() -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Assign DAG batches from the critical path")
+    parser.add_argument("dag_file", help="Path to a .shiki/dag/*.json file")
+    parser.add_argument("--max-parallel", type=int, default=None,
+                        help="Nodes per batch (default: github.dag.max_parallel_batch)")
+    parser.add_argument("--dry-run", action="store_true", help="Show the comparison without writing")
+    parser.add_argument("--force", action="store_true",
+                        help="Write even if the new batching is not faster than the current one")
+    parser.add_argument("--ignore-overlap", action="store_true",
+                        help="Allow tasks with overlapping context.target_files in one batch")
+    parser.add_argument("--tasks-dir", default=".shiki/tasks", help="Task directory (for target_files)")
+    args = parser.parse_args()
+
+    try:
+        dag = Dag.load(args.dag_file)
+    except (json.JSONDecodeError, OSError) as e:
+        print(f"[ERROR] {args.dag_file}: {e}", file=sys.stderr)
+        return 1
+
+    max_parallel = args.max_parallel or read_dag_setting("max_parallel_batch", DEFAULT_MAX_PARALLEL)
+    conflicts = None if args.ignore_overlap else overlap_graph(load_target_files(dag, args.tasks_dir))
+    try:
+        result = schedule_dag(dag, max_parallel, conflicts)
+    except ValueError as e:
+        print(f"[ERROR] {args.dag_file}: {e}", file=sys.stderr)
+        return 1
+
+    if dag.data.get("status", "pending") != "pending":
+        print(f"[WARN] DAG status is '{dag.data.get('status')}'; rescheduling a started DAG changes pending batches too",
+              file=sys.stderr)
+
+    current = result["current_makespan"]
+    scheduled = result["scheduled_makespan"]
+    print(f"DAG {dag.data.get('dag_id', args.dag_file)}: {len(result['batches'])} nodes, max {max_parallel} per batch")
+    if conflicts is not None:
+        pairs = sum(len(adjacent) for adjacent in conflicts) // 2
+        print(f"  File overlaps:       {pairs:>12,} task pairs kept in separate batches")
+    print(f"  Critical path:       {result['critical_path']:>12,.0f} tokens")
+    print(f"  Current batching:    {current:>12,.0f} tokens ({result['current_batches']} batches)")
+    print(f"  Scheduled batching:  {scheduled:>12,.0f} tokens ({result['total_batches']} batches)")
+    if result["current_overlaps"]:
+        print(f"  (current batching runs {result['current_overlaps']} overlapping task pairs in parallel)")
+    elif not result["current_valid"]:
+        print("  (current batching is missing, wider than max_parallel or breaks a dependency)")
+    elif current > 0:
+        print(f"  Change:              {(scheduled - current) / current * 100:>+11.1f}%")
+
+    if args.dry_run:
+        print("\n(dry-run: DAG not modified)")
+        return 0
+    if result["current_valid"] and scheduled >= current and not args.force:
+        print("\nCurrent batching is already as fast; DAG not modified (use --force to rewrite)")
+        return 0
+
+    apply_schedule(dag, result)
+    dag.save(args.dag_file)
+    print(f"\nBatches written to {args.dag_file}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
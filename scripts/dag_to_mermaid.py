@@ -24,7 +24,9 @@ import json
 import os
 import sys
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Union
+
+from dag_model import Dag
 
 
 # Node status to Mermaid style class mapping
@@ -54,22 +56,23 @@ def sanitize_id(node_id: str) -> str:
     return node_id.replace("-", "_").replace("/", "_").replace(" ", "_")
 
 
-def dag_to_mermaid(dag: Dict[str, Any], direction: str = "TB") -> str:
-    """Convert a DAG dictionary to Mermaid diagram syntax.
+def dag_to_mermaid(dag: Union[Dag, Dict[str, Any]], direction: str = "TB") -> str:
+    """Convert a DAG to Mermaid diagram syntax.
 
     Args:
-        dag: Parsed DAG JSON object
+        dag: Dag model or parsed DAG JSON object
         direction: Graph direction - TB (top-bottom) or LR (left-right)
 
     Returns:
         Mermaid diagram string
     """
+    dag = Dag.of(dag)
     lines: List[str] = []
-    dag_id = dag.get("dag_id", "DAG")
-    status = dag.get("status", "unknown")
-    nodes = dag.get("nodes", [])
-    edges = dag.get("edges", [])
-    metadata = dag.get("metadata", {})
+    dag_id = dag.data.get("dag_id", "DAG")
+    status = dag.data.get("status", "unknown")
+    nodes = dag.nodes
+    edges = dag.data.get("edges", [])
+    metadata = dag.data.get("metadata", {})
 
     total_batches = metadata.get("total_batches", 0)
     current_batch = metadata.get("current_batch", 0)
@@ -80,14 +83,11 @@ def dag_to_mermaid(dag: Dict[str, Any], direction: str = "TB") -> str:
     lines.append("")
 
     # Group nodes by batch using subgraphs
-    batch_groups: Dict[int, List[Dict]] = {}
-    for node in nodes:
-        batch = node.get("batch", 0)
-        batch_groups.setdefault(batch, []).append(node)
+    batch_groups = dag.batches()
 
     # Generate subgraphs per batch
     for batch_num in sorted(batch_groups.keys()):
-        batch_nodes = batch_groups[batch_num]
+        batch_nodes = [nodes[v] for v in batch_groups[batch_num]]
         batch_label = f"Batch {batch_num}"
 
         # Determine batch status indicator
@@ -151,12 +151,12 @@ def dag_to_mermaid(dag: Dict[str, Any], direction: str = "TB") -> str:
 
     # Generate style classes for node statuses
     lines.append("    %% Status styles")
+    by_status: Dict[str, List[str]] = {}
+    for node in nodes:
+        by_status.setdefault(node.get("status"), []).append(sanitize_id(node["node_id"]))
     for status_name, style in STATUS_STYLES.items():
-        # Find nodes with this status
-        styled_nodes = [sanitize_id(n["node_id"]) for n in nodes if n.get("status") == status_name]
-        if styled_nodes:
-            for sn in styled_nodes:
-                lines.append(f"    style {sn} {style}")
+        for sn in by_status.get(status_name, []):
+            lines.append(f"    style {sn} {style}")
 
     # Style the batch subgraphs
     lines.append("")
@@ -172,23 +172,25 @@ def dag_to_mermaid(dag: Dict[str, Any], direction: str = "TB") -> str:
     return "\n".join(lines)
 
 
-def format_summary(dag: Dict[str, Any]) -> str:
+def format_summary(dag: Union[Dag, Dict[str, Any]]) -> str:
     """Generate a text summary of the DAG status."""
-    nodes = dag.get("nodes", [])
-    metadata = dag.get("metadata", {})
+    dag = Dag.of(dag)
+    nodes = dag.nodes
+    metadata = dag.data.get("metadata", {})
 
     total = len(nodes)
-    completed = sum(1 for n in nodes if n.get("status") == "completed")
-    failed = sum(1 for n in nodes if n.get("status") == "failed")
-    running = sum(1 for n in nodes if n.get("status") == "running")
-    pending = sum(1 for n in nodes if n.get("status") == "pending")
-    skipped = sum(1 for n in nodes if n.get("status") == "skipped")
+    counts = dag.status_counts()
+    completed = counts["completed"]
+    failed = counts["failed"]
+    running = counts["running"]
+    pending = counts["pending"]
+    skipped = counts["skipped"]
 
     total_estimated = sum(n.get("estimated_tokens", 0) for n in nodes)
     total_actual = sum(n.get("actual_tokens", 0) for n in nodes)
 
     lines = [
-        f"**DAG:** {dag.get('dag_id', '???')} | **Status:** {dag.get('status', '???')}",
+        f"**DAG:** {dag.data.get('dag_id', '???')} | **Status:** {dag.data.get('status', '???')}",
         f"**Batches:** {metadata.get('total_batches', '?')} | **Current:** {metadata.get('current_batch', '?')}",
         f"**Nodes:** {total} total | {completed} completed | {running} running | {pending} pending | {failed} failed | {skipped} skipped",
     ]
@@ -210,8 +212,7 @@ def process_dag_file(dag_path: str, wrap: bool = False, direction: str = "TB") -
     Returns:
         Mermaid diagram string (optionally wrapped)
     """
-    with open(dag_path, encoding="utf-8") as f:
-        dag = json.load(f)
+    dag = Dag.load(dag_path)
 
     mermaid = dag_to_mermaid(dag, direction=direction)
     summary = format_summary(dag)
@@ -4,16 +4,29 @@
 Usage:
     python3 scripts/engine_router.py <task_file>
     python3 scripts/engine_router.py --all           # 全 pending タスクを振り分け
+    python3 scripts/engine_router.py --all --jobs 8  # プロセスプールで並列に振り分け (0 = CPU 数)
     python3 scripts/engine_router.py --dry-run <task_file>  # 変更せず結果だけ表示
+    python3 scripts/engine_router.py --refresh-engines <task_file>  # codex 検出キャッシュを無視して再確認
+    python3 scripts/engine_router.py --dag <dag_file> [--batch N]  # DAG バッチ単位で振り分け（load_balanced 向け）
+    python3 scripts/engine_router.py train [--dry-run]   # 完了タスク履歴から重みを学習
+    python3 scripts/engine_router.py serve [--socket PATH]  # 常駐ルーター（Unix ソケット）を起動
+    python3 scripts/engine_router.py stop [--socket PATH]   # 常駐ルーターを停止
+
+Single-file routing goes through the resident router when it is running
+(.shiki/state/engine-router.sock or $SHIKI_ROUTER_SOCKET) and falls back to
+in-process routing otherwise; pass --no-daemon to skip it.
 
 Exit: prints selected engine to stdout ("codex" or "claude-team")
 """
 
 import json
-import glob
 import os
+import re
 import sys
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
+
+from task_index import open_index
+from task_store import WriteBatch, file_stamp, update_json, write_text
 
 # ─────────────────────────────────────────────
 # Affinity Rules: タスクの特徴 → エンジン適性
@@ -42,11 +55,14 @@ CLAUDE_SIGNALS = {
     },
     # 複数ファイル対象 → Claude
     "multi_file_threshold": 3,  # target_files が N 以上なら Claude
+    "multi_file_bonus": 3,
     # authority_layer による加算
     "authority_bonus": {
         "coordinator": 3,
         "monitor": 2,
     },
+    # θ₄ 以外のフェーズ → Claude
+    "phase_bonus": 5,
 }
 
 CODEX_SIGNALS = {
@@ -74,9 +90,137 @@ CODEX_SIGNALS = {
     "authority_bonus": {
         "executor": 1,
     },
+    # contract_ref あり（仕様が明確）→ Codex
+    "contract_bonus": 2,
+    # acceptance が 2 件以上（テスト可能）→ Codex
+    "acceptance_bonus": 1,
 }
 
 
+# ─────────────────────────────────────────────
+# Keyword Matcher: キーワード表を 1 本の正規表現にコンパイルし、
+# テキストを 1 パス走査して両エンジンのスコアを同時に求める
+# ─────────────────────────────────────────────
+
+KEYWORD_MATCH_MODES = ("substring", "word")
+_WORD_CHAR = re.compile(r"\w")
+
+
+class KeywordMatcher:
+    """Score Claude/Codex keyword tables in a single pass over the text.
+
+    All keywords of both tables are compiled into one prefix-trie regex wrapped
+    in a lookahead, so the text is scanned once regardless of table size and
+    overlapping hits ("redesign" / "design") are still seen. The trie prefers
+    the longest keyword at each position; shorter keywords that are prefixes
+    of it are resolved from a table precomputed at compile time.
+
+    mode="substring" reproduces the original ``keyword in text`` rule exactly.
+    mode="word" only counts keywords delimited by word boundaries.
+    """
+
+    def __init__(
+        self,
+        claude_keywords: Dict[str, int],
+        codex_keywords: Dict[str, int],
+        mode: str = "substring",
+    ):
+        if mode not in KEYWORD_MATCH_MODES:
+            raise ValueError(f"unknown keyword match mode: {mode}")
+        self.mode = mode
+
+        # keyword → (claude_weight, codex_weight)
+        self.weights: Dict[str, Tuple[int, int]] = {}
+        for kw, score in claude_keywords.items():
+            self.weights[kw.lower()] = (score, 0)
+        for kw, score in codex_keywords.items():
+            claude_w, _ = self.weights.get(kw.lower(), (0, 0))
+            self.weights[kw.lower()] = (claude_w, score)
+        self.weights.pop("", None)
+
+        # keyword → keywords that also match wherever it matches (itself included)
+        self.implied: Dict[str, Tuple[str, ...]] = {}
+        for kw in self.weights:
+            self.implied[kw] = tuple(
+                p for p in self.weights
+                if kw.startswith(p) and (mode == "substring" or self._is_boundary(kw, len(p)))
+            )
+
+        trie = self._trie_pattern(self.weights) or "(?!)"
+        if mode == "word":
+            self.pattern = re.compile(rf"\b(?=({trie})\b)")
+        else:
+            self.pattern = re.compile(rf"(?=({trie}))")
+
+    @staticmethod
+    def _is_boundary(text: str, pos: int) -> bool:
+        if pos >= len(text):
+            return True
+        return bool(_WORD_CHAR.match(text[pos - 1])) != bool(_WORD_CHAR.match(text[pos]))
+
+    @staticmethod
+    def _trie_pattern(keywords) -> str:
+        """Build a longest-match-first regex from a prefix trie of keywords."""
+        trie: Dict[str, Any] = {}
+        for kw in keywords:
+            node = trie
+            for ch in kw:
+                node = node.setdefault(ch, {})
+            node[""] = {}
+
+        def build(node: Dict[str, Any]) -> str:
+            branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+            if not branches:
+                return ""
+            body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+            if "" in node:
+                body = f"(?:{body})?"
+            return body
+
+        return build(trie)
+
+    def find(self, text: str) -> set:
+        """Return the set of keywords present in (already lowercased) text."""
+        found: set = set()
+        for kw in set(self.pattern.findall(text)):
+            found.update(self.implied[kw])
+        return found
+
+    def score(self, text: str) -> Tuple[int, int]:
+        """Return (claude_score, codex_score) contributed by keywords."""
+        claude_score = 0
+        codex_score = 0
+        for kw in self.find(text):
+            claude_w, codex_w = self.weights[kw]
+            claude_score += claude_w
+            codex_score += codex_w
+        return (claude_score, codex_score)
+
+
+_MATCHERS: Dict[Any, KeywordMatcher] = {}
+
+
+def get_keyword_matcher(
+    mode: str = "substring",
+    claude_keywords: Optional[Dict[str, int]] = None,
+    codex_keywords: Optional[Dict[str, int]] = None,
+) -> KeywordMatcher:
+    """Return the compiled matcher for the given keyword tables (cached).
+
+    Defaults to the built-in CLAUDE_SIGNALS / CODEX_SIGNALS tables.
+    """
+    if claude_keywords is None:
+        claude_keywords = CLAUDE_SIGNALS["keywords"]
+    if codex_keywords is None:
+        codex_keywords = CODEX_SIGNALS["keywords"]
+    key = (mode, frozenset(claude_keywords.items()), frozenset(codex_keywords.items()))
+    matcher = _MATCHERS.get(key)
+    if matcher is None:
+        matcher = KeywordMatcher(claude_keywords, codex_keywords, mode=mode)
+        _MATCHERS[key] = matcher
+    return matcher
+
+
 def check_codex_available() -> bool:
     """Check if Codex CLI is installed and authenticated."""
     import shutil
@@ -97,12 +241,92 @@ def check_codex_available() -> bool:
     return bool(os.environ.get("OPENAI_API_KEY"))
 
 
-def load_config() -> Dict[str, Any]:
-    """Load .shiki/config.yaml (simple parser, no pyyaml dependency)."""
+# ─────────────────────────────────────────────
+# Availability Cache: codex の検出結果を .shiki/state/ に TTL 付きで保存し、
+# 単発呼び出しのたびに `codex login status` を起動しないようにする
+# ─────────────────────────────────────────────
+
+ENGINE_CACHE_NAME = "engine-availability.cache.json"
+DEFAULT_AVAILABILITY_TTL = 600  # seconds
+
+
+def _availability_fingerprint() -> Dict[str, Any]:
+    """Inputs that invalidate a cached probe result when they change."""
+    import shutil
+
+    return {
+        "codex_path": shutil.which("codex"),
+        "openai_api_key": bool(os.environ.get("OPENAI_API_KEY")),
+    }
+
+
+def cached_codex_available(
+    state_dir: Optional[str],
+    ttl: int = DEFAULT_AVAILABILITY_TTL,
+    refresh: bool = False,
+) -> bool:
+    """check_codex_available() with an on-disk TTL cache under state_dir.
+
+    The cache is bypassed when refresh is True, ttl <= 0, state_dir is None,
+    or the codex binary / OPENAI_API_KEY presence changed since the last probe.
+    """
+    import time
+
+    if not state_dir or ttl <= 0:
+        return check_codex_available()
+
+    cache_path = os.path.join(state_dir, ENGINE_CACHE_NAME)
+    fingerprint = _availability_fingerprint()
+
+    if not refresh:
+        try:
+            with open(cache_path, encoding="utf-8") as f:
+                cached = json.load(f)
+            age = time.time() - float(cached.get("checked_at", 0))
+            if 0 <= age < ttl and cached.get("fingerprint") == fingerprint:
+                return bool(cached["codex_available"])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    available = check_codex_available()
+    try:
+        os.makedirs(state_dir, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "codex_available": available,
+                "checked_at": time.time(),
+                "fingerprint": fingerprint,
+            }, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+    return available
+
+
+def find_config_file() -> Optional[str]:
+    """Return the .shiki/config.yaml visible from the cwd, if any."""
+    for cp in (".shiki/config.yaml", "../.shiki/config.yaml"):
+        if os.path.exists(cp):
+            return cp
+    return None
+
+
+def load_config(refresh_engines: bool = False) -> Dict[str, Any]:
+    """Load .shiki/config.yaml (simple parser, no pyyaml dependency).
+
+    Codex availability comes from the cache in .shiki/state/ unless
+    refresh_engines is True or the cache is older than
+    engines.routing.availability_ttl_seconds.
+    """
     config: Dict[str, Any] = {
         "routing_strategy": "affinity",
         "fallback": True,
-        "codex_available": check_codex_available(),
+        "keyword_match": "substring",
+        "availability_ttl": DEFAULT_AVAILABILITY_TTL,
+        "balance_margin": DEFAULT_BALANCE_MARGIN,
+        "learned_weights": True,
+        "engine_concurrency": dict(DEFAULT_ENGINE_CONCURRENCY),
         "phase_defaults": {
             "understand": "claude",
             "generate": "claude",
@@ -113,87 +337,336 @@ def load_config() -> Dict[str, Any]:
         },
     }
 
-    config_paths = [".shiki/config.yaml", "../.shiki/config.yaml"]
-    for cp in config_paths:
-        if os.path.exists(cp):
-            try:
-                with open(cp, encoding="utf-8") as f:
-                    for line in f:
-                        stripped = line.strip()
-                        if stripped.startswith("strategy:"):
-                            config["routing_strategy"] = stripped.split(":")[1].strip()
-                        elif stripped.startswith("fallback:"):
-                            config["fallback"] = stripped.split(":")[1].strip().lower() == "true"
-            except Exception:
-                pass
-            break
+    config_file = find_config_file()
+    state_dir = os.path.join(os.path.dirname(config_file), "state") if config_file else None
+    if config_file:
+        try:
+            with open(config_file, encoding="utf-8") as f:
+                engine_section = None
+                for line in f:
+                    stripped = line.strip()
+                    value = stripped.split(":", 1)[1].split("#")[0].strip() if ":" in stripped else ""
+                    if stripped in ("claude:", "codex:"):
+                        engine_section = "claude-team" if stripped == "claude:" else "codex"
+                    elif stripped == "routing:" or (stripped and not line.startswith("    ")):
+                        engine_section = None
+
+                    if stripped.startswith("strategy:"):
+                        config["routing_strategy"] = value
+                    elif stripped.startswith("fallback:"):
+                        config["fallback"] = value.lower() == "true"
+                    elif stripped.startswith("keyword_match:"):
+                        if value in KEYWORD_MATCH_MODES:
+                            config["keyword_match"] = value
+                    elif stripped.startswith("availability_ttl_seconds:"):
+                        if value.lstrip("-").isdigit():
+                            config["availability_ttl"] = int(value)
+                    elif stripped.startswith("learned_weights:"):
+                        config["learned_weights"] = value.lower() == "true"
+                    elif stripped.startswith("balance_margin:"):
+                        if value.isdigit():
+                            config["balance_margin"] = int(value)
+                    elif stripped.startswith("concurrency:") and engine_section:
+                        if value.isdigit():
+                            config["engine_concurrency"][engine_section] = int(value)
+        except Exception:
+            pass
 
+    config["codex_available"] = cached_codex_available(
+        state_dir, ttl=config["availability_ttl"], refresh=refresh_engines
+    )
+    if state_dir:
+        config["weights_file"] = os.path.join(state_dir, WEIGHTS_FILE_NAME)
+    if config["learned_weights"]:
+        config["signals"] = load_weights(config.get("weights_file"))
     return config
 
 
-def score_task(task: Dict[str, Any]) -> Tuple[int, int]:
-    """Score a task for Claude vs Codex affinity.
+NON_EXECUTE_PHASES = ("understand", "generate", "allocate", "verify", "integrate")
 
-    Returns (claude_score, codex_score).
+
+def task_features(
+    task: Dict[str, Any],
+    keyword_match: str = "substring",
+    signals: Optional[Tuple[Dict[str, Any], Dict[str, Any]]] = None,
+) -> List[str]:
+    """List the routing features present in a task.
+
+    Features are "kw:<keyword>", "multi_file", "single_file",
+    "authority:<layer>", "contract_ref", "acceptance" and "non_execute_phase".
+    Both score_task() and the `train` subcommand work from this list.
     """
-    claude_score = 0
-    codex_score = 0
+    claude_signals, codex_signals = signals or (CLAUDE_SIGNALS, CODEX_SIGNALS)
+    features: List[str] = []
 
     title = task.get("title", "").lower()
     desc = task.get("description", "").lower()
     text = f"{title} {desc}"
 
-    # Keyword matching
-    for keyword, score in CLAUDE_SIGNALS["keywords"].items():
-        if keyword in text:
-            claude_score += score
-
-    for keyword, score in CODEX_SIGNALS["keywords"].items():
-        if keyword in text:
-            codex_score += score
+    # Keyword matching (both engines, one pass)
+    matcher = get_keyword_matcher(keyword_match, claude_signals["keywords"], codex_signals["keywords"])
+    features.extend(f"kw:{kw}" for kw in sorted(matcher.find(text)))
 
     # File count heuristic
     target_files = task.get("context", {}).get("target_files", [])
     file_count = len(target_files)
 
-    if file_count >= CLAUDE_SIGNALS["multi_file_threshold"]:
-        claude_score += 3
+    if file_count >= claude_signals.get("multi_file_threshold", CLAUDE_SIGNALS["multi_file_threshold"]):
+        features.append("multi_file")
     elif file_count <= 1:
-        codex_score += CODEX_SIGNALS["single_file_bonus"]
+        features.append("single_file")
 
     # Authority layer
-    authority = task.get("authority_layer", "executor")
-    claude_score += CLAUDE_SIGNALS["authority_bonus"].get(authority, 0)
-    codex_score += CODEX_SIGNALS["authority_bonus"].get(authority, 0)
+    features.append(f"authority:{task.get('authority_layer', 'executor')}")
 
-    # Contract reference → Codex (spec is clear)
+    # Contract reference (spec is clear)
     if task.get("context", {}).get("contract_ref"):
-        codex_score += 2
+        features.append("contract_ref")
 
-    # Has acceptance criteria (testable) → Codex advantage
-    acceptance = task.get("acceptance", [])
-    if len(acceptance) >= 2:
-        codex_score += 1
+    # Has acceptance criteria (testable)
+    if len(task.get("acceptance", [])) >= 2:
+        features.append("acceptance")
 
-    # Theta phase override
-    theta = task.get("theta_phase", "execute")
-    if theta in ("understand", "generate", "allocate", "verify", "integrate"):
-        claude_score += 5  # Non-execute phases strongly favor Claude
+    # Theta phase
+    if task.get("theta_phase", "execute") in NON_EXECUTE_PHASES:
+        features.append("non_execute_phase")
+
+    return features
+
+
+_FEATURE_KEYS = {
+    "multi_file": "multi_file_bonus",
+    "single_file": "single_file_bonus",
+    "contract_ref": "contract_bonus",
+    "acceptance": "acceptance_bonus",
+    "non_execute_phase": "phase_bonus",
+}
+
+
+def feature_weight(signals: Dict[str, Any], feature: str) -> int:
+    """Weight of one task_features() entry in a signal table."""
+    if feature.startswith("kw:"):
+        return signals.get("keywords", {}).get(feature[3:], 0)
+    if feature.startswith("authority:"):
+        return signals.get("authority_bonus", {}).get(feature[10:], 0)
+    return signals.get(_FEATURE_KEYS.get(feature, ""), 0)
+
+
+def score_task(
+    task: Dict[str, Any],
+    keyword_match: str = "substring",
+    signals: Optional[Tuple[Dict[str, Any], Dict[str, Any]]] = None,
+) -> Tuple[int, int]:
+    """Score a task for Claude vs Codex affinity.
+
+    keyword_match: "substring" (default) or "word" (whole-word keywords only).
+    signals: (claude_signals, codex_signals); defaults to the learned weights
+    file when load_config() found one, else CLAUDE_SIGNALS / CODEX_SIGNALS.
 
+    Returns (claude_score, codex_score).
+    """
+    claude_signals, codex_signals = signals or (CLAUDE_SIGNALS, CODEX_SIGNALS)
+    claude_score = 0
+    codex_score = 0
+    for feature in task_features(task, keyword_match, (claude_signals, codex_signals)):
+        claude_score += feature_weight(claude_signals, feature)
+        codex_score += feature_weight(codex_signals, feature)
     return (claude_score, codex_score)
 
 
-def route_task(task: Dict[str, Any], config: Optional[Dict] = None) -> Dict[str, str]:
-    """Determine the optimal engine for a task.
+# ─────────────────────────────────────────────
+# Learned Weights: 完了タスクの履歴（engine.primary / actual_tokens / 成否）
+# から重みを学習し、.shiki/state/routing-weights.json に保存する
+# ─────────────────────────────────────────────
 
-    Returns dict with:
-        primary: "codex" | "claude-team"
-        fallback: "claude-team" | "codex"
-        reason: human-readable explanation
+WEIGHTS_FILE_NAME = "routing-weights.json"
+WEIGHTS_VERSION = 1
+POINTS_PER_LOSS = 2.0  # 損失 1 単位（中央値トークン 1 個分）あたりのスコア差
+MAX_LEARNED_WEIGHT = 8
+FINISHED_STATUSES = ("completed", "review", "failed")
+
+
+def load_weights(path: Optional[str]) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """Load (claude_signals, codex_signals) from a weights file, or None."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != WEIGHTS_VERSION:
+            return None
+        claude_signals = dict(CLAUDE_SIGNALS, **data["claude"])
+        codex_signals = dict(CODEX_SIGNALS, **data["codex"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return (claude_signals, codex_signals)
+
+
+def _history_engine(task: Dict[str, Any]) -> Optional[str]:
+    """Primary engine a finished task was routed to, normalized."""
+    engine = task.get("engine")
+    primary = engine.get("primary") if isinstance(engine, dict) else engine
+    primary = primary or task.get("assigned_to")
+    if primary in ("claude-team", "claude-leader", "claude-member"):
+        return "claude-team"
+    if primary == "codex":
+        return "codex"
+    return None
+
+
+def train_weights(
+    tasks: List[Dict[str, Any]],
+    keyword_match: str = "substring",
+    failure_penalty: float = 2.0,
+    prior_strength: float = 5.0,
+) -> Dict[str, Any]:
+    """Fit per-keyword and per-feature weights from finished tasks.
+
+    Each finished task routed to claude-team or codex gets a loss of
+    actual_tokens / median(actual_tokens) + failure_penalty if it failed or
+    needed its fallback engine. For every feature seen on both engines, the
+    difference in mean loss (codex - claude) is converted to a signed score
+    and shrunk towards the built-in weight with prior_strength pseudo
+    samples. Features seen on only one engine keep the built-in weight.
+
+    Returns the weights document written by the `train` subcommand.
     """
-    if config is None:
-        config = load_config()
+    samples = []
+    for task in tasks:
+        engine = _history_engine(task)
+        if engine is None or task.get("status") not in FINISHED_STATUSES:
+            continue
+        failed = task.get("status") == "failed" or task.get("execution_path") == "fallback"
+        budget = task.get("budget") if isinstance(task.get("budget"), dict) else {}
+        tokens = budget.get("actual_tokens")
+        samples.append((engine, failed, tokens if isinstance(tokens, (int, float)) and tokens > 0 else None, task))
+
+    token_values = sorted(t for _, _, t, _ in samples if t)
+    median = token_values[len(token_values) // 2] if token_values else 1
+
+    # feature → engine → [loss_sum, count]
+    stats: Dict[str, Dict[str, List[float]]] = {}
+    for engine, failed, tokens, task in samples:
+        loss = (tokens or median) / median + (failure_penalty if failed else 0.0)
+        for feature in task_features(task, keyword_match):
+            entry = stats.setdefault(feature, {}).setdefault(engine, [0.0, 0])
+            entry[0] += loss
+            entry[1] += 1
+
+    claude = {
+        "keywords": {},
+        "multi_file_threshold": CLAUDE_SIGNALS["multi_file_threshold"],
+        "authority_bonus": {},
+    }
+    codex: Dict[str, Any] = {"keywords": {}, "authority_bonus": {}}
+    features = {f"kw:{kw}" for kw in CLAUDE_SIGNALS["keywords"]} | {f"kw:{kw}" for kw in CODEX_SIGNALS["keywords"]}
+    features |= {f"authority:{a}" for a in CLAUDE_SIGNALS["authority_bonus"]}
+    features |= {f"authority:{a}" for a in CODEX_SIGNALS["authority_bonus"]}
+    features |= set(_FEATURE_KEYS)
+    features |= {f for f in stats if f.startswith("authority:")}
+
+    report = {}
+    for feature in sorted(features):
+        prior = feature_weight(CLAUDE_SIGNALS, feature) - feature_weight(CODEX_SIGNALS, feature)
+        by_engine = stats.get(feature, {})
+        n_claude = by_engine.get("claude-team", [0.0, 0])[1]
+        n_codex = by_engine.get("codex", [0.0, 0])[1]
+        signed = float(prior)
+        if n_claude and n_codex:
+            mean_claude = by_engine["claude-team"][0] / n_claude
+            mean_codex = by_engine["codex"][0] / n_codex
+            observed = POINTS_PER_LOSS * (mean_codex - mean_claude)
+            n = min(n_claude, n_codex)
+            signed = (n * observed + prior_strength * prior) / (n + prior_strength)
+        weight = max(-MAX_LEARNED_WEIGHT, min(MAX_LEARNED_WEIGHT, int(round(signed))))
+        report[feature] = {"prior": prior, "learned": weight, "claude_samples": n_claude, "codex_samples": n_codex}
+
+        for table, value in ((claude, max(weight, 0)), (codex, max(-weight, 0))):
+            if feature.startswith("kw:"):
+                table["keywords"][feature[3:]] = value
+            elif feature.startswith("authority:"):
+                table["authority_bonus"][feature[10:]] = value
+            else:
+                table[_FEATURE_KEYS[feature]] = value
+
+    from datetime import datetime, timezone
+
+    return {
+        "version": WEIGHTS_VERSION,
+        "trained_at": datetime.now(timezone.utc).isoformat(),
+        "samples": len(samples),
+        "params": {
+            "keyword_match": keyword_match,
+            "failure_penalty": failure_penalty,
+            "prior_strength": prior_strength,
+            "median_tokens": median,
+        },
+        "claude": claude,
+        "codex": codex,
+        "features": report,
+    }
+
+
+def train_main(argv: List[str]) -> int:
+    """`engine_router.py train`: fit weights from .shiki/tasks/ history."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="engine_router.py train",
+        description="Fit routing weights from finished tasks in .shiki/tasks/",
+    )
+    parser.add_argument("--tasks-dir", default=".shiki/tasks", help="Task directory (default: .shiki/tasks)")
+    parser.add_argument("--output", "-o", default=None,
+                        help=f"Weights file (default: .shiki/state/{WEIGHTS_FILE_NAME})")
+    parser.add_argument("--failure-penalty", type=float, default=2.0,
+                        help="Loss added for a failed/fallback task, in median-token units (default: 2.0)")
+    parser.add_argument("--prior-strength", type=float, default=5.0,
+                        help="Pseudo-samples pulling weights towards the built-in values (default: 5.0)")
+    parser.add_argument("--min-samples", type=int, default=10,
+                        help="Refuse to write weights with fewer finished tasks (default: 10)")
+    parser.add_argument("--dry-run", action="store_true", help="Print the learned weights without writing")
+    args = parser.parse_args(argv)
+
+    config = load_config()
+    with open_index(args.tasks_dir) as index:
+        history_files = index.paths(FINISHED_STATUSES)
+    tasks = [task for _, task, _ in load_task_files(history_files) if task]
+    weights = train_weights(
+        tasks,
+        keyword_match=config.get("keyword_match", "substring"),
+        failure_penalty=args.failure_penalty,
+        prior_strength=args.prior_strength,
+    )
+
+    print(f"Trained on {weights['samples']} finished tasks (median actual_tokens: {weights['params']['median_tokens']:,})\n")
+    print(f"{'Feature':<28} {'Prior':>6} {'Learned':>8} {'Claude n':>9} {'Codex n':>8}")
+    print("-" * 63)
+    for feature, row in weights["features"].items():
+        marker = " *" if row["prior"] != row["learned"] else ""
+        print(f"{feature:<28} {row['prior']:>6} {row['learned']:>8} {row['claude_samples']:>9} {row['codex_samples']:>8}{marker}")
+    print("\n(+ favors claude-team, - favors codex, * changed)")
 
+    if args.dry_run:
+        print("\n(dry-run: weights not written)")
+        return 0
+    if weights["samples"] < args.min_samples:
+        print(f"\nNot enough history ({weights['samples']} < {args.min_samples}); weights not written", file=sys.stderr)
+        return 1
+
+    output = args.output or config.get("weights_file") or os.path.join(".shiki", "state", WEIGHTS_FILE_NAME)
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(weights, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+    print(f"\nWeights written to {output}")
+    return 0
+
+
+def _fixed_route(task: Dict[str, Any], config: Dict[str, Any]) -> Optional[Dict[str, str]]:
+    """Routing decisions that do not depend on affinity scores or load.
+
+    Returns None when the task is free to be routed by the strategy.
+    """
     strategy = config.get("routing_strategy", "affinity")
     codex_ok = config.get("codex_available", True)
 
@@ -228,9 +701,10 @@ def route_task(task: Dict[str, Any], config: Optional[Dict] = None) -> Dict[str,
     if assigned == "human":
         return {"primary": "human", "fallback": "human", "reason": "human_task"}
 
-    # Affinity scoring
-    claude_score, codex_score = score_task(task)
+    return None
+
 
+def _affinity_route(claude_score: int, codex_score: int) -> Dict[str, str]:
     if claude_score > codex_score:
         return {
             "primary": "claude-team",
@@ -252,71 +726,795 @@ def route_task(task: Dict[str, Any], config: Optional[Dict] = None) -> Dict[str,
         }
 
 
-def update_task_engine(task_file: str, dry_run: bool = False) -> Dict[str, str]:
-    """Route a single task and optionally update the file."""
-    with open(task_file, encoding="utf-8") as f:
-        task = json.load(f)
+def _other_engine(engine: str) -> str:
+    return "codex" if engine == "claude-team" else "claude-team"
 
-    result = route_task(task)
-    task_id = task.get("id", os.path.basename(task_file))
 
-    if not dry_run and task.get("status") == "pending":
-        # Update task with routing decision
-        task["assigned_to"] = result["primary"]
-        if "engine" not in task:
-            task["engine"] = {}
-        if isinstance(task.get("engine"), str):
-            task["engine"] = {"primary": task["engine"]}
-        task["engine"] = {
-            "primary": result["primary"],
-            "fallback": result["fallback"],
-            "routing_reason": result["reason"],
+def route_task(task: Dict[str, Any], config: Optional[Dict] = None) -> Dict[str, str]:
+    """Determine the optimal engine for a task.
+
+    Batch strategies (load_balanced, round-robin) need the whole batch; see
+    route_batch(). For a lone task, load_balanced degrades to affinity and
+    round-robin alternates by a stable hash of the task id.
+
+    Returns dict with:
+        primary: "codex" | "claude-team"
+        fallback: "claude-team" | "codex"
+        reason: human-readable explanation
+    """
+    if config is None:
+        config = load_config()
+
+    fixed = _fixed_route(task, config)
+    if fixed is not None:
+        return fixed
+
+    if config.get("routing_strategy") == "round-robin":
+        import zlib
+
+        engine = ROUND_ROBIN_ORDER[zlib.crc32(str(task.get("id", "")).encode("utf-8")) % 2]
+        return {"primary": engine, "fallback": _other_engine(engine), "reason": "round_robin(hash)"}
+
+    # Affinity scoring
+    claude_score, codex_score = score_task(task, config.get("keyword_match", "substring"), config.get("signals"))
+    return _affinity_route(claude_score, codex_score)
+
+
+# ─────────────────────────────────────────────
+# Batch Strategies: バッチ全体を見て振り分ける
+#   round-robin:   自由に選べるタスクを交互に割り当て
+#   load_balanced: estimated_tokens と各エンジンの同時実行数から
+#                  バッチ完了時間（makespan）が最小になるよう割り当て
+# ─────────────────────────────────────────────
+
+BATCH_STRATEGIES = ("load_balanced", "round-robin")
+ROUND_ROBIN_ORDER = ("codex", "claude-team")
+DEFAULT_ENGINE_CONCURRENCY = {"claude-team": 3, "codex": 4}
+DEFAULT_BALANCE_MARGIN = 3
+
+
+def _estimated_tokens(task: Dict[str, Any]) -> Optional[int]:
+    budget = task.get("budget") or {}
+    value = budget.get("estimated_tokens") if isinstance(budget, dict) else None
+    return value if isinstance(value, (int, float)) and value > 0 else None
+
+
+def route_batch(tasks: List[Dict[str, Any]], config: Optional[Dict] = None) -> List[Dict[str, str]]:
+    """Route a batch of tasks that will run concurrently.
+
+    Tasks pinned by _fixed_route() keep their engine. For load_balanced, a
+    task whose affinity margin |claude - codex| is at least
+    engines.routing.balance_margin also stays on its affinity engine; the
+    remaining tasks are placed longest-first onto whichever engine would
+    finish them earliest, given engines.<name>.concurrency parallel slots
+    and budget.estimated_tokens as the cost (batch mean when missing).
+
+    Returns one routing result per task, in input order.
+    """
+    import heapq
+
+    if config is None:
+        config = load_config()
+    strategy = config.get("routing_strategy", "affinity")
+    keyword_match = config.get("keyword_match", "substring")
+
+    results: List[Optional[Dict[str, str]]] = [None] * len(tasks)
+    free: List[Tuple[int, int, int]] = []  # (index, claude_score, codex_score)
+    for i, task in enumerate(tasks):
+        fixed = _fixed_route(task, config)
+        if fixed is not None:
+            results[i] = fixed
+        else:
+            free.append((i, *score_task(task, keyword_match, config.get("signals"))))
+
+    if strategy == "round-robin":
+        for n, (i, _, _) in enumerate(free):
+            engine = ROUND_ROBIN_ORDER[n % 2]
+            results[i] = {"primary": engine, "fallback": _other_engine(engine), "reason": "round_robin"}
+        return results  # type: ignore[return-value]
+
+    if strategy != "load_balanced":
+        for i, claude_score, codex_score in free:
+            results[i] = _affinity_route(claude_score, codex_score)
+        return results  # type: ignore[return-value]
+
+    known = [t for t in (_estimated_tokens(task) for task in tasks) if t]
+    default_cost = sum(known) / len(known) if known else 1
+
+    def cost(i: int) -> float:
+        return _estimated_tokens(tasks[i]) or default_cost
+
+    concurrency = config.get("engine_concurrency", DEFAULT_ENGINE_CONCURRENCY)
+    slots: Dict[str, List[float]] = {
+        engine: [0.0] * max(1, int(concurrency.get(engine, 1)))
+        for engine in ("claude-team", "codex")
+    }
+
+    def place(engine: str, i: int) -> float:
+        finish = heapq.heappop(slots[engine]) + cost(i)
+        heapq.heappush(slots[engine], finish)
+        return finish
+
+    margin = config.get("balance_margin", DEFAULT_BALANCE_MARGIN)
+    flexible: List[Tuple[int, int, int]] = []
+    for i, claude_score, codex_score in free:
+        if abs(claude_score - codex_score) >= margin:
+            results[i] = _affinity_route(claude_score, codex_score)
+        else:
+            flexible.append((i, claude_score, codex_score))
+
+    # Work that cannot move is laid out first (longest first)
+    fixed_load = [(i, r["primary"]) for i, r in enumerate(results) if r is not None and r["primary"] in slots]
+    for i, engine in sorted(fixed_load, key=lambda item: -cost(item[0])):
+        place(engine, i)
+
+    for i, claude_score, codex_score in sorted(flexible, key=lambda item: -cost(item[0])):
+        preferred = _affinity_route(claude_score, codex_score)["primary"]
+        other = _other_engine(preferred)
+        if slots[other][0] + cost(i) < slots[preferred][0] + cost(i):
+            engine = other
+        else:
+            engine = preferred
+        place(engine, i)
+        results[i] = {
+            "primary": engine,
+            "fallback": _other_engine(engine),
+            "reason": f"load_balanced(claude={claude_score},codex={codex_score})->{engine}",
         }
 
-        with open(task_file, "w", encoding="utf-8") as f:
-            json.dump(task, f, indent=2, ensure_ascii=False)
+    return results  # type: ignore[return-value]
+
+
+def batch_makespan(
+    tasks: List[Dict[str, Any]],
+    results: List[Dict[str, str]],
+    config: Dict[str, Any],
+) -> Dict[str, float]:
+    """Predicted finish time (in estimated tokens) per engine for a routed batch."""
+    import heapq
+
+    known = [t for t in (_estimated_tokens(task) for task in tasks) if t]
+    default_cost = sum(known) / len(known) if known else 1
+    concurrency = config.get("engine_concurrency", DEFAULT_ENGINE_CONCURRENCY)
+    spans: Dict[str, float] = {}
+    for engine in ("claude-team", "codex"):
+        costs = sorted(
+            (_estimated_tokens(t) or default_cost for t, r in zip(tasks, results) if r["primary"] == engine),
+            reverse=True,
+        )
+        heap = [0.0] * max(1, int(concurrency.get(engine, 1)))
+        for c in costs:
+            heapq.heappush(heap, heapq.heappop(heap) + c)
+        spans[engine] = max(heap)
+    return spans
+
 
+def apply_routing(task: Dict[str, Any], result: Dict[str, str]) -> bool:
+    """Write a routing decision into a pending task dict.
+
+    Returns True if the task changed, False if it already carried the same
+    assignment and engine block (or is not pending) and needs no rewrite.
+    """
+    if task.get("status") != "pending":
+        return False
+
+    engine = {
+        "primary": result["primary"],
+        "fallback": result["fallback"],
+        "routing_reason": result["reason"],
+    }
+    if task.get("assigned_to") == result["primary"] and task.get("engine") == engine:
+        return False
+
+    task["assigned_to"] = result["primary"]
+    task["engine"] = engine
+    return True
+
+
+def dump_task(task: Dict[str, Any]) -> str:
+    """Serialize a task exactly as the router has always written it."""
+    return json.dumps(task, indent=2, ensure_ascii=False)
+
+
+def update_task_engine(
+    task_file: str,
+    dry_run: bool = False,
+    config: Optional[Dict] = None,
+) -> Dict[str, str]:
+    """Route a single task and optionally update the file.
+
+    The file is only rewritten when the routing decision actually changes it,
+    read and replaced under its task-store lock.
+    """
+    if dry_run:
+        with open(task_file, encoding="utf-8") as f:
+            task = json.load(f)
+        result = route_task(task, config)
+    else:
+        routed: Dict[str, Any] = {}
+
+        def apply(task: Dict[str, Any]) -> bool:
+            routed.update(route_task(task, config))
+            return apply_routing(task, routed)
+
+        task = update_json(task_file, apply, dump=dump_task)
+        result = routed
+
+    task_id = task.get("id", os.path.basename(task_file))
     return {"task_id": task_id, **result}
 
 
+# ─────────────────────────────────────────────
+# Batch Routing: --all --jobs N
+# ワーカープロセスで読み込み・スコアリングを行い、
+# 変更のあったファイルだけをメインプロセスでまとめて書き込む
+# （WRITE_BATCH_SIZE 件ごとに task_store.WriteBatch でグループコミット）
+# ─────────────────────────────────────────────
+
+WRITE_BATCH_SIZE = 256
+
+
+def _route_file_worker(args: Tuple[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Process-pool worker: route one file, return the new content if changed.
+
+    "stamp" is the file's task-store stamp before reading, so the parent can
+    tell whether someone else rewrote it before the batch is committed.
+    """
+    task_file, config = args
+    stamp = file_stamp(task_file)
+    try:
+        with open(task_file, encoding="utf-8") as f:
+            task = json.load(f)
+    except (json.JSONDecodeError, OSError) as e:
+        return {"file": task_file, "error": str(e)}
+
+    result = route_task(task, config)
+    content = dump_task(task) if apply_routing(task, result) else None
+    return {
+        "file": task_file,
+        "task_id": task.get("id", os.path.basename(task_file)),
+        "result": result,
+        "content": content,
+        "stamp": stamp,
+    }
+
+
+def _flush_writes(pending: List[Tuple[str, str, Any]], config: Dict[str, Any]) -> None:
+    """Group-commit routed files; a file changed since it was read is routed again."""
+    def reroute(task: Dict[str, Any]) -> bool:
+        return apply_routing(task, route_task(task, config))
+
+    with WriteBatch(dump=dump_task) as batch:
+        for task_file, content, stamp in pending:
+            batch.write(task_file, content, expect=stamp, check=True, update=reroute)
+    pending.clear()
+
+
+def route_files(
+    task_files: List[str],
+    config: Dict[str, Any],
+    jobs: int = 1,
+    dry_run: bool = False,
+):
+    """Route many task files, yielding one outcome dict per file in input order.
+
+    With jobs > 1 parsing and scoring run in a process pool. Changed files are
+    written from the parent in batches of WRITE_BATCH_SIZE; unchanged files
+    are never touched. Each outcome carries "written" (bool) or "error".
+    """
+    if config.get("routing_strategy") in BATCH_STRATEGIES:
+        yield from _route_files_as_batch(task_files, config, jobs=jobs, dry_run=dry_run)
+        return
+
+    items = [(tf, config) for tf in task_files]
+    pending: List[Tuple[str, str, Any]] = []
+
+    if jobs > 1 and len(task_files) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        chunksize = max(1, min(64, len(items) // (jobs * 4)))
+        executor = ProcessPoolExecutor(max_workers=jobs)
+        outcomes = executor.map(_route_file_worker, items, chunksize=chunksize)
+    else:
+        executor = None
+        outcomes = map(_route_file_worker, items)
+
+    try:
+        for outcome in outcomes:
+            content = outcome.pop("content", None)
+            stamp = outcome.pop("stamp", None)
+            outcome["written"] = bool(content is not None and not dry_run)
+            if outcome["written"]:
+                pending.append((outcome["file"], content, stamp))
+                if len(pending) >= WRITE_BATCH_SIZE:
+                    _flush_writes(pending, config)
+            yield outcome
+        _flush_writes(pending, config)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def _load_task_worker(task_file: str) -> Tuple[str, Optional[Dict[str, Any]], Optional[str]]:
+    try:
+        with open(task_file, encoding="utf-8") as f:
+            return task_file, json.load(f), None
+    except (json.JSONDecodeError, OSError) as e:
+        return task_file, None, str(e)
+
+
+def load_task_files(task_files: List[str], jobs: int = 1):
+    """Parse task files (in a process pool when jobs > 1), preserving order.
+
+    Returns a list of (file, task or None, error or None).
+    """
+    if jobs > 1 and len(task_files) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        chunksize = max(1, min(64, len(task_files) // (jobs * 4)))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            return list(executor.map(_load_task_worker, task_files, chunksize=chunksize))
+    return [_load_task_worker(tf) for tf in task_files]
+
+
+def _route_files_as_batch(
+    task_files: List[str],
+    config: Dict[str, Any],
+    jobs: int = 1,
+    dry_run: bool = False,
+):
+    """route_files() for batch strategies: all pending tasks form one batch."""
+    loaded = load_task_files(task_files, jobs=jobs)
+    pending_idx = [i for i, (_, task, _) in enumerate(loaded) if task is not None and task.get("status") == "pending"]
+    batch_results = route_batch([loaded[i][1] for i in pending_idx], config)  # type: ignore[misc]
+    results = dict(zip(pending_idx, batch_results))
+
+    # Batch decisions are re-applied to the file's current content under its lock
+    batch = WriteBatch(dump=dump_task)
+    for i, (task_file, task, error) in enumerate(loaded):
+        if task is None:
+            yield {"file": task_file, "error": error}
+            continue
+        result = results.get(i) or route_task(task, config)
+        written = not dry_run and apply_routing(task, result)
+        if written:
+            try:
+                batch.update(task_file, lambda current, r=result: apply_routing(current, r))
+            except (json.JSONDecodeError, OSError) as e:
+                yield {"file": task_file, "error": str(e)}
+                continue
+            if len(batch.pending) >= WRITE_BATCH_SIZE:
+                batch.commit()
+        yield {
+            "file": task_file,
+            "task_id": task.get("id", os.path.basename(task_file)),
+            "result": result,
+            "written": written,
+        }
+    batch.commit()
+
+
+def route_dag(
+    dag_file: str,
+    config: Dict[str, Any],
+    batch: Optional[int] = None,
+    dry_run: bool = False,
+    tasks_dir: str = ".shiki/tasks",
+) -> List[Dict[str, Any]]:
+    """Route the pending tasks of a DAG, one route_batch() call per DAG batch.
+
+    Nodes in the same batch run concurrently, so they are balanced together.
+    Updates each task file and the node's "engine" field unless dry_run.
+    Returns one outcome dict per routed node.
+    """
+    with open(dag_file, encoding="utf-8") as f:
+        dag = json.load(f)
+
+    batches: Dict[int, List[Dict[str, Any]]] = {}
+    for node in dag.get("nodes", []):
+        if node.get("status", "pending") != "pending":
+            continue
+        node_batch = node.get("batch", 0)
+        if batch is None or node_batch == batch:
+            batches.setdefault(node_batch, []).append(node)
+
+    outcomes: List[Dict[str, Any]] = []
+    dag_changed = False
+    writes = WriteBatch(dump=dump_task)
+    for batch_num in sorted(batches):
+        entries = []
+        for node in batches[batch_num]:
+            task_file = os.path.join(tasks_dir, f"{node.get('task_id')}.json")
+            _, task, error = _load_task_worker(task_file)
+            if task is None:
+                outcomes.append({"file": task_file, "error": error})
+            elif task.get("status") == "pending":
+                entries.append((node, task_file, task))
+
+        results = route_batch([task for _, _, task in entries], config)
+        spans = batch_makespan([task for _, _, task in entries], results, config)
+        for (node, task_file, task), result in zip(entries, results):
+            written = not dry_run and apply_routing(task, result)
+            if written:
+                writes.update(task_file, lambda current, r=result: apply_routing(current, r))
+            if not dry_run and result["primary"] != node.get("engine"):
+                node["engine"] = result["primary"]
+                dag_changed = True
+            outcomes.append({
+                "file": task_file,
+                "task_id": task.get("id", node.get("task_id")),
+                "batch": batch_num,
+                "result": result,
+                "written": written,
+                "makespan": spans,
+            })
+
+    writes.commit()
+    if dag_changed:
+        write_text(dag_file, json.dumps(dag, indent=2, ensure_ascii=False))
+
+    return outcomes
+
+
+def parse_jobs(args: List[str]) -> Tuple[int, List[str]]:
+    """Extract --jobs N / --jobs=N / -j N from argv. 0 means os.cpu_count()."""
+    jobs = 1
+    rest: List[str] = []
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        value = None
+        if arg in ("--jobs", "-j"):
+            if i + 1 >= len(args):
+                raise ValueError(f"{arg} requires a value")
+            value = args[i + 1]
+            i += 1
+        elif arg.startswith("--jobs="):
+            value = arg.split("=", 1)[1]
+        else:
+            rest.append(arg)
+        if value is not None:
+            try:
+                jobs = int(value)
+            except ValueError:
+                raise ValueError(f"invalid --jobs value: {value}")
+            if jobs <= 0:
+                jobs = os.cpu_count() or 1
+        i += 1
+    return jobs, rest
+
+
+# ─────────────────────────────────────────────
+# Router Daemon: 設定・キーワード表を常駐プロセスで保持し、
+# Unix ドメインソケット上の JSON Lines で振分要求に応答する
+#
+#   request:  {"op": "route_file", "path": "/abs/T-0001.json", "dry_run": false}
+#             {"op": "route", "task": {...}}
+#             {"op": "ping"} | {"op": "reload"} | {"op": "shutdown"}
+#   response: {"ok": true, "result": {...}} | {"ok": false, "error": "..."}
+# ─────────────────────────────────────────────
+
+ROUTER_SOCKET_NAME = "engine-router.sock"
+DAEMON_CONNECT_TIMEOUT = 0.5  # seconds
+DAEMON_REQUEST_TIMEOUT = 10.0  # seconds
+
+
+def default_socket_path() -> Optional[str]:
+    """Socket path: $SHIKI_ROUTER_SOCKET, else .shiki/state/engine-router.sock."""
+    env_path = os.environ.get("SHIKI_ROUTER_SOCKET")
+    if env_path:
+        return env_path
+    config_file = find_config_file()
+    if not config_file:
+        return None
+    return os.path.abspath(os.path.join(os.path.dirname(config_file), "state", ROUTER_SOCKET_NAME))
+
+
+def daemon_request(
+    request: Dict[str, Any],
+    socket_path: Optional[str] = None,
+    timeout: float = DAEMON_REQUEST_TIMEOUT,
+) -> Optional[Dict[str, Any]]:
+    """Send one request to the router daemon.
+
+    Returns the decoded response, or None if no daemon is listening (so the
+    caller can fall back to in-process routing).
+    """
+    import socket
+
+    socket_path = socket_path or default_socket_path()
+    if not socket_path or not hasattr(socket, "AF_UNIX") or not os.path.exists(socket_path):
+        return None
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(DAEMON_CONNECT_TIMEOUT)
+            sock.connect(socket_path)
+            sock.settimeout(timeout)
+            sock.sendall(json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as reader:
+                line = reader.readline()
+    except OSError:
+        return None
+
+    if not line:
+        return None
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError:
+        return None
+
+
+class RouterService:
+    """Routing state kept warm by the daemon.
+
+    The config (including the codex probe) is reloaded when config.yaml
+    changes or the availability TTL expires; file updates are serialized.
+    """
+
+    def __init__(self, refresh_engines: bool = False):
+        import threading
+
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._load(refresh_engines)
+        get_keyword_matcher(self.config.get("keyword_match", "substring"))
+
+    def _config_mtime(self) -> Tuple[float, float]:
+        """mtimes of config.yaml and the learned weights file."""
+        config_file = find_config_file()
+        weights_file = (
+            os.path.join(os.path.dirname(config_file), "state", WEIGHTS_FILE_NAME) if config_file else None
+        )
+        mtimes = []
+        for path in (config_file, weights_file):
+            try:
+                mtimes.append(os.path.getmtime(path) if path else 0.0)
+            except OSError:
+                mtimes.append(0.0)
+        return (mtimes[0], mtimes[1])
+
+    def _load(self, refresh_engines: bool = False) -> None:
+        import time
+
+        self.config = load_config(refresh_engines=refresh_engines)
+        self.loaded_at = time.monotonic()
+        self.config_mtime = self._config_mtime()
+
+    def current_config(self, refresh_engines: bool = False) -> Dict[str, Any]:
+        import time
+
+        with self._lock:
+            ttl = self.config.get("availability_ttl", DEFAULT_AVAILABILITY_TTL)
+            expired = ttl > 0 and time.monotonic() - self.loaded_at >= ttl
+            if refresh_engines or expired or self._config_mtime() != self.config_mtime:
+                self._load(refresh_engines)
+            return self.config
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        op = request.get("op")
+        if op == "ping":
+            return {"ok": True, "pid": os.getpid()}
+        if op == "reload":
+            self.current_config(refresh_engines=True)
+            return {"ok": True}
+        if op == "route":
+            task = request.get("task")
+            if not isinstance(task, dict):
+                return {"ok": False, "error": "'task' must be an object"}
+            config = self.current_config(bool(request.get("refresh_engines")))
+            return {"ok": True, "result": route_task(task, config)}
+        if op == "route_file":
+            path = request.get("path")
+            if not isinstance(path, str) or not os.path.isabs(path):
+                return {"ok": False, "error": "'path' must be an absolute path"}
+            config = self.current_config(bool(request.get("refresh_engines")))
+            try:
+                with self._write_lock:
+                    result = update_task_engine(path, dry_run=bool(request.get("dry_run")), config=config)
+            except (json.JSONDecodeError, OSError) as e:
+                return {"ok": False, "error": str(e)}
+            return {"ok": True, "result": result}
+        return {"ok": False, "error": f"unknown op: {op}"}
+
+
+def serve(socket_path: Optional[str] = None, refresh_engines: bool = False) -> int:
+    """Run the router daemon in the foreground until SIGTERM/SIGINT or shutdown."""
+    import signal
+    import socket
+    import socketserver
+    import threading
+
+    if not hasattr(socket, "AF_UNIX"):
+        print("Unix domain sockets are not supported on this platform", file=sys.stderr)
+        return 1
+
+    socket_path = socket_path or default_socket_path()
+    if not socket_path:
+        print("No .shiki/config.yaml found; pass --socket PATH", file=sys.stderr)
+        return 1
+
+    if os.path.exists(socket_path):
+        if daemon_request({"op": "ping"}, socket_path) is not None:
+            print(f"Router daemon already running on {socket_path}", file=sys.stderr)
+            return 1
+        os.unlink(socket_path)  # stale socket from a crashed daemon
+    os.makedirs(os.path.dirname(socket_path) or ".", exist_ok=True)
+
+    service = RouterService(refresh_engines=refresh_engines)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("request must be a JSON object")
+                    if request.get("op") == "shutdown":
+                        response: Dict[str, Any] = {"ok": True}
+                        threading.Thread(target=server.shutdown, daemon=True).start()
+                    else:
+                        response = service.handle(request)
+                except Exception as e:
+                    response = {"ok": False, "error": str(e)}
+                self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+                self.wfile.flush()
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    server = Server(socket_path, Handler)
+
+    def _stop(signum, frame):
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    codex_ok = service.config.get("codex_available", False)
+    print(f"Router daemon listening on {socket_path} (pid {os.getpid()}, "
+          f"codex {'available' if codex_ok else 'NOT available'})", file=sys.stderr)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        try:
+            os.unlink(socket_path)
+        except OSError:
+            pass
+    print("Router daemon stopped", file=sys.stderr)
+    return 0
+
+
+def pop_option(args: List[str], name: str) -> Tuple[Optional[str], List[str]]:
+    """Remove `name VALUE` / `name=VALUE` from args and return (VALUE, rest)."""
+    value = None
+    rest: List[str] = []
+    i = 0
+    while i < len(args):
+        if args[i] == name:
+            if i + 1 >= len(args):
+                raise ValueError(f"{name} requires a value")
+            value = args[i + 1]
+            i += 2
+            continue
+        if args[i].startswith(name + "="):
+            value = args[i].split("=", 1)[1]
+        else:
+            rest.append(args[i])
+        i += 1
+    return value, rest
+
+
 def main():
     args = sys.argv[1:]
     dry_run = "--dry-run" in args
-    args = [a for a in args if a != "--dry-run"]
+    refresh_engines = "--refresh-engines" in args
+    args = [a for a in args if a not in ("--dry-run", "--refresh-engines")]
+    no_daemon = "--no-daemon" in args
+    args = [a for a in args if a != "--no-daemon"]
+    try:
+        jobs, args = parse_jobs(args)
+        socket_path, args = pop_option(args, "--socket")
+        dag_file, args = pop_option(args, "--dag")
+        batch_arg, args = pop_option(args, "--batch")
+        dag_batch = int(batch_arg) if batch_arg is not None else None
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        sys.exit(2)
+
+    if dag_file:
+        if not os.path.exists(dag_file):
+            print(f"File not found: {dag_file}", file=sys.stderr)
+            sys.exit(1)
+        config = load_config(refresh_engines=refresh_engines)
+        print(f"Routing DAG {dag_file} (strategy: {config.get('routing_strategy')})\n")
+        print(f"{'Batch':<6} {'Task':<12} {'Primary':<14} {'Fallback':<14} Reason")
+        print("-" * 76)
+        last_spans = {}
+        for outcome in route_dag(dag_file, config, batch=dag_batch, dry_run=dry_run):
+            if "error" in outcome:
+                print(f"{'':<6} {'ERROR':<12} {outcome['file']}: {outcome['error']}")
+                continue
+            result = outcome["result"]
+            print(f"{outcome['batch']:<6} {outcome['task_id']:<12} {result['primary']:<14} {result['fallback']:<14} {result['reason']}")
+            last_spans[outcome["batch"]] = outcome["makespan"]
+        for batch_num, spans in sorted(last_spans.items()):
+            print(f"\nBatch {batch_num} predicted load (tokens): "
+                  f"claude-team={spans['claude-team']:,.0f} codex={spans['codex']:,.0f}")
+        if dry_run:
+            print("\n(dry-run: no files modified)")
+        sys.exit(0)
 
     if not args or args[0] == "--help":
         print(__doc__)
         sys.exit(0)
 
+    if args[0] == "train":
+        sys.exit(train_main(args[1:] + (["--dry-run"] if dry_run else [])))
+
+    if args[0] == "serve":
+        sys.exit(serve(socket_path, refresh_engines=refresh_engines))
+
+    if args[0] == "stop":
+        if daemon_request({"op": "shutdown"}, socket_path) is None:
+            print("Router daemon is not running", file=sys.stderr)
+            sys.exit(1)
+        sys.exit(0)
+
     if args[0] == "--all":
-        task_files = sorted(glob.glob(".shiki/tasks/*.json"))
+        # Only pending tasks are routed; the index spares parsing the rest
+        with open_index(".shiki/tasks") as index:
+            task_files = index.paths(["pending"])
         if not task_files:
-            print("No task files found in .shiki/tasks/")
+            print("No pending tasks found in .shiki/tasks/")
             sys.exit(0)
 
-        config = load_config()
+        config = load_config(refresh_engines=refresh_engines)
         codex_ok = config.get("codex_available", False)
         print(f"Codex: {'available' if codex_ok else 'NOT available (all tasks -> Claude)'}")
-        print(f"Routing {len(task_files)} tasks...\n")
+        print(f"Routing {len(task_files)} tasks{f' ({jobs} jobs)' if jobs > 1 else ''}...\n")
         print(f"{'Task':<12} {'Primary':<14} {'Fallback':<14} Reason")
         print("-" * 70)
 
-        for tf in task_files:
-            try:
-                result = update_task_engine(tf, dry_run=dry_run)
-                print(f"{result['task_id']:<12} {result['primary']:<14} {result['fallback']:<14} {result['reason']}")
-            except (json.JSONDecodeError, OSError) as e:
-                print(f"{'ERROR':<12} {tf}: {e}")
+        written = 0
+        errors = 0
+        for outcome in route_files(task_files, config, jobs=jobs, dry_run=dry_run):
+            if "error" in outcome:
+                errors += 1
+                print(f"{'ERROR':<12} {outcome['file']}: {outcome['error']}")
+                continue
+            result = outcome["result"]
+            written += outcome["written"]
+            print(f"{outcome['task_id']:<12} {result['primary']:<14} {result['fallback']:<14} {result['reason']}")
 
         if dry_run:
             print("\n(dry-run: no files modified)")
+        else:
+            unchanged = len(task_files) - written - errors
+            print(f"\n{written} task file(s) updated, {unchanged} unchanged")
     else:
         task_file = args[0]
         if not os.path.exists(task_file):
             print(f"File not found: {task_file}", file=sys.stderr)
             sys.exit(1)
 
-        result = update_task_engine(task_file, dry_run=dry_run)
+        response = None
+        if not no_daemon:
+            response = daemon_request({
+                "op": "route_file",
+                "path": os.path.abspath(task_file),
+                "dry_run": dry_run,
+                "refresh_engines": refresh_engines,
+            }, socket_path)
+        if response is not None and response.get("ok"):
+            result = response["result"]
+        else:
+            # No daemon (or it failed): route in-process
+            config = load_config(refresh_engines=refresh_engines)
+            result = update_task_engine(task_file, dry_run=dry_run, config=config)
         # stdout: just the engine name (for shell scripts to capture)
         print(result["primary"])
 
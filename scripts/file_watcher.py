@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Shiki File Watcher — ディレクトリ内のファイル変更を待つ（inotify / ポーリング）
+
+指定したディレクトリ（非再帰）の直下で作成・書き込み完了・rename・削除されたファイルを
+まとめて返す。Linux では inotify（ctypes 経由、追加依存なし）を使い、使えない環境では
+mtime / size のポーリングにフォールバックする。
+
+  - まだ存在しないディレクトリは親ディレクトリを監視し、作成されたら監視を追加する。
+    監視中のディレクトリが削除された場合も親の監視に戻し、作り直されたら監視し直す
+  - next_batch() は最初の変更から debounce 秒静かになるまで（最大 max_delay 秒）変更を集める
+  - inotify のキューがあふれた場合は None を返す（呼び出し側で全体を再走査する）
+
+Usage (library):
+    from file_watcher import open_watcher
+    watcher = open_watcher([Path(".shiki/tasks")])
+    while True:
+        changed = watcher.next_batch(debounce=0.3)   # Set[Path] or None
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+DEFAULT_POLL_INTERVAL = 2.0
+
+# <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class Watcher(ABC):
+    """Common debounce logic; subclasses implement wait(timeout)."""
+
+    @abstractmethod
+    def wait(self, timeout: Optional[float]) -> Optional[Set[Path]]:
+        """Changed paths seen within timeout (empty set if none, None on overflow)."""
+
+    def next_batch(self, debounce: float = 0.3, max_delay: float = 5.0) -> Optional[Set[Path]]:
+        """Block until something changes, then collect until quiet for debounce seconds.
+
+        Returns the changed file paths, or None if events were lost and the
+        caller should rescan everything.
+        """
+        changed = self.wait(None)
+        if changed is None:
+            return None
+        first = time.monotonic()
+        while True:
+            remaining = first + max_delay - time.monotonic()
+            if remaining <= 0:
+                break
+            more = self.wait(min(debounce, remaining))
+            if more is None:
+                return None
+            if not more:
+                break
+            changed |= more
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher(Watcher):
+    """inotify on each directory (or its parent until the directory exists)."""
+
+    def __init__(self, dirs: List[Path]):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.targets = [Path(d) for d in dirs]
+        self.watches: Dict[int, Path] = {}
+        for target in self.targets:
+            self._watch_target(target)
+
+    def _add_watch(self, path: Path) -> bool:
+        if any(watched == path for watched in self.watches.values()):
+            return True
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(str(path)), WATCH_MASK)
+        if wd < 0:
+            return False
+        self.watches[wd] = path
+        return True
+
+    def _watch_target(self, target: Path) -> None:
+        if not self._add_watch(target):
+            # Not there yet: watch the parent and pick it up on IN_CREATE
+            if not self._add_watch(target.parent):
+                raise OSError(ctypes.get_errno(), f"cannot watch {target} or its parent")
+
+    def _rearm(self, removed: Path) -> None:
+        """Fall back to the parent for targets that were (or were waiting in) removed."""
+        for target in self.targets:
+            if target == removed or target.parent == removed:
+                try:
+                    self._watch_target(target)
+                except OSError:
+                    # Parent gone too: nothing left to watch for this target
+                    pass
+
+    def wait(self, timeout: Optional[float]) -> Optional[Set[Path]]:
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed: Set[Path] = set()
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, name_len = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + name_len].rstrip(b"\0")
+            offset += EVENT_HEADER.size + name_len
+            if mask & IN_Q_OVERFLOW:
+                return None
+            directory = self.watches.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_DELETE_SELF:
+                self.watches.pop(wd, None)
+                self._rearm(directory)
+                continue
+            if not name:
+                continue
+            path = directory / os.fsdecode(name)
+            if mask & IN_ISDIR:
+                if path in self.targets and self._add_watch(path):
+                    # Files written before the watch existed
+                    changed.update(p for p in path.iterdir() if p.is_file())
+                continue
+            if directory in self.targets:
+                changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PollingWatcher(Watcher):
+    """Compare (mtime_ns, size) of every file in the directories each interval."""
+
+    def __init__(self, dirs: List[Path], interval: float = DEFAULT_POLL_INTERVAL):
+        self.dirs = [Path(d) for d in dirs]
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        stamps: Dict[Path, Tuple[int, int]] = {}
+        for directory in self.dirs:
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_file():
+                            st = entry.stat()
+                            stamps[Path(entry.path)] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                continue
+        return stamps
+
+    def wait(self, timeout: Optional[float]) -> Optional[Set[Path]]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            delay = self.interval if deadline is None else min(self.interval, max(deadline - time.monotonic(), 0))
+            time.sleep(delay)
+            current = self._scan()
+            changed = {path for path, stamp in current.items() if self.snapshot.get(path) != stamp}
+            changed |= set(self.snapshot) - set(current)
+            self.snapshot = current
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+
+def open_watcher(dirs: List[Path], poll_interval: float = DEFAULT_POLL_INTERVAL,
+                 polling: bool = False) -> Watcher:
+    """InotifyWatcher on Linux, PollingWatcher otherwise (or when polling=True)."""
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(dirs)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(dirs, poll_interval)
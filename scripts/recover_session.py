@@ -5,24 +5,42 @@ recover_session.py — Shiki（式） セッション復旧スクリプト
 前回中断したセッションの状態を読み取り、Claude Code 用の復旧プロンプトを生成する。
 
 使用方法:
-    python3 scripts/recover_session.py [session_file]
+    python3 scripts/recover_session.py [session_file] [--limit N]
     python3 scripts/recover_session.py                    # 最新のセッションを自動検出
     python3 scripts/recover_session.py path/to/session.json  # 指定ファイルから復旧
+    python3 scripts/recover_session.py --limit 10         # 各タスク区分の列挙数を上書き
 
 出力:
-    stdout に復旧プロンプトを出力（claude にパイプ可能）
+    stdout に復旧プロンプトを出力（claude にパイプ可能）。セクションごとに書き出す。
+
+タスクは全件をメモリに載せず、タスクインデックスからステータスごとに流し読みする。
+各区分（進行中 / ブロック中 / 未着手 / レビュー待ち）は優先度 → 後続タスク数（その
+タスクに依存する未完了タスクの数）の順で上位だけを列挙し、残りは優先度別の件数に
+まとめる。上限は config.yaml の recovery セクション（in_progress_limit など）で変えられる。
 
 例:
     python3 scripts/recover_session.py | claude --prompt -
 """
 
+import argparse
+import heapq
 import json
-import os
 import sys
-import glob
-from datetime import datetime
+from collections import Counter
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from task_index import TaskIndex, open_index
+
+# 区分ごとに列挙するタスク数の既定値（config.yaml の recovery.<区分>_limit で上書き）
+DEFAULT_SECTION_LIMITS = {"in_progress": 30, "blocked": 20, "pending": 20, "review": 10}
+DEFAULT_DIRTY_FILES_LIMIT = 30
+# 1 タスクの行に並べる依存タスク数
+MAX_LISTED_DEPS = 5
+MAX_ERROR_WARNINGS = 10
+
+PRIORITY_ORDER = ("critical", "high", "medium", "low")
+PRIORITY_RANK = {priority: rank for rank, priority in enumerate(PRIORITY_ORDER)}
 
 
 def find_project_root() -> Path:
@@ -72,23 +90,6 @@ def load_session(session_path: Path) -> dict:
         return json.load(f)
 
 
-def load_tasks(project_root: Path) -> list:
-    """タスクファイルを読み込む"""
-    tasks_dir = project_root / ".shiki" / "tasks"
-    tasks = []
-    if tasks_dir.exists():
-        for task_file in tasks_dir.glob("*.json"):
-            if task_file.name == ".keep":
-                continue
-            try:
-                with open(task_file, "r", encoding="utf-8") as f:
-                    task = json.load(f)
-                    tasks.append(task)
-            except (json.JSONDecodeError, OSError) as e:
-                print(f"# WARNING: タスクファイル読み込みエラー: {task_file}: {e}", file=sys.stderr)
-    return tasks
-
-
 def load_config(project_root: Path) -> dict:
     """config.yaml の基本情報を読み取る（簡易パーサ）"""
     config_file = project_root / ".shiki" / "config.yaml"
@@ -105,48 +106,84 @@ def load_config(project_root: Path) -> dict:
     return config
 
 
-def categorize_tasks(tasks: list) -> dict:
-    """タスクをステータス別に分類する"""
-    categories = {
-        "incomplete": [],        # pending, in_progress, blocked
-        "in_progress": [],       # in_progress
-        "blocked": [],           # blocked
-        "pending": [],           # pending
-        "review": [],            # review
-        "completed": [],         # completed
-        "failed": [],            # failed
+def section_limits(config: dict, override: Optional[int] = None) -> Dict[str, int]:
+    """区分ごとの列挙上限（override > config.yaml の <区分>_limit > 既定値）
+
+    負の上限は ValueError。
+    """
+    if override is not None and override < 0:
+        raise ValueError(f"--limit は 0 以上で指定してください: {override}")
+    limits = {}
+    for section, default in DEFAULT_SECTION_LIMITS.items():
+        value = config.get(f"{section}_limit", "")
+        if value.lstrip("-").isdigit() and int(value) < 0:
+            raise ValueError(f"recovery.{section}_limit は 0 以上で指定してください: {value}")
+        limits[section] = override if override is not None else (int(value) if value.isdigit() else default)
+    return limits
+
+
+def non_negative_int(value: str) -> int:
+    """argparse 用: 0 以上の整数"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"整数ではありません: {value}")
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"0 以上で指定してください: {value}")
+    return number
+
+
+def count_fan_out(index: TaskIndex) -> Counter:
+    """task_id → そのタスクに依存する未完了タスクの数（タスクは 1 件ずつ流し読み）"""
+    fan_out: Counter = Counter()
+    errors = 0
+    for task in index.iter_tasks():
+        if "error" in task:
+            errors += 1
+            if errors <= MAX_ERROR_WARNINGS:
+                print(f"# WARNING: タスクファイル読み込みエラー: {task['path']}: {task['error']}", file=sys.stderr)
+            continue
+        if task.get("status") != "completed":
+            fan_out.update(set(task.get("depends_on") or []))
+    if errors > MAX_ERROR_WARNINGS:
+        print(f"# WARNING: ほか {errors - MAX_ERROR_WARNINGS} 件のタスクファイルが読み込めません", file=sys.stderr)
+    return fan_out
+
+
+def task_summary(task: dict, fan_out: Counter) -> dict:
+    """プロンプトに載せるタスクの要約"""
+    return {
+        "id": task.get("id", "UNKNOWN"),
+        "title": task.get("title", "No title"),
+        "status": task.get("status", "pending"),
+        "assigned_to": task.get("assigned_to", "unassigned"),
+        "claimed_by": task.get("claimed_by"),
+        "priority": task.get("priority", "medium"),
+        "depends_on": task.get("depends_on", []),
+        "theta_phase": task.get("theta_phase"),
+        "authority_layer": task.get("authority_layer"),
+        "fan_out": fan_out.get(task.get("id"), 0),
     }
 
-    for task in tasks:
-        status = task.get("status", "pending")
-        task_summary = {
-            "id": task.get("id", "UNKNOWN"),
-            "title": task.get("title", "No title"),
-            "status": status,
-            "assigned_to": task.get("assigned_to", "unassigned"),
-            "claimed_by": task.get("claimed_by"),
-            "priority": task.get("priority", "medium"),
-            "depends_on": task.get("depends_on", []),
-            "theta_phase": task.get("theta_phase"),
-            "authority_layer": task.get("authority_layer"),
-        }
-
-        if status in ("pending", "in_progress", "blocked"):
-            categories["incomplete"].append(task_summary)
-        if status == "in_progress":
-            categories["in_progress"].append(task_summary)
-        if status == "blocked":
-            categories["blocked"].append(task_summary)
-        if status == "pending":
-            categories["pending"].append(task_summary)
-        if status == "review":
-            categories["review"].append(task_summary)
-        if status == "completed":
-            categories["completed"].append(task_summary)
-        if status == "failed":
-            categories["failed"].append(task_summary)
-
-    return categories
+
+def top_tasks(index: TaskIndex, status: str, limit: int, fan_out: Counter) -> Tuple[List[dict], Counter]:
+    """status のタスクのうち優先度 → 後続タスク数の順で上位 limit 件と、残りの優先度別件数
+
+    heapq.nsmallest で流し読みするので、保持するのは上位 limit 件だけ。
+    優先度別件数はインデックスの集計から取り、列挙した分を引く（limit 0 でも正しい）。
+    """
+    statuses = [status, None] if status == "pending" else [status]  # status なしは pending 扱い
+    remaining = Counter(index.priority_counts(statuses))
+
+    def rank(task: dict) -> tuple:
+        return (PRIORITY_RANK.get(task.get("priority", "medium"), len(PRIORITY_ORDER)),
+                -fan_out.get(task.get("id"), 0), task.get("id", ""))
+
+    rows = index.iter_tasks(statuses) if limit > 0 else iter(())
+    top = [task_summary(task, fan_out) for task in heapq.nsmallest(limit, rows, key=rank)]
+    for t in top:
+        remaining[t["priority"]] -= 1
+    return top, +remaining
 
 
 def format_task_list(tasks: list, indent: str = "  ") -> str:
@@ -157,23 +194,43 @@ def format_task_list(tasks: list, indent: str = "  ") -> str:
     lines = []
     for t in tasks:
         claimed = f" [担当: {t['claimed_by']}]" if t.get("claimed_by") else ""
-        deps = f" (依存: {', '.join(t['depends_on'])})" if t.get("depends_on") else ""
+        deps = ""
+        if t.get("depends_on"):
+            listed = ", ".join(t["depends_on"][:MAX_LISTED_DEPS])
+            more = len(t["depends_on"]) - MAX_LISTED_DEPS
+            deps = f" (依存: {listed}{f' ほか {more} 件' if more > 0 else ''})"
         phase = f" [θ: {t['theta_phase']}]" if t.get("theta_phase") else ""
+        fan_out = f" [後続: {t['fan_out']} 件]" if t.get("fan_out") else ""
         lines.append(
             f"{indent}- {t['id']}: {t['title']} "
-            f"(status={t['status']}, priority={t['priority']}, assigned={t['assigned_to']}{claimed}){deps}{phase}"
+            f"(status={t['status']}, priority={t['priority']}, assigned={t['assigned_to']}{claimed})"
+            f"{deps}{phase}{fan_out}"
         )
     return "\n".join(lines) + "\n"
 
 
+def format_remaining(remaining: Counter, indent: str = "  ") -> str:
+    """列挙しなかったタスクの優先度別件数"""
+    total = sum(remaining.values())
+    if not total:
+        return ""
+    ordered = [p for p in PRIORITY_ORDER if remaining[p]] + sorted(p for p in remaining if p not in PRIORITY_RANK)
+    breakdown = " / ".join(f"{p} {remaining[p]:,}" for p in ordered)
+    return f"{indent}- …ほか {total:,} 件（{breakdown}）\n"
+
+
 def generate_recovery_prompt(
     session: dict,
-    tasks: list,
     project_root: Path,
     config: dict,
-) -> str:
-    """復旧プロンプトを生成する"""
-    categories = categorize_tasks(tasks)
+    limits: Optional[Dict[str, int]] = None,
+) -> Iterator[str]:
+    """復旧プロンプトをセクションごとに生成する
+
+    タスクはインデックスから区分ごとに流し読みし、各区分の上位 limits 件だけを保持する。
+    プロンプトの大きさとメモリ使用量はタスク総数によらず上限がある。
+    """
+    limits = limits or section_limits(config)
 
     # セッション情報の抽出
     session_id = session.get("session_id", "unknown")
@@ -192,17 +249,14 @@ def generate_recovery_prompt(
     budget_limit = budget.get("budget_limit", 0)
     budget_pct = (tokens_used / budget_limit * 100) if budget_limit > 0 else 0
 
-    # プロンプト構築
-    prompt_parts = []
-
-    prompt_parts.append(
+    yield (
         "# セッション復旧指示\n\n"
         "前回中断したセッションから作業を再開してください。\n"
         "以下の状態情報に基づいて、チームを再構築し、未完了タスクを完了させてください。\n"
     )
 
     # セッション概要
-    prompt_parts.append(
+    yield (
         f"\n## 1. セッション概要\n"
         f"- セッションID: {session_id}\n"
         f"- モード: {mode}\n"
@@ -213,23 +267,26 @@ def generate_recovery_prompt(
 
     # Git状態
     if git_state:
-        prompt_parts.append(
+        parts = [
             f"\n## 2. Git 状態\n"
             f"- ブランチ: {git_state.get('branch', 'unknown')}\n"
             f"- コミット: {git_state.get('commit_sha', 'unknown')}\n"
-        )
+        ]
         dirty = git_state.get("dirty_files", [])
         if dirty:
-            prompt_parts.append(f"- 未コミットファイル:\n")
-            for f in dirty:
-                prompt_parts.append(f"  - {f}\n")
+            dirty_limit = config.get("dirty_files_limit", "")
+            dirty_limit = int(dirty_limit) if dirty_limit.isdigit() else DEFAULT_DIRTY_FILES_LIMIT
+            parts.append("- 未コミットファイル:\n")
+            parts.extend(f"  - {f}\n" for f in dirty[:dirty_limit])
+            if len(dirty) > dirty_limit:
+                parts.append(f"  - …ほか {len(dirty) - dirty_limit:,} 件（`git status` で確認）\n")
+        yield "".join(parts)
 
     # チーム再構築指示
-    prompt_parts.append(
+    parts = [
         f"\n## 3. チーム再構築\n"
         f"以下のメンバーでチームを再構築してください（TeamCreate で '{team_name}' を作成）:\n\n"
-    )
-
+    ]
     if members:
         for m in members:
             status_note = ""
@@ -237,37 +294,43 @@ def generate_recovery_prompt(
                 status_note = " ※前回終了済み — 再作成が必要"
             elif m.get("status") == "active":
                 status_note = " ※前回アクティブ — 再作成が必要"
-            prompt_parts.append(
+            parts.append(
                 f"- **{m.get('name', 'unknown')}** (role={m.get('role', 'unknown')}, "
                 f"authority={m.get('authority_layer', 'unknown')}){status_note}\n"
             )
     else:
-        prompt_parts.append(
-            "- メンバー情報なし。`roles/roles.yaml` を参照してチームを編成してください。\n"
-        )
-
-    # タスク状況
-    prompt_parts.append(f"\n## 4. タスク状況\n")
-
-    prompt_parts.append(f"\n### 進行中タスク（最優先で再開）\n")
-    prompt_parts.append(format_task_list(categories["in_progress"]))
-
-    prompt_parts.append(f"\n### ブロック中タスク（ブロッカー解決が必要）\n")
-    prompt_parts.append(format_task_list(categories["blocked"]))
-
-    prompt_parts.append(f"\n### 未着手タスク（着手待ち）\n")
-    prompt_parts.append(format_task_list(categories["pending"]))
+        parts.append("- メンバー情報なし。`roles/roles.yaml` を参照してチームを編成してください。\n")
+    yield "".join(parts)
 
-    prompt_parts.append(f"\n### レビュー待ちタスク\n")
-    prompt_parts.append(format_task_list(categories["review"]))
+    # タスク状況（区分ごとに流し読みして上位だけを列挙）
+    yield "\n## 4. タスク状況\n"
+    tasks_dir = project_root / ".shiki" / "tasks"
+    sections = [
+        ("in_progress", "進行中タスク（最優先で再開）"),
+        ("blocked", "ブロック中タスク（ブロッカー解決が必要）"),
+        ("pending", "未着手タスク（着手待ち）"),
+        ("review", "レビュー待ちタスク"),
+    ]
+    if tasks_dir.exists():
+        with open_index(str(tasks_dir)) as index:
+            counts = index.status_counts()
+            print(f"# タスク数: {sum(counts.values())}", file=sys.stderr)
+            fan_out = count_fan_out(index)
+            for status, heading in sections:
+                top, remaining = top_tasks(index, status, limits[status], fan_out)
+                yield f"\n### {heading}\n" + format_task_list(top) + format_remaining(remaining)
+    else:
+        counts = {}
+        for _, heading in sections:
+            yield f"\n### {heading}\n" + format_task_list([])
 
-    prompt_parts.append(
+    yield (
         f"\n### 完了/失敗タスク（参考）\n"
-        f"  完了: {len(categories['completed'])}件, 失敗: {len(categories['failed'])}件\n"
+        f"  完了: {counts.get('completed', 0)}件, 失敗: {counts.get('failed', 0)}件\n"
     )
 
     # θフェーズ状態
-    prompt_parts.append(
+    yield (
         f"\n## 5. θフェーズ状態\n"
         f"- 現在フェーズ: **{theta_phase}**\n"
         f"- `.shiki/config.yaml` の `convergence` セクションで exit_criteria を確認してください\n"
@@ -275,7 +338,7 @@ def generate_recovery_prompt(
     )
 
     # バジェット状態
-    prompt_parts.append(
+    budget_section = (
         f"\n## 6. バジェット状態\n"
         f"- 使用済み: {tokens_used:,} トークン\n"
         f"- 残り: {tokens_remaining:,} トークン\n"
@@ -283,22 +346,24 @@ def generate_recovery_prompt(
         f"- 使用率: {budget_pct:.1f}%\n"
     )
     if budget_pct >= 80:
-        prompt_parts.append(
+        budget_section += (
             f"\n**警告: バジェット使用率が {budget_pct:.1f}% に達しています。**\n"
             f"残りタスクの優先度を再評価し、最小限の作業で完了を目指してください。\n"
         )
+    yield budget_section
 
     # 申し送り事項
     if notes:
-        prompt_parts.append(
+        yield (
             f"\n## 7. 申し送り事項\n"
             f"{notes}\n"
         )
 
     # 再開手順
-    prompt_parts.append(
+    yield (
         f"\n## 8. 再開手順\n"
         f"1. この情報を確認し、`.shiki/` の最新状態をファイルから直接読み取ってください\n"
+        f"   （タスク一覧は各区分の上位のみ。全件は `python3 scripts/task_index.py list --status <status>`）\n"
         f"2. チームを再構築してください（TeamCreate）\n"
         f"3. 進行中タスクのメンバーを再割当してください\n"
         f"4. ブロック中タスクのブロッカーを解決してください\n"
@@ -306,18 +371,21 @@ def generate_recovery_prompt(
         f"6. バジェット残量に注意してください\n"
     )
 
-    return "".join(prompt_parts)
-
 
 def main():
+    parser = argparse.ArgumentParser(description="Shiki セッション復旧プロンプトを生成する")
+    parser.add_argument("session_file", nargs="?", help="セッションファイル（省略時は最新を自動検出）")
+    parser.add_argument("--limit", type=non_negative_int, help="各タスク区分で列挙する件数（config.yaml の recovery 設定を上書き）")
+    args = parser.parse_args()
+
     project_root = find_project_root()
 
     # セッションファイルの決定
     session_path: Optional[Path] = None
 
-    if len(sys.argv) > 1:
+    if args.session_file:
         # 引数で指定されたファイル
-        arg_path = Path(sys.argv[1])
+        arg_path = Path(args.session_file)
         if arg_path.exists():
             session_path = arg_path
         else:
@@ -336,18 +404,19 @@ def main():
     print(f"# セッションファイル: {session_path}", file=sys.stderr)
     session = load_session(session_path)
 
-    # タスク読み込み
-    tasks = load_tasks(project_root)
-    print(f"# タスク数: {len(tasks)}", file=sys.stderr)
-
     # 設定読み込み
     config = load_config(project_root)
+    try:
+        limits = section_limits(config, args.limit)
+    except ValueError as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        sys.exit(1)
 
-    # 復旧プロンプト生成
-    prompt = generate_recovery_prompt(session, tasks, project_root, config)
-
-    # stdout に出力
-    print(prompt)
+    # 復旧プロンプトをセクションごとに stdout へ書き出す
+    for section in generate_recovery_prompt(session, project_root, config, limits):
+        sys.stdout.write(section)
+        sys.stdout.flush()
+    sys.stdout.write("\n")
 
 
 if __name__ == "__main__":
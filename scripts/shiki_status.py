@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""shiki_status.py — `shiki status` の実装（1 プロセス・1 回のディレクトリ走査）
+
+モード、θフェーズ、タスク件数、バジェット、DAG 進捗、GOAL.md、バリデーション結果を
+1 つのインタプリタで集計して表示する。タスク件数はタスクインデックスから取得する。
+
+Usage:
+    python3 scripts/shiki_status.py                 # 人間向け表示
+    python3 scripts/shiki_status.py --json          # JSON で出力
+    python3 scripts/shiki_status.py --no-validate   # validate_shiki を実行しない
+
+プロジェクトルート（.shiki/ のあるディレクトリ）で実行すること。
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from task_index import TASK_STATUSES, open_index
+
+RED = "\033[0;31m"
+GREEN = "\033[0;32m"
+YELLOW = "\033[1;33m"
+CYAN = "\033[0;36m"
+BOLD = "\033[1m"
+NC = "\033[0m"
+
+RULE = "─" * 40
+
+
+def read_config_value(config_text: str, key: str, default: str) -> str:
+    """First `key: value` line anywhere in config.yaml (same rule as bin/shiki)."""
+    for line in config_text.splitlines():
+        stripped = line.strip()
+        if stripped.startswith(f"{key}:"):
+            value = stripped.split(":", 1)[1].split("#")[0].strip()
+            if value:
+                return value
+            break
+    return default
+
+
+def is_goal_template_default(goal_file: Path) -> bool:
+    """Same heuristic as bin/shiki: placeholder text or < 3 content lines."""
+    try:
+        text = goal_file.read_text(encoding="utf-8")
+    except OSError:
+        return True
+    if "（例）" in text:
+        return True
+    content_lines = [
+        line for line in text.splitlines()
+        if line and not line.startswith(("#", "-", ">"))
+    ]
+    return len(content_lines) < 3
+
+
+def latest_json(directory: Path, prefix: str = "") -> Optional[Path]:
+    """Last *.json file in directory by name (matches `find | sort -r | head -1`)."""
+    try:
+        names = [
+            entry.name for entry in os.scandir(directory)
+            if entry.name.startswith(prefix) and entry.name.endswith(".json") and entry.is_file()
+        ]
+    except OSError:
+        return None
+    return directory / max(names) if names else None
+
+
+def read_json(path: Optional[Path]) -> Optional[Dict[str, Any]]:
+    if path is None:
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else None
+    except (json.JSONDecodeError, OSError):
+        return None
+
+
+def max_tokens_per_session(config_text: str) -> int:
+    """github.budget.max_tokens_per_session (pyyaml if available, else a line scan)."""
+    try:
+        import yaml  # type: ignore
+
+        config = yaml.safe_load(config_text) or {}
+        return int(config.get("github", {}).get("budget", {}).get("max_tokens_per_session", 0) or 0)
+    except ImportError:
+        value = read_config_value(config_text, "max_tokens_per_session", "0")
+        return int(value) if value.isdigit() else 0
+    except Exception:
+        return 0
+
+
+def run_validation(project_dir: Path) -> bool:
+    """Run validate_shiki.main() in-process with its output suppressed."""
+    import validate_shiki
+
+    validate_shiki.ROOT = project_dir
+    validate_shiki.SHIKI = project_dir / ".shiki"
+    validate_shiki.SCHEMAS = validate_shiki.SHIKI / "schemas"
+    sink = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(sink), contextlib.redirect_stderr(sink):
+            return validate_shiki.main([]) == 0
+    except Exception:
+        return False
+
+
+def collect_status(project_dir: Path, validate: bool = True) -> Dict[str, Any]:
+    """Gather everything `shiki status` shows into one dict."""
+    shiki = project_dir / ".shiki"
+    config_path = shiki / "config.yaml"
+    try:
+        config_text = config_path.read_text(encoding="utf-8")
+    except OSError:
+        config_text = None
+
+    status: Dict[str, Any] = {
+        "mode": read_config_value(config_text, "mode", "auto") if config_text is not None else "unknown",
+    }
+
+    session = read_json(latest_json(shiki / "state", prefix="session-"))
+    if session is None:
+        status["theta_phase"] = None
+    else:
+        status["theta_phase"] = session.get("theta_phase", "unknown")
+
+    counts = {name: 0 for name in TASK_STATUSES}
+    tokens_used = 0
+    invalid = 0
+    if (shiki / "tasks").is_dir():
+        with open_index(str(shiki / "tasks")) as index:
+            for task in index.tasks():
+                if "error" in task:
+                    invalid += 1
+                    continue
+                if task.get("status") in counts:
+                    counts[task["status"]] += 1
+                budget = task.get("budget")
+                actual = budget.get("actual_tokens") if isinstance(budget, dict) else None
+                if isinstance(actual, (int, float)):
+                    tokens_used += actual
+    status["tasks"] = {
+        "counts": counts,
+        "active": counts["pending"] + counts["in_progress"] + counts["review"],
+        "total": sum(counts.values()),
+        "invalid": invalid,
+    }
+
+    status["budget"] = {
+        "max_tokens_per_session": max_tokens_per_session(config_text) if config_text is not None else 0,
+        "tokens_used": tokens_used,
+    }
+
+    dag_file = latest_json(shiki / "dag")
+    if dag_file is None:
+        status["dag"] = None
+    else:
+        dag = read_json(dag_file)
+        nodes = dag.get("nodes", []) if dag else []
+        status["dag"] = {
+            "file": str(dag_file.relative_to(project_dir)),
+            "status": dag.get("status", "unknown") if dag else "unknown",
+            "nodes": len(nodes),
+            "completed": sum(1 for n in nodes if n.get("status") == "completed"),
+        }
+
+    goal_file = project_dir / "GOAL.md"
+    if not goal_file.exists():
+        status["goal"] = "missing"
+    elif is_goal_template_default(goal_file):
+        status["goal"] = "template"
+    else:
+        status["goal"] = "defined"
+
+    status["validation"] = None
+    if validate and (project_dir / "scripts" / "validate_shiki.py").exists():
+        status["validation"] = "ok" if run_validation(project_dir) else "warnings"
+
+    return status
+
+
+def print_status(status: Dict[str, Any]) -> None:
+    """Human-readable output, same layout as the original bash implementation."""
+    print("")
+    print(f"{BOLD}Shiki Status{NC}")
+    print(RULE)
+    print(f"  Mode:        {CYAN}{status['mode']}{NC}")
+    print(f"  Theta Phase: {CYAN}{status['theta_phase'] or '(no session)'}{NC}")
+
+    tasks = status["tasks"]
+    c = tasks["counts"]
+    print(
+        f"  Tasks:       {CYAN}{tasks['active']} active{NC} "
+        f"({c['pending']} pending, {c['in_progress']} in_progress, {c['review']} review), "
+        f"{c['completed']} completed, {c['blocked']} blocked, {c['failed']} failed"
+    )
+    if tasks["invalid"]:
+        print(f"               {YELLOW}{tasks['invalid']} task file(s) could not be parsed{NC}")
+
+    budget = status["budget"]
+    if budget["max_tokens_per_session"]:
+        print(
+            f"  Budget:      {CYAN}{budget['max_tokens_per_session']} tokens/session{NC}"
+            f" ({budget['tokens_used']:,} used)"
+        )
+
+    dag = status["dag"]
+    if dag is not None:
+        print(f"  DAG:         {CYAN}{dag['status']} ({dag['completed']}/{dag['nodes']} nodes done){NC}")
+
+    goal = status["goal"]
+    if goal == "defined":
+        print(f"  GOAL.md:     {GREEN}定義済み{NC}")
+    elif goal == "template":
+        print(f"  GOAL.md:     {YELLOW}テンプレートのまま（要定義）{NC}")
+    else:
+        print(f"  GOAL.md:     {RED}未作成{NC}")
+
+    if status["validation"] == "ok":
+        print(f"  Validation:  {GREEN}OK{NC}")
+    elif status["validation"] == "warnings":
+        print(f"  Validation:  {YELLOW}warnings{NC}")
+
+    print(RULE)
+    print("")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Show Shiki project state")
+    parser.add_argument("--json", action="store_true", help="Print status as JSON")
+    parser.add_argument("--no-validate", action="store_true", help="Skip validate_shiki.py")
+    args = parser.parse_args()
+
+    project_dir = Path.cwd()
+    if not (project_dir / ".shiki").is_dir():
+        print("Shiki プロジェクトが見つかりません（.shiki/ が存在しません）", file=sys.stderr)
+        return 1
+
+    status = collect_status(project_dir, validate=not args.no_validate)
+    if args.json:
+        print(json.dumps(status, indent=2, ensure_ascii=False))
+    else:
+        print_status(status)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
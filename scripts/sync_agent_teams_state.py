@@ -5,6 +5,10 @@ sync_agent_teams_state.py — Agent Teams ⇔ .shiki/ 双方向同期スクリ
 Claude Code Agent Teams のネイティブ状態（~/.claude/teams/）と
 プロジェクトの .shiki/tasks/ の間でタスク状態を同期する。
 
+同期はフィールド単位の三方向マージ。前回同期時点のフィールドハッシュを
+.shiki/state/teams-sync-base.json に保存し、片側だけで変わったフィールドだけを
+もう片側に書く。両側で変わったフィールドは競合として報告し、書き換えない。
+
 使用方法:
     python3 scripts/sync_agent_teams_state.py [options]
 
@@ -13,25 +17,42 @@ Claude Code Agent Teams のネイティブ状態（~/.claude/teams/）と
     --dry-run          実際の変更を行わず、差分のみ表示
     --direction DEST   同期方向: both(双方向), to-shiki, to-teams
     --verbose          詳細ログを表示
+    --watch            初回同期のあと変更を監視し、変更されたタスクだけを同期し続ける
+    --poll             --watch で inotify を使わずポーリングする
+    --debounce SEC     --watch で変更をまとめる待ち時間（デフォルト: 0.3 秒）
 
 例:
     python3 scripts/sync_agent_teams_state.py --dry-run
     python3 scripts/sync_agent_teams_state.py --team-name my-project --direction to-shiki
+    python3 scripts/sync_agent_teams_state.py --watch
+
+--watch は ~/.claude/teams/<team>/tasks/、~/.claude/teams/<team>/config.json、.shiki/tasks/ を
+inotify（非 Linux ではポーリング）で監視する。連続した書き込みは debounce 秒まとめ、
+変更されたファイルだけを読み直して、そのタスク ID についてだけ比較・同期する。
 """
 
 import argparse
+import hashlib
 import json
 import os
 import sys
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional, Set, Tuple
+
+from file_watcher import open_watcher
+from task_index import load_indexed_tasks
+from task_lease import claim_refusal, read_lease_settings, set_claim
+from task_store import WriteBatch, dump_json, update_json
 
 
 # --- 定数 ---
 CLAUDE_HOME = Path.home() / ".claude"
 TEAMS_DIR = CLAUDE_HOME / "teams"
 
+# 両側で同期するタスクフィールド
+SYNC_FIELDS = ["status", "assigned_to", "claimed_by", "priority"]
+
 
 class Logger:
     """ロギングユーティリティ"""
@@ -152,30 +173,36 @@ def load_teams_tasks(team_name: str) -> dict:
 
 
 def load_shiki_tasks(project_root: Path) -> dict:
-    """shiki/tasks/ のタスクを読み込む"""
+    """shiki/tasks/ のタスクをタスクインデックスから読み込む
+
+    data はインデックスの要約（status / assigned_to / claimed_by / priority 等）。
+    ファイル全体が必要な場合は read_shiki_task(path) で読み込む。
+    """
     tasks = {}
     tasks_dir = project_root / ".shiki" / "tasks"
 
     if not tasks_dir.exists():
         return tasks
 
-    for task_file in tasks_dir.glob("*.json"):
-        if task_file.name == ".keep":
-            continue
-        try:
-            with open(task_file, "r", encoding="utf-8") as f:
-                task = json.load(f)
-                task_id = task.get("id", task_file.stem)
-                tasks[task_id] = {
-                    "data": task,
-                    "path": task_file,
-                }
-        except (json.JSONDecodeError, OSError) as e:
+    for record in load_indexed_tasks(str(tasks_dir)):
+        if "error" in record:
             continue
+        task_path = Path(record.pop("path"))
+        task_id = record.get("id", task_path.stem)
+        tasks[task_id] = {
+            "data": record,
+            "path": task_path,
+        }
 
     return tasks
 
 
+def read_shiki_task(task_path: Path) -> dict:
+    """タスクファイル全体を読み込む"""
+    with open(task_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
 def compare_task_states(
     teams_tasks: dict,
     shiki_tasks: dict,
@@ -264,40 +291,153 @@ def compare_task_states(
     return report
 
 
+def field_hash(value) -> str:
+    """フィールド値の短いハッシュ（ベーススナップショット用）"""
+    encoded = json.dumps(value, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha1(encoded).hexdigest()[:12]
+
+
+def dump_compact_json(data) -> str:
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def base_snapshot_path(project_root: Path) -> Path:
+    return project_root / ".shiki" / "state" / "teams-sync-base.json"
+
+
+def load_sync_base(project_root: Path, team_name: str) -> Dict[str, Dict[str, str]]:
+    """前回同期時点の task_id → {field: hash}（なければ空）"""
+    try:
+        with open(base_snapshot_path(project_root), "r", encoding="utf-8") as f:
+            return json.load(f).get("teams", {}).get(team_name, {})
+    except (json.JSONDecodeError, OSError, AttributeError):
+        return {}
+
+
+def save_sync_base(project_root: Path, team_name: str, entries: Dict[str, Dict[str, str]]) -> None:
+    """entries のタスクだけをベーススナップショットに書き込む
+
+    task_store.update_json でロック下に読み直してから書くので、他チームや並行する同期が
+    書いた他タスクの分は保持される。内容が変わらなければ書かない。
+    """
+    def merge(snapshot: dict) -> Optional[bool]:
+        if not isinstance(snapshot.get("teams"), dict):
+            snapshot.clear()
+            snapshot["teams"] = {}
+        team = snapshot["teams"].setdefault(team_name, {})
+        if all(team.get(task_id) == entry for task_id, entry in entries.items()):
+            return False
+        team.update(entries)
+        snapshot["updated_at"] = datetime.now(timezone.utc).isoformat()
+        return None
+
+    path = base_snapshot_path(project_root)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    update_json(str(path), merge, dump=dump_compact_json, default=dict)
+
+
+def apply_field_updates(data: dict, updates: dict) -> None:
+    """updates を data に反映する（None はフィールド削除）"""
+    for field, value in updates.items():
+        if value is None:
+            data.pop(field, None)
+        else:
+            data[field] = value
+
+
+def merge_task_fields(
+    teams_data: dict,
+    shiki_data: dict,
+    base_entry: Optional[Dict[str, str]],
+    prefer: str,
+) -> Tuple[dict, dict, list]:
+    """1 タスクの SYNC_FIELDS を三方向マージする
+
+    Returns:
+        (.shiki に書く {field: value}, Teams に書く {field: value},
+         両側で変更された [(field, teams_value, shiki_value)])
+
+    ベースがないフィールドは従来の規則で決める（prefer 側の値が None でなければ優先）。
+    """
+    to_shiki, to_teams, conflicts = {}, {}, []
+    for field in SYNC_FIELDS:
+        t_val = teams_data.get(field)
+        s_val = shiki_data.get(field)
+        t_hash, s_hash = field_hash(t_val), field_hash(s_val)
+        if t_hash == s_hash:
+            continue
+        base_hash = (base_entry or {}).get(field)
+        if base_hash is None:
+            if prefer == "teams":
+                if t_val is not None:
+                    to_shiki[field] = t_val
+                else:
+                    to_teams[field] = s_val
+            elif s_val is not None:
+                to_teams[field] = s_val
+            else:
+                to_shiki[field] = t_val
+        elif t_hash == base_hash:
+            to_teams[field] = s_val
+        elif s_hash == base_hash:
+            to_shiki[field] = t_val
+        else:
+            conflicts.append((field, t_val, s_val))
+    return to_shiki, to_teams, conflicts
+
+
 def sync_to_shiki(
     teams_tasks: dict,
     shiki_tasks: dict,
     project_root: Path,
     dry_run: bool,
     log: Logger,
+    field_updates: Dict[str, dict],
 ) -> int:
-    """Agent Teams → .shiki/tasks/ に同期する"""
+    """Agent Teams → .shiki/tasks/ に同期する
+
+    既存タスクは field_updates（task_id → {field: value}）のフィールドだけを書き換え、
+    .shiki にしかないタスクは作成する。書き込みは 1 回の WriteBatch でまとめてコミットする。
+    claimed_by を書き換える場合は lease_expires_at も付け直す（書き込み時に他のメンバーが
+    有効なリースを取っていたら claimed_by は書かない）。
+    """
     changes = 0
     tasks_dir = project_root / ".shiki" / "tasks"
+    lease_minutes = read_lease_settings(str(project_root / ".shiki" / "config.yaml"))["task_lease_minutes"]
+    batch = WriteBatch()
 
     for task_id, teams_data in teams_tasks.items():
         if task_id in shiki_tasks:
-            # 既存タスクの更新
+            # 既存タスクの更新（三方向マージで Teams 側だけが変えたフィールド）
             shiki_data = shiki_tasks[task_id]["data"]
             shiki_path = shiki_tasks[task_id]["path"]
 
-            updated = False
-            for field in ["status", "assigned_to", "claimed_by", "priority"]:
-                teams_val = teams_data.get(field)
-                if teams_val is not None and teams_val != shiki_data.get(field):
-                    log.info(
-                        f"更新: {task_id}.{field}: "
-                        f"{shiki_data.get(field)} → {teams_val}"
-                    )
-                    shiki_data[field] = teams_val
-                    updated = True
-
-            if updated:
-                shiki_data["updated_at"] = datetime.now(timezone.utc).isoformat()
+            updates = field_updates.get(task_id, {})
+            for field, value in updates.items():
+                log.info(f"更新: {task_id}.{field}: {shiki_data.get(field)} → {value}")
+
+            if updates:
+                apply_field_updates(shiki_data, updates)
                 if not dry_run:
-                    with open(shiki_path, "w", encoding="utf-8") as f:
-                        json.dump(shiki_data, f, indent=2, ensure_ascii=False)
-                        f.write("\n")
+                    updated_at = datetime.now(timezone.utc).isoformat()
+
+                    def apply(full_data: dict, updates: dict = updates) -> Optional[bool]:
+                        fields = {f: v for f, v in updates.items() if f != "claimed_by"}
+                        if "claimed_by" in updates:
+                            # 読み込み後に claim された場合に備えて現在の内容で確認し直す
+                            if claim_refusal(full_data, updates["claimed_by"]) is None:
+                                set_claim(full_data, updates["claimed_by"], lease_minutes)
+                            elif not fields:
+                                return False
+                        apply_field_updates(full_data, fields)
+                        full_data["updated_at"] = updated_at
+                        return None
+
+                    try:
+                        batch.update(str(shiki_path), apply)
+                    except (json.JSONDecodeError, OSError) as e:
+                        log.warn(f"タスク {task_id} を更新できません: {e}")
+                        continue
                 changes += 1
         else:
             # 新規タスクの作成
@@ -306,15 +446,18 @@ def sync_to_shiki(
             new_task.setdefault("id", task_id)
             new_task.setdefault("status", "pending")
             new_task.setdefault("mode_origin", "cli")
+            if new_task.get("claimed_by"):
+                set_claim(new_task, new_task["claimed_by"], lease_minutes)
             new_task["updated_at"] = datetime.now(timezone.utc).isoformat()
 
             if not dry_run:
-                task_path = tasks_dir / f"{task_id}.json"
-                with open(task_path, "w", encoding="utf-8") as f:
-                    json.dump(new_task, f, indent=2, ensure_ascii=False)
-                    f.write("\n")
+                # 同時に作られていたら上書きしない（check=True, expect=None）
+                batch.write(str(tasks_dir / f"{task_id}.json"), dump_json(new_task), check=True)
             changes += 1
 
+    batch.commit()
+    for path in batch.skipped:
+        log.warn(f"同期中に作成されたため書き込みをスキップ: {path}")
     return changes
 
 
@@ -324,36 +467,43 @@ def sync_to_teams(
     team_name: str,
     dry_run: bool,
     log: Logger,
+    field_updates: Dict[str, dict],
 ) -> int:
-    """shiki/tasks/ → Agent Teams に同期する"""
+    """shiki/tasks/ → Agent Teams に同期する
+
+    既存タスクは field_updates のフィールドだけを書き換え、Teams にないタスクは作成する。
+    書き込みは 1 回の WriteBatch でまとめてコミットする。
+    """
     changes = 0
     team_dir = TEAMS_DIR / team_name
     tasks_dir = team_dir / "tasks"
+    batch = WriteBatch()
 
     for task_id, shiki_info in shiki_tasks.items():
-        shiki_data = shiki_info["data"]
-
         if task_id in teams_tasks:
-            # 既存タスクの更新
+            # 既存タスクの更新（三方向マージで .shiki 側だけが変えたフィールド）
             teams_data = teams_tasks[task_id]
-            updated = False
-
-            for field in ["status", "assigned_to", "claimed_by", "priority"]:
-                shiki_val = shiki_data.get(field)
-                if shiki_val is not None and shiki_val != teams_data.get(field):
-                    log.info(
-                        f"更新 (Teams): {task_id}.{field}: "
-                        f"{teams_data.get(field)} → {shiki_val}"
-                    )
-                    teams_data[field] = shiki_val
-                    updated = True
-
-            if updated:
+            updates = field_updates.get(task_id, {})
+            for field, value in updates.items():
+                log.info(f"更新 (Teams): {task_id}.{field}: {teams_data.get(field)} → {value}")
+            apply_field_updates(teams_data, updates)
+
+            if updates:
                 if not dry_run and tasks_dir.exists():
-                    task_path = tasks_dir / f"{task_id}.json"
-                    with open(task_path, "w", encoding="utf-8") as f:
-                        json.dump(teams_data, f, indent=2, ensure_ascii=False)
-                        f.write("\n")
+                    task_path = str(tasks_dir / f"{task_id}.json")
+
+                    def apply(data: dict, updates: dict = updates) -> None:
+                        apply_field_updates(data, updates)
+
+                    if os.path.exists(task_path):
+                        try:
+                            batch.update(task_path, apply)
+                        except (json.JSONDecodeError, OSError) as e:
+                            log.warn(f"Teams タスク {task_id} を更新できません: {e}")
+                            continue
+                    else:
+                        # config.json 由来のタスクは丸ごと書く（その間に作られたら updates だけ適用）
+                        batch.write(task_path, dump_json(teams_data), check=True, update=apply)
                 changes += 1
         else:
             # 新規タスクを Teams に追加
@@ -361,12 +511,15 @@ def sync_to_teams(
             if not dry_run:
                 if not tasks_dir.exists():
                     tasks_dir.mkdir(parents=True, exist_ok=True)
-                task_path = tasks_dir / f"{task_id}.json"
-                with open(task_path, "w", encoding="utf-8") as f:
-                    json.dump(shiki_data, f, indent=2, ensure_ascii=False)
-                    f.write("\n")
+                batch.write(
+                    str(tasks_dir / f"{task_id}.json"),
+                    dump_json(read_shiki_task(shiki_info["path"])), check=True,
+                )
             changes += 1
 
+    batch.commit()
+    for path in batch.skipped:
+        log.warn(f"同期中に作成されたため書き込みをスキップ: {path}")
     return changes
 
 
@@ -414,6 +567,229 @@ def print_report(report: dict, log: Logger):
     print("=" * 60)
 
 
+def run_sync(
+    teams_tasks: dict,
+    shiki_tasks: dict,
+    project_root: Path,
+    team_name: str,
+    direction: str,
+    dry_run: bool,
+    log: Logger,
+    base: Optional[Dict[str, Dict[str, str]]] = None,
+) -> Tuple[int, int, int]:
+    """三方向マージで同期し、(→ shiki の変更数, → Teams の変更数, 競合数) を返す
+
+    前回同期時点のフィールドハッシュ（.shiki/state/teams-sync-base.json）と比べ、
+    片側だけが変えたフィールドをもう片側へ書く。両側で違う値に変えたフィールドは
+    競合として報告し、どちらにも書かない。ベースは両側が一致したフィールドだけ更新する。
+    Teams 側の claimed_by の変更は、.shiki 側で他のメンバーが有効なリースを持っていれば
+    書かずにリースの持ち主を Teams に戻す（task_lease）。
+    teams_tasks / shiki_tasks に含まれないタスクのベースはそのまま残す（--watch の部分同期）。
+    base を渡すとそれをメモリ上で更新し（--watch が保持する）、読み直さない。
+    ベースファイルには値が変わったタスクの分だけを 1 回書く。
+    """
+    if base is None:
+        base = load_sync_base(project_root, team_name)
+    prefer = "shiki" if direction == "to-teams" else "teams"
+    shiki_updates: Dict[str, dict] = {}
+    teams_updates: Dict[str, dict] = {}
+    conflicts = 0
+
+    for task_id in sorted(set(teams_tasks) & set(shiki_tasks)):
+        to_shiki, to_teams, task_conflicts = merge_task_fields(
+            teams_tasks[task_id], shiki_tasks[task_id]["data"], base.get(task_id), prefer
+        )
+        if "claimed_by" in to_shiki:
+            # 有効なリースを持つ側が勝つ: Teams 側の claim は書かず、リースの持ち主を Teams に戻す
+            shiki_data = shiki_tasks[task_id]["data"]
+            refusal = claim_refusal(shiki_data, to_shiki["claimed_by"])
+            if refusal:
+                log.warn(f"タスク {task_id}: claimed_by を {to_shiki.pop('claimed_by')} にしません ({refusal})")
+                to_teams["claimed_by"] = shiki_data.get("claimed_by")
+        if to_shiki:
+            shiki_updates[task_id] = to_shiki
+        if to_teams:
+            teams_updates[task_id] = to_teams
+        for field, t_val, s_val in task_conflicts:
+            log.discrepancy(f"競合: {task_id}.{field} は両側で変更されています (Teams={t_val}, shiki={s_val})")
+            conflicts += 1
+
+    to_shiki_count = to_teams_count = 0
+    if direction in ("both", "to-shiki"):
+        to_shiki_count = sync_to_shiki(teams_tasks, shiki_tasks, project_root, dry_run, log, shiki_updates)
+    if direction in ("both", "to-teams"):
+        to_teams_count = sync_to_teams(teams_tasks, shiki_tasks, team_name, dry_run, log, teams_updates)
+
+    if not dry_run:
+        synced_ids = set(teams_tasks) | set(shiki_tasks)
+        before = {task_id: base.get(task_id) for task_id in synced_ids}
+        for task_id in synced_ids:
+            teams_data = teams_tasks.get(task_id)
+            shiki_data = shiki_tasks[task_id]["data"] if task_id in shiki_tasks else None
+            if teams_data is None or shiki_data is None:
+                # 片側にしかない: 作成された場合は作成元の値がベースになる
+                created = (direction in ("both", "to-shiki") if shiki_data is None
+                           else direction in ("both", "to-teams"))
+                if created:
+                    source = teams_data if shiki_data is None else shiki_data
+                    base[task_id] = {field: field_hash(source.get(field)) for field in SYNC_FIELDS}
+                continue
+            entry = dict(base.get(task_id, {}))
+            for field in SYNC_FIELDS:
+                value_hash = field_hash(teams_data.get(field))
+                if value_hash == field_hash(shiki_data.get(field)):
+                    entry[field] = value_hash
+            base[task_id] = entry
+        changed = {task_id: base[task_id] for task_id in synced_ids
+                   if task_id in base and base[task_id] != before[task_id]}
+        if changed:
+            save_sync_base(project_root, team_name, changed)
+
+    return to_shiki_count, to_teams_count, conflicts
+
+
+class WatchState:
+    """--watch 用に両側のタスクを保持し、変更ファイルだけを読み直す"""
+
+    def __init__(self, project_root: Path, team_name: str, log: Logger):
+        self.log = log
+        self.project_root = project_root
+        self.team_dir = TEAMS_DIR / team_name
+        self.teams_tasks_dir = self.team_dir / "tasks"
+        self.config_path = self.team_dir / "config.json"
+        self.shiki_tasks_dir = project_root / ".shiki" / "tasks"
+        self.teams_files: Dict[Path, dict] = {}
+        self.config_tasks: Dict[str, dict] = {}
+        self.shiki_tasks: dict = {}
+        self.shiki_ids: Dict[Path, str] = {}
+        self.base: Dict[str, Dict[str, str]] = {}
+        self.rescan()
+
+    @property
+    def watch_dirs(self):
+        return [self.teams_tasks_dir, self.team_dir, self.shiki_tasks_dir]
+
+    def rescan(self) -> None:
+        """全ファイルを読み直す（起動時と inotify キューのあふれ時）"""
+        self.teams_files = {}
+        if self.teams_tasks_dir.exists():
+            for task_file in self.teams_tasks_dir.glob("*.json"):
+                self._load_teams_file(task_file)
+        self._load_config()
+        self.shiki_tasks = load_shiki_tasks(self.project_root)
+        self.shiki_ids = {info["path"]: task_id for task_id, info in self.shiki_tasks.items()}
+        self.base = load_sync_base(self.project_root, self.team_dir.name)
+
+    def _load_teams_file(self, path: Path) -> Optional[str]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                task = json.load(f)
+        except (json.JSONDecodeError, OSError):
+            self.teams_files.pop(path, None)
+            return None
+        self.teams_files[path] = task
+        return task.get("id", path.stem)
+
+    def _load_config(self) -> Set[str]:
+        """config.json の tasks を読み直し、内容が変わったタスク ID を返す"""
+        config = load_teams_config(self.team_dir.name) or {}
+        tasks = {task["id"]: task for task in config.get("tasks", []) if task.get("id")}
+        changed = {task_id for task_id in set(tasks) | set(self.config_tasks)
+                   if tasks.get(task_id) != self.config_tasks.get(task_id)}
+        self.config_tasks = tasks
+        return changed
+
+    def _load_shiki_file(self, path: Path) -> Optional[str]:
+        old_id = self.shiki_ids.pop(path, None)
+        if old_id is not None:
+            self.shiki_tasks.pop(old_id, None)
+        try:
+            data = read_shiki_task(path)
+        except (json.JSONDecodeError, OSError):
+            return None
+        task_id = data.get("id", path.stem)
+        self.shiki_tasks[task_id] = {"data": data, "path": path}
+        self.shiki_ids[path] = task_id
+        return task_id
+
+    def apply(self, changed: Set[Path]) -> Set[str]:
+        """変更されたファイルを読み直し、影響を受けるタスク ID を返す
+
+        削除されたファイルは保持している状態から外すだけで、相手側には伝播しない。
+        """
+        affected: Set[str] = set()
+        for path in changed:
+            if path.suffix != ".json":
+                continue
+            if path == self.config_path:
+                affected |= self._load_config()
+            elif path.parent == self.teams_tasks_dir:
+                if path.exists():
+                    task_id = self._load_teams_file(path)
+                    if task_id:
+                        affected.add(task_id)
+                else:
+                    self.teams_files.pop(path, None)
+            elif path.parent == self.shiki_tasks_dir:
+                # 削除・読めないファイルは _load_shiki_file が ID とタスクの両方を外す
+                task_id = self._load_shiki_file(path)
+                if task_id is not None:
+                    affected.add(task_id)
+        return affected
+
+    def teams_tasks(self) -> dict:
+        """load_teams_tasks() と同じ規則（tasks/ のファイルが config.json より優先）"""
+        tasks = {}
+        for path, task in self.teams_files.items():
+            tasks[task.get("id", path.stem)] = task
+        for task_id, task in self.config_tasks.items():
+            tasks.setdefault(task_id, task)
+        return tasks
+
+
+def watch(
+    project_root: Path,
+    team_name: str,
+    direction: str,
+    dry_run: bool,
+    debounce: float,
+    polling: bool,
+    log: Logger,
+) -> None:
+    """変更を監視し、変更されたタスクだけを同期し続ける（Ctrl-C で終了）"""
+    state = WatchState(project_root, team_name, log)
+    watcher = open_watcher(state.watch_dirs, polling=polling)
+    log.info(f"監視開始 ({type(watcher).__name__}): {', '.join(str(d) for d in state.watch_dirs)}")
+    try:
+        while True:
+            changed = watcher.next_batch(debounce=debounce)
+            if changed is None:
+                log.warn("イベントがあふれたため全タスクを読み直します")
+                state.rescan()
+                affected = set(state.teams_tasks()) | set(state.shiki_tasks)
+            else:
+                affected = state.apply(changed)
+            if not affected:
+                continue
+
+            # 影響を受けた ID だけを両側から取り出して同期する
+            all_teams = state.teams_tasks()
+            teams_subset = {task_id: all_teams[task_id] for task_id in affected if task_id in all_teams}
+            shiki_subset = {task_id: state.shiki_tasks[task_id] for task_id in affected
+                            if task_id in state.shiki_tasks}
+            to_shiki, to_teams, conflicts = run_sync(teams_subset, shiki_subset, project_root, team_name,
+                                                     direction, dry_run, log, base=state.base)
+            if to_shiki or to_teams or conflicts:
+                log.info(f"{len(affected)} タスク変更: → shiki {to_shiki} 件, → Teams {to_teams} 件, "
+                         f"競合 {conflicts} 件")
+            else:
+                log.debug(f"{len(affected)} タスク変更: 同期済み")
+    except KeyboardInterrupt:
+        log.info("監視を終了します")
+    finally:
+        watcher.close()
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Agent Teams ⇔ .shiki/ 双方向同期"
@@ -439,6 +815,22 @@ def main():
         action="store_true",
         help="詳細ログを表示",
     )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="初回同期のあと変更を監視し、変更されたタスクだけを同期し続ける",
+    )
+    parser.add_argument(
+        "--poll",
+        action="store_true",
+        help="--watch で inotify を使わずポーリングする",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=0.3,
+        help="--watch で変更をまとめる待ち時間（秒、デフォルト: 0.3）",
+    )
 
     args = parser.parse_args()
     log = Logger(verbose=args.verbose)
@@ -469,23 +861,19 @@ def main():
     if args.dry_run:
         log.info("ドライランモード: 変更は適用されません")
     else:
-        total_changes = 0
-
+        to_shiki, to_teams, conflicts = run_sync(
+            teams_tasks, shiki_tasks, project_root, team_name, args.direction, args.dry_run, log
+        )
         if args.direction in ("both", "to-shiki"):
-            changes = sync_to_shiki(
-                teams_tasks, shiki_tasks, project_root, args.dry_run, log
-            )
-            total_changes += changes
-            log.info(f"→ shiki: {changes} 件の変更を適用")
-
+            log.info(f"→ shiki: {to_shiki} 件の変更を適用")
         if args.direction in ("both", "to-teams"):
-            changes = sync_to_teams(
-                teams_tasks, shiki_tasks, team_name, args.dry_run, log
-            )
-            total_changes += changes
-            log.info(f"→ Teams: {changes} 件の変更を適用")
+            log.info(f"→ Teams: {to_teams} 件の変更を適用")
+        log.info(f"合計 {to_shiki + to_teams} 件の変更を適用しました")
+        if conflicts:
+            log.warn(f"{conflicts} 件のフィールドが両側で変更されているため同期していません")
 
-        log.info(f"合計 {total_changes} 件の変更を適用しました")
+    if args.watch:
+        watch(project_root, team_name, args.direction, args.dry_run, args.debounce, args.poll, log)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""Shiki Task Index — .shiki/tasks/*.json の増分インデックス
+
+タスクファイルの主要フィールドを .shiki/state/task-index.sqlite に保持し、
+mtime と size が変わったファイルだけを再パースする。各スクリプトは全タスクを
+json.load する代わりにこのインデックスを問い合わせる。
+
+Usage:
+    python3 scripts/task_index.py                  # インデックスを更新して件数を表示
+    python3 scripts/task_index.py counts           # ステータス別件数（1 行、空白区切り）
+    python3 scripts/task_index.py list [--status S] [--json]
+    python3 scripts/task_index.py get <task_id>    # 1 タスクのインデックス行を JSON で表示
+    python3 scripts/task_index.py rebuild          # インデックスを作り直す
+
+Options:
+    --tasks-dir DIR   タスクディレクトリ（default: .shiki/tasks）
+
+The index is a cache: deleting it is always safe, and any script that cannot
+open it (read-only checkout, locked database) falls back to an in-memory one.
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+INDEX_FILE_NAME = "task-index.sqlite"
+INDEX_VERSION = 2
+
+# Files modified this recently may change again within the filesystem's
+# timestamp granularity without a visible mtime change; they are re-parsed
+# on the next refresh as well (same idea as git's "racy clean" check).
+RACY_WINDOW_NS = 2_000_000_000
+
+TASK_STATUSES = ("pending", "in_progress", "review", "completed", "blocked", "failed")
+
+# Scalar task fields mirrored into columns (stored as-is, NULL when absent)
+SCALAR_FIELDS = ("id", "title", "status", "assigned_to", "claimed_by", "lease_expires_at", "priority",
+                 "theta_phase", "authority_layer")
+# Structured task fields stored as JSON text
+JSON_FIELDS = ("depends_on", "budget")
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    name TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    {", ".join(f"{name} TEXT" for name in SCALAR_FIELDS + JSON_FIELDS)},
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status);
+CREATE INDEX IF NOT EXISTS tasks_id ON tasks (id);
+"""
+
+_COLUMNS = ("name",) + SCALAR_FIELDS + JSON_FIELDS + ("error",)
+
+
+def default_index_path(tasks_dir: str) -> str:
+    """Index file for a tasks dir: <tasks_dir>/../state/task-index.sqlite."""
+    return os.path.join(os.path.dirname(os.path.abspath(tasks_dir)), "state", INDEX_FILE_NAME)
+
+
+def _scan(tasks_dir: str) -> Dict[str, Tuple[int, int]]:
+    """Return {file name: (mtime_ns, size)} for every task JSON file."""
+    found: Dict[str, Tuple[int, int]] = {}
+    try:
+        entries = os.scandir(tasks_dir)
+    except OSError:
+        return found
+    with entries:
+        for entry in entries:
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            found[entry.name] = (st.st_mtime_ns, st.st_size)
+    return found
+
+
+def _extract(tasks_dir: str, name: str) -> Tuple[Any, ...]:
+    """Parse one task file into a row of _COLUMNS values."""
+    path = os.path.join(tasks_dir, name)
+    try:
+        with open(path, encoding="utf-8") as f:
+            task = json.load(f)
+        if not isinstance(task, dict):
+            raise ValueError("task file is not a JSON object")
+    except (ValueError, OSError) as e:
+        return (name,) + (None,) * (len(SCALAR_FIELDS) + len(JSON_FIELDS)) + (str(e),)
+
+    scalars = []
+    for field in SCALAR_FIELDS:
+        value = task.get(field)
+        scalars.append(None if value is None else str(value))
+    blobs = []
+    for field in JSON_FIELDS:
+        value = task.get(field)
+        blobs.append(None if value is None else json.dumps(value, ensure_ascii=False))
+    return (name,) + tuple(scalars) + tuple(blobs) + (None,)
+
+
+def _record(tasks_dir: str, row: sqlite3.Row) -> Dict[str, Any]:
+    """Turn an index row into a task-shaped dict (absent fields omitted)."""
+    record: Dict[str, Any] = {"path": os.path.join(tasks_dir, row["name"])}
+    for name in SCALAR_FIELDS:
+        if row[name] is not None:
+            record[name] = row[name]
+    for name in JSON_FIELDS:
+        if row[name] is not None:
+            record[name] = json.loads(row[name])
+    if row["error"] is not None:
+        record["error"] = row["error"]
+    return record
+
+
+def _status_filter(statuses: Optional[Iterable[Optional[str]]]) -> Tuple[str, List[str]]:
+    """WHERE clause and parameters matching statuses (None: tasks without a status)."""
+    if statuses is None:
+        return "", []
+    wanted = list(statuses)
+    params = [status for status in wanted if status is not None]
+    clauses = [f"status IN ({', '.join('?' for _ in params)})"]
+    if None in wanted:
+        clauses.append("(status IS NULL AND error IS NULL)")
+    return " WHERE " + " OR ".join(clauses), params
+
+
+class TaskIndex:
+    """Incrementally refreshed index of the task files in one directory.
+
+    refresh() stats every file in tasks_dir and re-parses only those whose
+    (mtime_ns, size) changed since the last refresh; files that disappeared
+    are dropped. Queries return task-shaped dicts holding SCALAR_FIELDS and
+    JSON_FIELDS plus "path" (and "error" for files that failed to parse).
+    Full task bodies are never cached: callers that need them open "path".
+    """
+
+    def __init__(self, tasks_dir: str = ".shiki/tasks", index_path: Optional[str] = None):
+        self.tasks_dir = tasks_dir
+        self.index_path = index_path or default_index_path(tasks_dir)
+        self.conn = self._connect()
+        self.conn.row_factory = sqlite3.Row
+
+    def _connect(self) -> sqlite3.Connection:
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            conn = sqlite3.connect(self.index_path, timeout=10)
+            if self._prepare(conn):
+                return conn
+            conn.close()
+            # Stale or foreign layout: start over
+            os.remove(self.index_path)
+            conn = sqlite3.connect(self.index_path, timeout=10)
+            if self._prepare(conn):
+                return conn
+            conn.close()
+        except (OSError, sqlite3.Error):
+            pass
+        conn = sqlite3.connect(":memory:")
+        self._prepare(conn)
+        return conn
+
+    @staticmethod
+    def _prepare(conn: sqlite3.Connection) -> bool:
+        """Create the schema; False if the file holds an incompatible index."""
+        try:
+            with conn:
+                conn.executescript(_SCHEMA)
+                row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+                if row is None:
+                    conn.execute("INSERT INTO meta (key, value) VALUES ('version', ?)", (str(INDEX_VERSION),))
+                    return True
+                return row[0] == str(INDEX_VERSION)
+        except sqlite3.DatabaseError:
+            return False
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "TaskIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def refresh(self) -> Dict[str, int]:
+        """Bring the index up to date; returns {"parsed", "removed", "total"}."""
+        on_disk = _scan(self.tasks_dir)
+        known = {
+            name: (mtime_ns, size)
+            for name, mtime_ns, size in self.conn.execute("SELECT name, mtime_ns, size FROM tasks")
+        }
+
+        changed = [name for name, stamp in on_disk.items() if known.get(name) != stamp]
+        removed = [name for name in known if name not in on_disk]
+
+        racy_before = time.time_ns() - RACY_WINDOW_NS
+
+        def stamp(name: str) -> Tuple[int, int]:
+            mtime_ns, size = on_disk[name]
+            return (-1 if mtime_ns > racy_before else mtime_ns, size)
+
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        with self.conn:
+            self.conn.executemany("DELETE FROM tasks WHERE name = ?", ((name,) for name in removed))
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO tasks (mtime_ns, size, {', '.join(_COLUMNS)}) "
+                f"VALUES (?, ?, {placeholders})",
+                (stamp(name) + _extract(self.tasks_dir, name) for name in changed),
+            )
+        return {"parsed": len(changed), "removed": len(removed), "total": len(on_disk)}
+
+    def rebuild(self) -> Dict[str, int]:
+        with self.conn:
+            self.conn.execute("DELETE FROM tasks")
+        return self.refresh()
+
+    def tasks(self, statuses: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Indexed tasks ordered by file name, optionally filtered by status."""
+        return list(self.iter_tasks(statuses))
+
+    def iter_tasks(self, statuses: Optional[Iterable[Optional[str]]] = None) -> Iterator[Dict[str, Any]]:
+        """Like tasks(), but streams rows from the database one at a time.
+
+        None in statuses also matches parsable tasks that have no status.
+        """
+        where, params = _status_filter(statuses)
+        for row in self.conn.execute(f"SELECT * FROM tasks{where} ORDER BY name", params):
+            yield _record(self.tasks_dir, row)
+
+    def paths(self, statuses: Optional[Iterable[str]] = None) -> List[str]:
+        """Task file paths ordered by file name, optionally filtered by status."""
+        return [task["path"] for task in self.tasks(statuses)]
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Task with this id, else the entry for <tasks_dir>/<task_id>.json."""
+        row = self.conn.execute("SELECT * FROM tasks WHERE id = ? ORDER BY name LIMIT 1", (task_id,)).fetchone()
+        if row is None:
+            row = self.conn.execute("SELECT * FROM tasks WHERE name = ?", (f"{task_id}.json",)).fetchone()
+        return _record(self.tasks_dir, row) if row is not None else None
+
+    def status_counts(self) -> Dict[str, int]:
+        """{status: count} over parsable tasks ("unknown" when status is missing)."""
+        counts = {status: 0 for status in TASK_STATUSES}
+        for status, n in self.conn.execute(
+            "SELECT COALESCE(status, 'unknown'), COUNT(*) FROM tasks WHERE error IS NULL GROUP BY 1"
+        ):
+            counts[status] = n
+        return counts
+
+    def priority_counts(self, statuses: Optional[Iterable[Optional[str]]] = None) -> Dict[str, int]:
+        """{priority: count} over the tasks iter_tasks(statuses) yields ("medium" when missing)."""
+        where, params = _status_filter(statuses)
+        return dict(self.conn.execute(
+            f"SELECT COALESCE(priority, 'medium'), COUNT(*) FROM tasks{where} GROUP BY 1", params
+        ))
+
+
+def open_index(tasks_dir: str = ".shiki/tasks", index_path: Optional[str] = None) -> TaskIndex:
+    """Open the index for tasks_dir and refresh it."""
+    index = TaskIndex(tasks_dir, index_path)
+    index.refresh()
+    return index
+
+
+def load_indexed_tasks(
+    tasks_dir: str = ".shiki/tasks",
+    statuses: Optional[Iterable[str]] = None,
+) -> List[Dict[str, Any]]:
+    """One-shot helper: refresh the index and return its task records."""
+    with open_index(tasks_dir) as index:
+        return index.tasks(statuses)
+
+
+def main() -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Incremental index of .shiki/tasks/*.json")
+    parser.add_argument("command", nargs="?", default="refresh", choices=["refresh", "rebuild", "counts", "list", "get"])
+    parser.add_argument("task_id", nargs="?", help="Task ID (for get)")
+    parser.add_argument("--tasks-dir", default=".shiki/tasks", help="Task directory (default: .shiki/tasks)")
+    parser.add_argument("--status", action="append", help="Filter list by status (repeatable)")
+    parser.add_argument("--json", action="store_true", help="Print list as JSON")
+    args = parser.parse_args()
+
+    index = TaskIndex(args.tasks_dir)
+    try:
+        stats = index.rebuild() if args.command == "rebuild" else index.refresh()
+
+        if args.command in ("refresh", "rebuild"):
+            print(f"{stats['total']} task(s) indexed ({stats['parsed']} parsed, {stats['removed']} removed) "
+                  f"-> {index.index_path}")
+        elif args.command == "counts":
+            counts = index.status_counts()
+            print(" ".join(str(counts[status]) for status in TASK_STATUSES))
+        elif args.command == "list":
+            tasks = index.tasks(args.status)
+            if args.json:
+                print(json.dumps(tasks, indent=2, ensure_ascii=False))
+            else:
+                for task in tasks:
+                    if "error" in task:
+                        print(f"{'ERROR':<12} {task['path']}: {task['error']}")
+                        continue
+                    print(f"{task.get('id', '?'):<12} {task.get('status', '?'):<12} "
+                          f"{task.get('assigned_to', '-'):<14} {task.get('priority', '-'):<8} {task.get('title', '')}")
+        elif args.command == "get":
+            if not args.task_id:
+                parser.error("get requires a task_id")
+            task = index.get(args.task_id)
+            if task is None:
+                print(f"Task not found: {args.task_id}", file=sys.stderr)
+                return 1
+            print(json.dumps(task, indent=2, ensure_ascii=False))
+    finally:
+        index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
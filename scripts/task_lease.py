@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""Shiki Task Lease — リース付きのタスク claim（claim / renew / release / sweep）
+
+中央サーバなしで多数のエージェントが .shiki/tasks/ からタスクを自己割当するための API。
+タスクファイルの claimed_by と lease_expires_at がリースで、書き換えは
+task_store.compare_and_swap（読み込み時のスタンプが変わっていなければ rename で置き換える）で
+行う。先を越された書き手は読み直して判断し直すので、同じタスクを 2 人が claim することはない。
+
+  - claim:   未 claim か、リースが切れたタスクを自分のものにする（pending は in_progress に）
+  - renew:   自分のリースを延長する（作業が続く間は期限の前に繰り返す）
+  - release: claim を外す（--status で結果を書く。書かなければ in_progress は pending に戻る）
+  - sweep:   リースが切れたタスクを回収する（claim を外し in_progress を pending に戻す）
+  - next:    cli.self_claim が有効なら、依存が完了した未 claim の pending タスクを
+             優先度順に claim する（他のエージェントに取られたら次の候補へ）
+
+リース期間は .shiki/config.yaml の defaults.task_lease_minutes（デフォルト 120 分）。
+lease_expires_at のない claimed_by（coordinator による割当など）は期限切れにならない。
+
+Usage:
+    python3 scripts/task_lease.py claim T-0001 --owner impl-1
+    python3 scripts/task_lease.py renew T-0001 --owner impl-1 [--minutes 30]
+    python3 scripts/task_lease.py release T-0001 --owner impl-1 [--status completed]
+    python3 scripts/task_lease.py next --owner impl-1 [--layer executor]
+    python3 scripts/task_lease.py sweep [--dry-run]
+    python3 scripts/task_lease.py list
+
+Options:
+    --tasks-dir DIR   タスクディレクトリ（default: .shiki/tasks）
+    --json            結果を JSON で出力
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from task_index import open_index
+from task_store import compare_and_swap, dump_json, read_json_stamped
+
+DEFAULT_LEASE_MINUTES = 120
+CAS_RETRIES = 16
+PRIORITY_ORDER = {"critical": 0, "high": 1, "medium": 2, "low": 3}
+UNCLAIMABLE_STATUSES = ("completed", "failed")
+
+
+def read_lease_settings(config_path: str = ".shiki/config.yaml") -> Dict[str, Any]:
+    """defaults.task_lease_minutes and cli.self_claim from config.yaml (simple line parser)."""
+    settings: Dict[str, Any] = {"task_lease_minutes": DEFAULT_LEASE_MINUTES, "self_claim": True}
+    try:
+        with open(config_path, encoding="utf-8") as f:
+            for line in f:
+                stripped = line.strip()
+                if ":" not in stripped or stripped.startswith("#"):
+                    continue
+                key, value = stripped.split(":", 1)
+                value = value.split("#")[0].strip()
+                if key == "task_lease_minutes" and value.isdigit() and int(value) > 0:
+                    settings["task_lease_minutes"] = int(value)
+                elif key == "self_claim" and value in ("true", "false"):
+                    settings["self_claim"] = value == "true"
+    except OSError:
+        pass
+    return settings
+
+
+def now_utc() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def parse_time(value: Any) -> Optional[datetime]:
+    """ISO 8601 timestamp (naive = UTC); None if missing or unparsable."""
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def lease_expired(task: Dict[str, Any], now: Optional[datetime] = None) -> bool:
+    """True if the task is claimed under a lease that has run out.
+
+    A claim without lease_expires_at never expires; an unparsable one has.
+    """
+    if not task.get("claimed_by") or task.get("lease_expires_at") is None:
+        return False
+    expires = parse_time(task["lease_expires_at"])
+    return expires is None or expires <= (now or now_utc())
+
+
+def claim_refusal(task: Dict[str, Any], owner: Optional[str], now: Optional[datetime] = None) -> Optional[str]:
+    """Why owner may not become task's claimed_by (None if it may; owner None releases)."""
+    holder = task.get("claimed_by")
+    if owner is None or not holder or holder == owner or lease_expired(task, now):
+        return None
+    until = task.get("lease_expires_at")
+    return f"claimed by {holder}" + (f" until {until}" if until else "")
+
+
+def set_claim(task: Dict[str, Any], owner: Optional[str], minutes: int, now: Optional[datetime] = None) -> None:
+    """Set claimed_by and a fresh lease (or clear both when owner is None)."""
+    now = now or now_utc()
+    if owner is None:
+        task["claimed_by"] = None
+        task.pop("lease_expires_at", None)
+    else:
+        task["claimed_by"] = owner
+        task["lease_expires_at"] = (now + timedelta(minutes=minutes)).isoformat()
+    task["updated_at"] = now.isoformat()
+
+
+def _cas_update(path: str, decide: Callable[[Dict[str, Any]], Optional[str]]) -> Dict[str, Any]:
+    """Read-decide-swap loop: decide(task) edits task in place or returns a refusal.
+
+    Returns {"ok", "task_id", "task"} plus "reason" when refused.
+    """
+    task_id = os.path.splitext(os.path.basename(path))[0]
+    for attempt in range(CAS_RETRIES):
+        try:
+            task, stamp = read_json_stamped(path)
+        except FileNotFoundError:
+            return {"ok": False, "task_id": task_id, "reason": "task not found"}
+        except (json.JSONDecodeError, OSError) as e:
+            return {"ok": False, "task_id": task_id, "reason": str(e)}
+        task_id = task.get("id", task_id)
+        reason = decide(task)
+        if reason is not None:
+            return {"ok": False, "task_id": task_id, "task": task, "reason": reason}
+        if compare_and_swap(path, stamp, dump_json(task)):
+            return {"ok": True, "task_id": task_id, "task": task}
+        # Lost the race: back off a little and decide again on the new content
+        time.sleep(random.uniform(0, 0.002 * (attempt + 1)))
+    return {"ok": False, "task_id": task_id, "reason": f"gave up after {CAS_RETRIES} concurrent updates"}
+
+
+def claim(path: str, owner: str, minutes: int = DEFAULT_LEASE_MINUTES) -> Dict[str, Any]:
+    """Claim the task at path for owner (re-claiming your own task renews it)."""
+    def decide(task: Dict[str, Any]) -> Optional[str]:
+        now = now_utc()
+        if task.get("status") in UNCLAIMABLE_STATUSES:
+            return f"status is {task['status']}"
+        reason = claim_refusal(task, owner, now)
+        if reason is not None:
+            return reason
+        set_claim(task, owner, minutes, now)
+        if task.get("status") == "pending":
+            task["status"] = "in_progress"
+        return None
+
+    return _cas_update(path, decide)
+
+
+def renew(path: str, owner: str, minutes: int = DEFAULT_LEASE_MINUTES) -> Dict[str, Any]:
+    """Extend owner's lease; an expired lease can be renewed while nobody took it."""
+    def decide(task: Dict[str, Any]) -> Optional[str]:
+        if task.get("claimed_by") != owner:
+            return f"not claimed by {owner} (claimed_by={task.get('claimed_by')})"
+        set_claim(task, owner, minutes)
+        return None
+
+    return _cas_update(path, decide)
+
+
+def release(path: str, owner: str, status: Optional[str] = None, force: bool = False) -> Dict[str, Any]:
+    """Drop owner's claim; status records the outcome, otherwise in_progress goes back to pending."""
+    def decide(task: Dict[str, Any]) -> Optional[str]:
+        if not force and task.get("claimed_by") != owner:
+            return f"not claimed by {owner} (claimed_by={task.get('claimed_by')})"
+        set_claim(task, None, 0)
+        if status is not None:
+            task["status"] = status
+        elif task.get("status") == "in_progress":
+            task["status"] = "pending"
+        return None
+
+    return _cas_update(path, decide)
+
+
+def sweep(tasks_dir: str = ".shiki/tasks", dry_run: bool = False) -> List[Dict[str, Any]]:
+    """Reclaim every task whose lease has expired; returns one result per task."""
+    now = now_utc()
+    with open_index(tasks_dir) as index:
+        candidates = [task for task in index.tasks() if lease_expired(task, now)]
+
+    results = []
+    for record in candidates:
+        if dry_run:
+            results.append({"ok": True, "task_id": record.get("id"), "task": record})
+            continue
+
+        def decide(task: Dict[str, Any]) -> Optional[str]:
+            # Re-check on the current content: the owner may have renewed meanwhile
+            if not lease_expired(task):
+                return "lease was renewed"
+            set_claim(task, None, 0)
+            if task.get("status") == "in_progress":
+                task["status"] = "pending"
+            return None
+
+        results.append(_cas_update(record["path"], decide))
+    return results
+
+
+def claimable_tasks(tasks_dir: str = ".shiki/tasks", layer: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Unclaimed (or expired) pending tasks whose dependencies are completed, best first."""
+    now = now_utc()
+    with open_index(tasks_dir) as index:
+        records = index.tasks()
+    completed = {task.get("id") for task in records if task.get("status") == "completed"}
+    candidates = [
+        task for task in records
+        if task.get("status") == "pending"
+        and (not task.get("claimed_by") or lease_expired(task, now))
+        and all(dep in completed for dep in task.get("depends_on") or [])
+        and (layer is None or task.get("authority_layer") in (None, layer))
+    ]
+    candidates.sort(key=lambda task: (PRIORITY_ORDER.get(task.get("priority", "medium"), 2), task["path"]))
+    return candidates
+
+
+def claim_next(tasks_dir: str, owner: str, minutes: int = DEFAULT_LEASE_MINUTES,
+               layer: Optional[str] = None) -> Dict[str, Any]:
+    """Claim the best claimable task, moving on when another agent wins one."""
+    for record in claimable_tasks(tasks_dir, layer):
+        result = claim(record["path"], owner, minutes)
+        if result["ok"]:
+            return result
+    return {"ok": False, "task_id": None, "reason": "no claimable task"}
+
+
+def _task_path(tasks_dir: str, task_id: str) -> str:
+    with open_index(tasks_dir) as index:
+        record = index.get(task_id)
+    return record["path"] if record else os.path.join(tasks_dir, f"{task_id}.json")
+
+
+def _print_result(action: str, result: Dict[str, Any]) -> None:
+    task = result.get("task") or {}
+    if result["ok"]:
+        lease = task.get("lease_expires_at")
+        detail = f"until {lease}" if lease else f"status={task.get('status')}"
+        print(f"{action:<8} {result['task_id']}: ok ({detail})")
+    else:
+        print(f"{action:<8} {result['task_id'] or '-'}: {result['reason']}", file=sys.stderr)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Lease-based claiming of .shiki/tasks")
+    parser.add_argument("command", choices=["claim", "renew", "release", "next", "sweep", "list"])
+    parser.add_argument("task_id", nargs="?", help="Task ID (claim / renew / release)")
+    parser.add_argument("--owner", help="Agent claiming the task (claim / renew / release / next)")
+    parser.add_argument("--minutes", type=int, help="Lease length (default: defaults.task_lease_minutes)")
+    parser.add_argument("--status", help="Status to record on release (e.g. completed, review)")
+    parser.add_argument("--force", action="store_true", help="Release a task claimed by someone else")
+    parser.add_argument("--layer", help="Only tasks for this authority_layer (next)")
+    parser.add_argument("--dry-run", action="store_true", help="List expired leases without reclaiming (sweep)")
+    parser.add_argument("--tasks-dir", default=".shiki/tasks", help="Task directory (default: .shiki/tasks)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    config_path = os.path.join(os.path.dirname(os.path.abspath(args.tasks_dir)), "config.yaml")
+    settings = read_lease_settings(config_path)
+    minutes = args.minutes or settings["task_lease_minutes"]
+
+    if args.command in ("claim", "renew", "release") and not args.task_id:
+        parser.error(f"{args.command} requires a task_id")
+    if args.command in ("claim", "renew", "next") or (args.command == "release" and not args.force):
+        if not args.owner:
+            parser.error(f"{args.command} requires --owner")
+
+    if args.command == "list":
+        now = now_utc()
+        with open_index(args.tasks_dir) as index:
+            claimed = [task for task in index.tasks() if task.get("claimed_by")]
+        if args.json:
+            print(json.dumps(claimed, indent=2, ensure_ascii=False))
+            return 0
+        for task in claimed:
+            state = "EXPIRED" if lease_expired(task, now) else "held"
+            print(f"{task.get('id', '?'):<12} {task.get('status', '?'):<12} {task['claimed_by']:<16} "
+                  f"{state:<8} {task.get('lease_expires_at', '-')}")
+        return 0
+
+    if args.command == "sweep":
+        results = sweep(args.tasks_dir, dry_run=args.dry_run)
+    elif args.command == "next":
+        if not settings["self_claim"]:
+            print("cli.self_claim is false: tasks are assigned by the coordinator", file=sys.stderr)
+            return 1
+        results = [claim_next(args.tasks_dir, args.owner, minutes, args.layer)]
+    else:
+        path = _task_path(args.tasks_dir, args.task_id)
+        if args.command == "claim":
+            results = [claim(path, args.owner, minutes)]
+        elif args.command == "renew":
+            results = [renew(path, args.owner, minutes)]
+        else:
+            results = [release(path, args.owner, args.status, force=args.force)]
+
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    else:
+        for result in results:
+            _print_result(args.command, result)
+        if args.command == "sweep":
+            reclaimed = sum(1 for result in results if result["ok"])
+            print(f"{reclaimed} expired lease(s) {'found' if args.dry_run else 'reclaimed'}")
+    return 0 if args.command == "sweep" or all(result["ok"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""Shiki Task Store — タスクファイルの原子的な書き込み
+
+.shiki/tasks/*.json（と Agent Teams のタスクファイル）を書き換えるスクリプトが共有する書き込み層。
+
+  - 書き込みは同じディレクトリの一時ファイル + os.replace（途中で落ちても JSON が切れない）
+  - ファイルごとのアドバイザリロック（flock）。ロックファイルはプロジェクトの
+    .shiki/state/.locks/ に、パスのハッシュを名前にしてまとめて置く（.shiki/ の外のファイル、
+    例えば Agent Teams のタスクは ~/.cache/shiki/locks/）。書き込み先のディレクトリは汚さない。
+    update_json() は読み込み → 変更 → 書き込みをロック下で行うので、並行する書き手が
+    互いの変更を上書きしない
+  - WriteBatch はグループコミット: 全ファイルの一時ファイルを書いてからそれぞれを fsync し
+    （書き込み済みなのでジャーナルのコミットにまとまる）、rename した後にディレクトリを
+    1 回だけ fsync する。ファイルごとに書き込み → fsync → rename → ディレクトリ fsync を待たない
+  - WriteBatch の各ファイルは読み込み時のスタンプ（inode / mtime / size）と比べてから置き換え、
+    その間に他の書き手が変えていれば（update なら読み直して再適用、write なら書かずに skipped）
+  - compare_and_swap() は読み込み時のスタンプ（バージョン）が変わっていない場合だけ置き換える。
+    ロックはスタンプ確認と rename の間だけで、判断中は誰も待たせない（task_lease が使う）
+
+Usage (library):
+    from task_store import WriteBatch, compare_and_swap, read_json_stamped, update_json, write_json
+
+    update_json(".shiki/tasks/T-0001.json", lambda task: task.update(status="review"))
+
+    task, stamp = read_json_stamped(path)
+    ...                                            # ロックを持たずに判断する
+    if not compare_and_swap(path, stamp, dump_json(task)):
+        ...                                        # 先を越された: 読み直してやり直す
+
+    with WriteBatch() as batch:
+        for path, updates in changes.items():
+            batch.update(path, lambda task, u=updates: task.update(u))
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks
+    fcntl = None
+
+LOCK_DIR_NAME = ".locks"
+# Lock directory for files outside any .shiki project (Agent Teams' ~/.claude/teams)
+USER_LOCK_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+                             "shiki", "locks")
+
+# (st_ino, st_mtime_ns, st_size) of a file as it was read; None if it did not exist
+Stamp = Optional[Tuple[int, int, int]]
+Update = Callable[[Dict[str, Any]], Optional[bool]]
+
+
+def dump_json(data: Any) -> str:
+    """Task file format: 2-space indent, UTF-8 as-is, trailing newline."""
+    return json.dumps(data, indent=2, ensure_ascii=False) + "\n"
+
+
+def file_stamp(path: str) -> Stamp:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+@lru_cache(maxsize=None)
+def _lock_dir(directory: str) -> str:
+    """.shiki/state/.locks of the nearest project above directory, else USER_LOCK_DIR."""
+    current = directory
+    while True:
+        if os.path.isdir(os.path.join(current, ".shiki")):
+            return os.path.join(current, ".shiki", "state", LOCK_DIR_NAME)
+        parent = os.path.dirname(current)
+        if parent == current:
+            return USER_LOCK_DIR
+        current = parent
+
+
+def lock_path(path: str) -> str:
+    """Lock file for path: one directory per project, named by a hash of the real path.
+
+    Every writer resolves the same file to the same lock, and nothing is
+    created next to the data files themselves.
+    """
+    real = os.path.realpath(path)
+    directory, name = os.path.split(real)
+    digest = hashlib.sha1(real.encode("utf-8", "surrogateescape")).hexdigest()[:16]
+    return os.path.join(_lock_dir(directory), f"{name}.{digest}.lock")
+
+
+@contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    """Exclusive flock on lock_path(path) for the duration of the block.
+
+    The lock file is separate from path because os.replace() swaps path's
+    inode, which would leave a lock on the old file meaningless.
+    """
+    if fcntl is None:
+        yield
+        return
+    lock_file_path = lock_path(path)
+    os.makedirs(os.path.dirname(lock_file_path), exist_ok=True)
+    with open(lock_file_path, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _write_temp(path: str, content: str, fsync: bool) -> str:
+    directory, name = os.path.split(os.path.abspath(path))
+    tmp_path = os.path.join(directory, f".{name}.{os.getpid()}.{id(content):x}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    return tmp_path
+
+
+def fsync_dir(directory: str) -> None:
+    """Persist renames in directory (no-op where directories cannot be opened)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_text(path: str, content: str, durable: bool = True) -> None:
+    """Atomically replace path with content under its file lock."""
+    with file_lock(path):
+        tmp_path = _write_temp(path, content, fsync=durable)
+        os.replace(tmp_path, path)
+    if durable:
+        fsync_dir(os.path.dirname(os.path.abspath(path)))
+
+
+def write_json(path: str, data: Any, durable: bool = True) -> None:
+    write_text(path, dump_json(data), durable)
+
+
+def _read_json(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def read_json_stamped(path: str) -> Tuple[Dict[str, Any], Stamp]:
+    """JSON content of path and the stamp of the very file object it came from."""
+    with open(path, "r", encoding="utf-8") as f:
+        st = os.fstat(f.fileno())
+        return json.load(f), (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def compare_and_swap(path: str, expect: Stamp, content: str, durable: bool = True) -> bool:
+    """Replace path with content only if its stamp still equals expect.
+
+    The new content is written and flushed before the file lock is taken;
+    the lock only covers the stamp check and the rename, so no writer waits
+    on another's decision. Returns False (and leaves path alone) if someone
+    else replaced it first; the caller re-reads and decides again.
+    """
+    tmp_path = _write_temp(path, content, fsync=durable)
+    with file_lock(path):
+        if file_stamp(path) != expect:
+            os.unlink(tmp_path)
+            return False
+        os.replace(tmp_path, path)
+    if durable:
+        fsync_dir(os.path.dirname(os.path.abspath(path)))
+    return True
+
+
+def update_json(path: str, update: Update, durable: bool = True,
+                dump: Callable[[Any], str] = dump_json,
+                default: Optional[Callable[[], Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Read, modify and write a JSON file under its lock; returns the new data.
+
+    update(data) changes data in place; returning False skips the write.
+    With default, a missing or unparsable file starts from default();
+    otherwise raises OSError / json.JSONDecodeError if it cannot be read.
+    """
+    with file_lock(path):
+        try:
+            data = _read_json(path)
+        except (FileNotFoundError, json.JSONDecodeError):
+            if default is None:
+                raise
+            data = default()
+        if update(data) is False:
+            return data
+        tmp_path = _write_temp(path, dump(data), fsync=durable)
+        os.replace(tmp_path, path)
+    if durable:
+        fsync_dir(os.path.dirname(os.path.abspath(path)))
+    return data
+
+
+class WriteBatch:
+    """Group commit of many file writes with one flush and one fsync per directory.
+
+    write() / update() prepare the new content immediately; commit() (or
+    leaving the with block without an exception) makes them visible. A file
+    changed by someone else since it was read is re-read and re-updated
+    under its lock, or left alone and listed in skipped when there is no
+    update to re-apply.
+    """
+
+    def __init__(self, durable: bool = True, dump: Callable[[Any], str] = dump_json):
+        self.durable = durable
+        self.dump = dump
+        # path -> (tmp file, stamp the content was based on, update to re-apply, check stamp)
+        self.pending: Dict[str, Tuple[str, Stamp, Optional[Update], bool]] = {}
+        self.written: List[str] = []
+        self.skipped: List[str] = []
+
+    def __enter__(self) -> "WriteBatch":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+
+    def _stage(self, path: str, content: str, stamp: Stamp, update: Optional[Update], check: bool) -> None:
+        old = self.pending.pop(path, None)
+        if old is not None:
+            os.unlink(old[0])
+        self.pending[path] = (_write_temp(path, content, fsync=False), stamp, update, check)
+
+    def write(self, path: str, content: str, expect: Stamp = None, check: bool = False,
+              update: Optional[Update] = None) -> None:
+        """Queue content for path.
+
+        With check=True path must still match expect (None: must not exist)
+        at commit; otherwise update is applied to the current content, or the
+        file is skipped when no update is given.
+        """
+        self._stage(path, content, expect, update, check)
+
+    def update(self, path: str, update: Update) -> bool:
+        """Queue update(data) on path's current JSON. False if update() returned False.
+
+        Raises OSError / json.JSONDecodeError if the file cannot be read.
+        """
+        data, stamp = read_json_stamped(path)
+        if update(data) is False:
+            return False
+        self._stage(path, self.dump(data), stamp, update, True)
+        return True
+
+    def discard(self) -> None:
+        for tmp_path, _, _, _ in self.pending.values():
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+        self.pending.clear()
+
+    def commit(self) -> List[str]:
+        """Flush, rename and fsync the queued files. Returns the paths written."""
+        if not self.pending:
+            return self.written
+        directories = sorted({os.path.dirname(os.path.abspath(path)) for path in self.pending})
+        if self.durable:
+            # Every temp file is already written, so these fsyncs share journal commits.
+            # Only this batch's files are flushed, not other writers' dirty pages.
+            for tmp_path, _, _, _ in self.pending.values():
+                with open(tmp_path, "rb") as f:
+                    os.fsync(f.fileno())
+
+        for path, (tmp_path, stamp, update, check) in sorted(self.pending.items()):
+            with file_lock(path):
+                if not check or file_stamp(path) == stamp:
+                    os.replace(tmp_path, path)
+                    self.written.append(path)
+                    continue
+                os.unlink(tmp_path)
+                if update is None:
+                    self.skipped.append(path)
+                    continue
+                # Changed underneath us: apply the update to the current content
+                try:
+                    data = _read_json(path)
+                except (OSError, json.JSONDecodeError):
+                    self.skipped.append(path)
+                    continue
+                if update(data) is not False:
+                    os.replace(_write_temp(path, self.dump(data), fsync=self.durable), path)
+                    self.written.append(path)
+        self.pending.clear()
+
+        if self.durable:
+            for directory in directories:
+                fsync_dir(directory)
+        return self.written
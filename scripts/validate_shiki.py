@@ -2,10 +2,17 @@
 """Validate .shiki/ artifacts against JSON Schemas.
 
 Validates tasks, contracts, DAGs, and session states.
-Also performs DAG cycle detection and budget verification.
+Also performs DAG structure checks (cycles, dangling edges, unreachable
+nodes, batch order; see dag_analysis.py) and budget verification.
 
 Usage:
   python3 scripts/validate_shiki.py
+  python3 scripts/validate_shiki.py --jobs 8     # 8 worker processes (0 = auto, 1 = serial)
+  python3 scripts/validate_shiki.py --no-cache   # re-validate every file
+
+Files that passed are remembered by content hash in
+.shiki/state/validate.cache.json, so a re-run only validates files that
+changed (or whose schema changed).
 
 Optional dependency:
   pip install jsonschema
@@ -13,10 +20,16 @@ Optional dependency:
 
 from __future__ import annotations
 
+import hashlib
 import json
+import os
 import sys
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
+
+from dag_analysis import analyze_dag, format_issues
+from dag_model import Dag
+from task_index import load_indexed_tasks
 
 ROOT = Path.cwd()
 SHIKI = ROOT / ".shiki"
@@ -57,43 +70,16 @@ def minimal_dag_check(d: Dict[str, Any]) -> list[str]:
     return errs
 
 
-def detect_dag_cycles(dag: Dict[str, Any]) -> list[str]:
-    """Detect cycles in a DAG using DFS."""
-    errs = []
-    nodes = dag.get("nodes", [])
-    edges = dag.get("edges", [])
-
-    node_ids = {n["node_id"] for n in nodes if "node_id" in n}
-    adjacency: dict[str, list[str]] = {nid: [] for nid in node_ids}
-    for edge in edges:
-        src = edge.get("from", "")
-        dst = edge.get("to", "")
-        if src in adjacency:
-            adjacency[src].append(dst)
-
-    # DFS cycle detection
-    WHITE, GRAY, BLACK = 0, 1, 2
-    color = {nid: WHITE for nid in node_ids}
-
-    def dfs(node: str) -> bool:
-        color[node] = GRAY
-        for neighbor in adjacency.get(node, []):
-            if neighbor not in color:
-                continue
-            if color[neighbor] == GRAY:
-                return True  # cycle found
-            if color[neighbor] == WHITE and dfs(neighbor):
-                return True
-        color[node] = BLACK
-        return False
-
-    for nid in node_ids:
-        if color[nid] == WHITE:
-            if dfs(nid):
-                errs.append(f"Cycle detected in DAG involving node {nid}")
-                break
-
-    return errs
+def check_dag_structure(data: Dict[str, Any]) -> list[str]:
+    """Structural DAG problems (cycles, dangling edges, unreachable nodes,
+    batch order) from the iterative O(V+E) analysis in dag_analysis."""
+    nodes = data.get("nodes", [])
+    edges = data.get("edges", [])
+    if not (isinstance(nodes, list) and isinstance(edges, list)
+            and all(isinstance(item, dict) for item in nodes + edges)):
+        # Malformed shape: the schema / minimal check already reports it
+        return []
+    return format_issues(analyze_dag(Dag(data)))
 
 
 def validate_budget(tasks_dir: Path, config_path: Path) -> list[str]:
@@ -113,10 +99,8 @@ def validate_budget(tasks_dir: Path, config_path: Path) -> list[str]:
     max_per_session = budget_config.get("max_tokens_per_session", 0)
 
     total_actual = 0
-    for fp in sorted(tasks_dir.glob("*.json")):
-        try:
-            t = load_json(fp)
-        except Exception:
+    for t in load_indexed_tasks(str(tasks_dir)):
+        if "error" in t:
             continue
         budget = t.get("budget", {})
         actual = budget.get("actual_tokens", 0)
@@ -124,7 +108,7 @@ def validate_budget(tasks_dir: Path, config_path: Path) -> list[str]:
         task_max = budget.get("max_tokens", max_per_task)
 
         if task_max and actual > task_max:
-            errs.append(f"Task {t.get('id', fp.stem)}: actual_tokens ({actual}) exceeds max ({task_max})")
+            errs.append(f"Task {t.get('id', Path(t['path']).stem)}: actual_tokens ({actual}) exceeds max ({task_max})")
 
         total_actual += actual
 
@@ -134,23 +118,160 @@ def validate_budget(tasks_dir: Path, config_path: Path) -> list[str]:
     return errs
 
 
-def main() -> int:
-    if not SHIKI.exists():
-        print("No .shiki directory found", file=sys.stderr)
-        return 1
+# ─────────────────────────────────────────────
+# File validation: schemas are compiled once per process into reusable
+# validators, files fan out over a process pool, and files that passed are
+# cached by content hash so unchanged files are skipped on the next run.
+# ─────────────────────────────────────────────
+
+CACHE_NAME = "validate.cache.json"
+CACHE_VERSION = 2
+PARALLEL_THRESHOLD = 64  # --jobs 0 only starts a pool for at least this many files
+
+KINDS = {
+    # kind: (label, minimal check used without jsonschema)
+    "task": ("TASK", minimal_task_check),
+    "contract": ("CONTRACT", minimal_contract_check),
+    "dag": ("DAG", minimal_dag_check),
+    "session": ("SESSION", None),
+}
+
+_VALIDATORS: Dict[str, Any] = {}
 
+
+def compile_validators(schemas: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Build one reusable validator per schema (or the SchemaError to report)."""
     try:
         import jsonschema  # type: ignore
     except Exception:
-        jsonschema = None  # type: ignore
+        return {}
+
+    validators: Dict[str, Any] = {}
+    for name, schema in schemas.items():
+        cls = jsonschema.validators.validator_for(schema)
+        try:
+            cls.check_schema(schema)
+            validators[name] = cls(schema)
+        except Exception as e:
+            validators[name] = e
+    return validators
+
+
+def _init_worker(schemas: Dict[str, Dict[str, Any]]) -> None:
+    global _VALIDATORS
+    _VALIDATORS = compile_validators(schemas)
+
+
+def validate_file(item: Tuple[str, str]) -> List[str]:
+    """Validate one file of the given kind; returns its error messages."""
+    kind, path = item
+    label, minimal_check = KINDS[kind]
+    fp = Path(path)
+    try:
+        data = load_json(fp)
+    except Exception as e:
+        return [f"[{label}] {fp}: Invalid JSON: {e}"]
+
+    errs: List[str] = []
+    validator = _VALIDATORS.get(kind)
+    if isinstance(validator, Exception):
+        errs.append(f"[{label}] {fp}: {validator}")
+    elif validator is not None:
+        try:
+            validator.validate(data)
+        except Exception as e:
+            errs.append(f"[{label}] {fp}: {e}")
+    elif minimal_check is not None:
+        problems = minimal_check(data)
+        if problems:
+            errs.append(f"[{label}] {fp}: {', '.join(problems)}")
+
+    if kind == "dag":
+        errs.extend(f"[{label}] {fp}: {err}" for err in check_dag_structure(data))
+    return errs
+
+
+def schema_fingerprints(schemas: Dict[str, Dict[str, Any]], jsonschema_available: bool) -> Dict[str, str]:
+    """Per-kind digest of everything besides file content that affects a result."""
+    prints = {}
+    for kind in KINDS:
+        if jsonschema_available and kind in schemas:
+            basis = json.dumps(schemas[kind], sort_keys=True)
+        else:
+            basis = "minimal"
+        prints[kind] = hashlib.sha256(f"{CACHE_VERSION}:{basis}".encode("utf-8")).hexdigest()
+    return prints
+
+
+def load_cache(cache_path: Path) -> Dict[str, str]:
+    try:
+        data = json.loads(cache_path.read_text(encoding="utf-8"))
+        if data.get("version") == CACHE_VERSION and isinstance(data.get("passed"), dict):
+            return data["passed"]
+    except (OSError, ValueError, AttributeError):
+        pass
+    return {}
+
+
+def save_cache(cache_path: Path, passed: Dict[str, str]) -> None:
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps({"version": CACHE_VERSION, "passed": passed}), encoding="utf-8")
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+
+
+def validate_files(
+    items: List[Tuple[str, str]],
+    schemas: Dict[str, Dict[str, Any]],
+    jobs: int = 0,
+) -> List[List[str]]:
+    """validate_file() over items, in a process pool when worthwhile. Keeps order."""
+    if not items:
+        return []
+    if jobs == 0:
+        jobs = (os.cpu_count() or 1) if len(items) >= PARALLEL_THRESHOLD else 1
+    if jobs > 1 and len(items) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        chunksize = max(1, min(64, len(items) // (jobs * 4)))
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(schemas,)) as executor:
+            return list(executor.map(validate_file, items, chunksize=chunksize))
+    _init_worker(schemas)
+    return [validate_file(item) for item in items]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Validate .shiki/ artifacts against JSON Schemas")
+    parser.add_argument("--jobs", "-j", type=int, default=0,
+                        help=f"Worker processes (0 = CPU count when >= {PARALLEL_THRESHOLD} files, 1 = serial)")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and do not update the pass cache")
+    args = parser.parse_args(argv)
+
+    if not SHIKI.exists():
+        print("No .shiki directory found", file=sys.stderr)
+        return 1
+
+    # Only imported (in compile_validators) when some file actually needs validating
+    import importlib.util
+
+    jsonschema_available = importlib.util.find_spec("jsonschema") is not None
 
     errors = 0
 
     # Collect files
-    task_files = sorted((SHIKI / "tasks").glob("*.json"))
-    contract_files = sorted((SHIKI / "contracts").glob("*.json"))
-    dag_files = sorted((SHIKI / "dag").glob("*.json"))
-    session_files = sorted((SHIKI / "state").glob("session-*.json"))
+    items: List[Tuple[str, str]] = []
+    for kind, pattern in (
+        ("task", SHIKI / "tasks" / "*.json"),
+        ("contract", SHIKI / "contracts" / "*.json"),
+        ("dag", SHIKI / "dag" / "*.json"),
+        ("session", SHIKI / "state" / "session-*.json"),
+    ):
+        items.extend((kind, str(fp)) for fp in sorted(pattern.parent.glob(pattern.name)))
 
     # Load schemas
     schema_map = {
@@ -160,93 +281,44 @@ def main() -> int:
         "session": SCHEMAS / "session.schema.json",
     }
     schemas = {}
-    for name, path in schema_map.items():
-        if path.exists():
-            try:
-                schemas[name] = load_json(path)
-            except Exception:
-                pass
-
-    # Validate tasks
-    for fp in task_files:
-        try:
-            t = load_json(fp)
-        except Exception as e:
-            print(f"[TASK] {fp}: Invalid JSON: {e}", file=sys.stderr)
-            errors += 1
-            continue
-        if jsonschema and "task" in schemas:
-            try:
-                jsonschema.validate(t, schemas["task"])
-            except Exception as e:
-                print(f"[TASK] {fp}: {e}", file=sys.stderr)
-                errors += 1
-        else:
-            errs = minimal_task_check(t)
-            if errs:
-                print(f"[TASK] {fp}: {', '.join(errs)}", file=sys.stderr)
-                errors += 1
-
-    # Validate contracts
-    for fp in contract_files:
+    if jsonschema_available:
+        for name, path in schema_map.items():
+            if path.exists():
+                try:
+                    schemas[name] = load_json(path)
+                except Exception:
+                    pass
+
+    # Skip files whose content already passed under the same schema
+    cache_path = SHIKI / "state" / CACHE_NAME
+    cached = {} if args.no_cache else load_cache(cache_path)
+    fingerprints = schema_fingerprints(schemas, jsonschema_available)
+    digests: Dict[str, str] = {}
+    todo: List[Tuple[str, str]] = []
+    for kind, path in items:
         try:
-            c = load_json(fp)
-        except Exception as e:
-            print(f"[CONTRACT] {fp}: Invalid JSON: {e}", file=sys.stderr)
-            errors += 1
-            continue
-        if jsonschema and "contract" in schemas:
-            try:
-                jsonschema.validate(c, schemas["contract"])
-            except Exception as e:
-                print(f"[CONTRACT] {fp}: {e}", file=sys.stderr)
-                errors += 1
-        else:
-            errs = minimal_contract_check(c)
-            if errs:
-                print(f"[CONTRACT] {fp}: {', '.join(errs)}", file=sys.stderr)
-                errors += 1
-
-    # Validate DAGs
-    for fp in dag_files:
-        try:
-            d = load_json(fp)
-        except Exception as e:
-            print(f"[DAG] {fp}: Invalid JSON: {e}", file=sys.stderr)
-            errors += 1
-            continue
-        if jsonschema and "dag" in schemas:
-            try:
-                jsonschema.validate(d, schemas["dag"])
-            except Exception as e:
-                print(f"[DAG] {fp}: {e}", file=sys.stderr)
-                errors += 1
-        else:
-            errs = minimal_dag_check(d)
-            if errs:
-                print(f"[DAG] {fp}: {', '.join(errs)}", file=sys.stderr)
-                errors += 1
-
-        # Cycle detection
-        cycle_errs = detect_dag_cycles(d)
-        for err in cycle_errs:
-            print(f"[DAG] {fp}: {err}", file=sys.stderr)
-            errors += 1
-
-    # Validate session states
-    for fp in session_files:
-        try:
-            s = load_json(fp)
-        except Exception as e:
-            print(f"[SESSION] {fp}: Invalid JSON: {e}", file=sys.stderr)
-            errors += 1
+            content = Path(path).read_bytes()
+        except OSError:
+            todo.append((kind, path))
             continue
-        if jsonschema and "session" in schemas:
-            try:
-                jsonschema.validate(s, schemas["session"])
-            except Exception as e:
-                print(f"[SESSION] {fp}: {e}", file=sys.stderr)
-                errors += 1
+        digest = hashlib.sha256(fingerprints[kind].encode("utf-8") + content).hexdigest()
+        digests[path] = digest
+        if cached.get(path) != digest:
+            todo.append((kind, path))
+
+    results = dict(zip((path for _, path in todo), validate_files(todo, schemas, jobs=args.jobs)))
+
+    passed: Dict[str, str] = {}
+    for _, path in items:
+        errs = results.get(path, [])
+        for err in errs:
+            print(err, file=sys.stderr)
+        errors += len(errs)
+        if not errs and path in digests:
+            passed[path] = digests[path]
+
+    if not args.no_cache and passed != cached:
+        save_cache(cache_path, passed)
 
     # Budget validation
     config_path = SHIKI / "config.yaml"
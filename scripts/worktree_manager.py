@@ -4,11 +4,22 @@
 Git worktree を使用してタスクごとにブランチを分離し、
 並列実行を可能にするための管理スクリプト。
 
+複数の worktree を作る場合は `.git/worktrees` への登録（git worktree add --no-checkout）
+だけをロック下で直列に行い、ファイルの展開はスレッドプールで並列に行う。
+github.worktree.sparse_checkout が true なら、各 worktree にはタスクの
+context.target_files と shared_paths だけを展開する（オブジェクトストアは共有）。
+
+github.worktree.pool_size > 0 なら、<base_dir>/.pool に detached worktree を用意しておき、
+create は空きを移動して `git switch -c` するだけ（差分のファイルだけ書き換わる）、
+cleanup は `git clean` してプールへ戻す。pool_max_idle_minutes を超えて使われない分は削除する。
+
 Usage:
-  python3 scripts/worktree_manager.py create --branch <branch> --task-id <task_id>
-  python3 scripts/worktree_manager.py cleanup --branch <branch>
+  python3 scripts/worktree_manager.py create --branch <branch> --task-id <task_id> [--sparse]
+  python3 scripts/worktree_manager.py create-batch --task-ids <id1> <id2> [...] [--jobs N] [--sparse | --no-sparse]
+  python3 scripts/worktree_manager.py cleanup --branch <branch> [<branch> ...]
+  python3 scripts/worktree_manager.py pool {fill,status,drain} [--jobs N]
   python3 scripts/worktree_manager.py merge --branch <branch> [--target <target>]
-  python3 scripts/worktree_manager.py conflicts --branches <b1> <b2> [<b3> ...]
+  python3 scripts/worktree_manager.py conflicts --branches <b1> <b2> [<b3> ...] [--hunks]
   python3 scripts/worktree_manager.py list
 
 Requirements:
@@ -18,12 +29,29 @@ Requirements:
 from __future__ import annotations
 
 import argparse
+import codecs
 import json
 import os
+import re
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from task_index import open_index
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock
+    fcntl = None
+
+DEFAULT_PROVISION_JOBS = 4
+DEFAULT_SHARED_PATHS = [".shiki/", "AGENTS.md", "CLAUDE.md"]
+DEFAULT_POOL_MAX_IDLE_MINUTES = 1440
+LOCK_FILE_NAME = "shiki-worktrees.lock"
 
 
 def run_git(args: List[str], cwd: Optional[str] = None, check: bool = True) -> Tuple[int, str, str]:
@@ -48,71 +76,126 @@ def get_repo_root() -> str:
     return root
 
 
-def get_worktree_base_dir() -> str:
-    """Get the worktree base directory from config or default."""
-    repo_root = get_repo_root()
+def read_worktree_settings(repo_root: str) -> Dict[str, str]:
+    """Raw values of the `github.worktree` block in config.yaml (simple block parser)."""
     config_path = os.path.join(repo_root, ".shiki", "config.yaml")
-
-    base_dir = os.path.join(repo_root, "..", "worktrees")
-
-    if os.path.exists(config_path):
+    settings: Dict[str, str] = {}
+    try:
         with open(config_path, encoding="utf-8") as f:
+            block_indent = None
             for line in f:
                 stripped = line.strip()
-                if stripped.startswith("base_dir:"):
-                    value = stripped.split(":", 1)[1].strip()
-                    if value:
-                        if os.path.isabs(value):
-                            base_dir = value
-                        else:
-                            base_dir = os.path.join(repo_root, value)
+                if not stripped or stripped.startswith("#"):
+                    continue
+                indent = len(line) - len(line.lstrip())
+                if block_indent is None:
+                    if stripped == "worktree:":
+                        block_indent = indent
+                    continue
+                if indent <= block_indent:
                     break
+                key, sep, value = stripped.partition(":")
+                if sep:
+                    settings[key.strip()] = value.split(" #")[0].strip()
+    except OSError:
+        pass
+    return settings
 
+
+def _setting_list(value: Optional[str], default: List[str]) -> List[str]:
+    """Parse an inline YAML list such as `[".shiki/", "AGENTS.md"]`."""
+    if value is None:
+        return list(default)
+    value = value.strip()
+    if value.startswith("[") and value.endswith("]"):
+        value = value[1:-1]
+    return [item.strip().strip("'\"") for item in value.split(",") if item.strip().strip("'\"")]
+
+
+def get_worktree_base_dir(repo_root: Optional[str] = None) -> str:
+    """Get the worktree base directory from config or default."""
+    repo_root = repo_root or get_repo_root()
+    value = read_worktree_settings(repo_root).get("base_dir")
+    if value:
+        base_dir = value if os.path.isabs(value) else os.path.join(repo_root, value)
+    else:
+        base_dir = os.path.join(repo_root, "..", "worktrees")
     return os.path.abspath(base_dir)
 
 
-def create_worktree(branch: str, task_id: str) -> None:
-    """Create a new git worktree for a task.
+def worktree_path_for(base_dir: str, branch: str) -> str:
+    """Worktree directory for a branch (slashes flattened)."""
+    return os.path.join(base_dir, branch.replace("/", "_"))
 
-    Args:
-        branch: Branch name (e.g., 'shiki/task-T-0001')
-        task_id: Task ID for metadata tracking
-    """
-    repo_root = get_repo_root()
-    base_dir = get_worktree_base_dir()
-    worktree_path = os.path.join(base_dir, branch.replace("/", "_"))
 
-    # Ensure base directory exists
-    os.makedirs(base_dir, exist_ok=True)
+def parse_worktree_list(porcelain: str) -> List[Dict[str, Any]]:
+    """Parse `git worktree list --porcelain` into one dict per worktree."""
+    worktrees: List[Dict[str, Any]] = []
+    current_wt: Dict[str, Any] = {}
 
-    # Check if worktree already exists
-    _, list_out, _ = run_git(["worktree", "list", "--porcelain"], check=False)
-    if worktree_path in list_out:
-        print(f"[WARN] Worktree already exists at: {worktree_path}")
-        return
+    for line in porcelain.split("\n"):
+        line = line.strip()
+        if line.startswith("worktree "):
+            if current_wt:
+                worktrees.append(current_wt)
+            current_wt = {"path": line[9:]}
+        elif line.startswith("HEAD "):
+            current_wt["head"] = line[5:]
+        elif line.startswith("branch "):
+            current_wt["branch"] = line[7:]
+        elif line == "bare":
+            current_wt["bare"] = True
+        elif line == "detached":
+            current_wt["detached"] = True
+
+    if current_wt:
+        worktrees.append(current_wt)
+    return worktrees
 
-    # Check if branch exists
-    rc, _, _ = run_git(["rev-parse", "--verify", branch], check=False)
-    if rc == 0:
-        # Branch exists, create worktree from it
-        run_git(["worktree", "add", worktree_path, branch])
-        print(f"[OK] Created worktree from existing branch '{branch}' at: {worktree_path}")
-    else:
-        # Create new branch and worktree
-        run_git(["worktree", "add", "-b", branch, worktree_path])
-        print(f"[OK] Created worktree with new branch '{branch}' at: {worktree_path}")
 
-    # Write metadata
+def registered_worktrees(repo_root: str) -> Dict[str, Dict[str, Any]]:
+    """Registered worktrees keyed by absolute path (one `worktree list` call)."""
+    _, list_out, _ = run_git(["worktree", "list", "--porcelain"], cwd=repo_root, check=False)
+    return {os.path.abspath(wt["path"]): wt for wt in parse_worktree_list(list_out)}
+
+
+def existing_refs(names: List[str], repo_root: str) -> Set[str]:
+    """Which of names resolve to an object, via one `git cat-file --batch-check`.
+
+    Same resolution rules as `git rev-parse --verify <name>`, but one process
+    for any number of names.
+    """
+    names = [name for name in names if name and "\n" not in name]
+    if not names:
+        return set()
+    result = subprocess.run(
+        ["git", "cat-file", "--batch-check"],
+        input="".join(f"{name}\n" for name in names),
+        capture_output=True,
+        text=True,
+        cwd=repo_root,
+    )
+    found = set()
+    for name, line in zip(names, result.stdout.splitlines()):
+        if not line.endswith(" missing") and not line.endswith(" ambiguous"):
+            found.add(name)
+    return found
+
+
+def _write_worktree_metadata(worktree_path: str, branch: str, task_id: str,
+                             sparse_paths: Optional[List[str]] = None) -> None:
     meta_dir = os.path.join(worktree_path, ".shiki", "state")
     os.makedirs(meta_dir, exist_ok=True)
     meta_file = os.path.join(meta_dir, f"worktree-{task_id}.json")
 
-    metadata = {
+    metadata: Dict[str, Any] = {
         "task_id": task_id,
         "branch": branch,
         "worktree_path": worktree_path,
         "created_from": "worktree_manager",
     }
+    if sparse_paths is not None:
+        metadata["sparse_paths"] = sparse_paths
 
     with open(meta_file, "w", encoding="utf-8") as f:
         json.dump(metadata, f, indent=2, ensure_ascii=False)
@@ -120,57 +203,615 @@ def create_worktree(branch: str, task_id: str) -> None:
     print(f"[OK] Worktree metadata written to: {meta_file}")
 
 
-def cleanup_worktree(branch: str) -> None:
+@contextmanager
+def worktree_lock(repo_root: str):
+    """Exclusive lock around changes to `.git/worktrees` and the shared config.
+
+    Uses flock on a file in the git common dir, so concurrent worktree_manager
+    processes (and threads) register worktrees one at a time.
+    """
+    if fcntl is None:
+        yield
+        return
+    _, common_dir, _ = run_git(["rev-parse", "--git-common-dir"], cwd=repo_root)
+    lock_path = os.path.join(repo_root, common_dir, LOCK_FILE_NAME)
+    with open(lock_path, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def sparse_patterns(task: Optional[Dict[str, Any]], shared_paths: List[str]) -> Optional[List[str]]:
+    """Non-cone sparse-checkout patterns for a task, or None for a full checkout.
+
+    The patterns are the task's context.target_files plus shared_paths,
+    anchored at the worktree root. Tasks without target_files get a full
+    checkout since there is nothing to limit it to.
+    """
+    targets = ((task or {}).get("context") or {}).get("target_files")
+    if not isinstance(targets, list) or not targets:
+        return None
+    patterns: List[str] = []
+    for path in list(targets) + list(shared_paths):
+        if not isinstance(path, str) or "\n" in path:
+            continue
+        path = path.strip()
+        while path.startswith("./"):
+            path = path[2:]
+        path = path.lstrip("/")
+        if path and f"/{path}" not in patterns:
+            patterns.append(f"/{path}")
+    return patterns
+
+
+def _load_task_sparse_patterns(repo_root: str, task_ids: List[str],
+                               shared_paths: List[str]) -> Dict[str, Optional[List[str]]]:
+    """task_id -> sparse patterns, reading task files located through the task index."""
+    patterns: Dict[str, Optional[List[str]]] = {}
+    with open_index(os.path.join(repo_root, ".shiki", "tasks")) as index:
+        for task_id in task_ids:
+            entry = index.get(task_id)
+            task = None
+            if entry is not None and "error" not in entry:
+                try:
+                    with open(entry["path"], encoding="utf-8") as f:
+                        task = json.load(f)
+                except (json.JSONDecodeError, OSError):
+                    pass
+            patterns[task_id] = sparse_patterns(task, shared_paths)
+    return patterns
+
+
+def _int_setting(settings: Dict[str, str], key: str, default: int) -> int:
+    value = settings.get(key, "")
+    return int(value) if value.isdigit() else default
+
+
+class WorktreePool:
+    """Warm pool of detached worktrees under <base_dir>/.pool.
+
+    Free slots are the registered worktrees inside the pool directory. A slot
+    is claimed by moving it to the task's worktree path (`git worktree move`,
+    a rename) and switching it to the task branch, so only files that differ
+    from its last commit are rewritten. Released worktrees are cleaned and
+    moved back. When each slot was released is kept in
+    .shiki/state/worktree-pool.json; slots idle longer than max_idle_minutes
+    are removed. Callers hold worktree_lock() around every method.
+    """
+
+    def __init__(self, repo_root: str, base_dir: str, settings: Dict[str, str]):
+        self.repo_root = repo_root
+        self.dir = os.path.join(base_dir, ".pool")
+        self.size = _int_setting(settings, "pool_size", 0)
+        self.max_idle_minutes = _int_setting(settings, "pool_max_idle_minutes", DEFAULT_POOL_MAX_IDLE_MINUTES)
+        self.state_path = os.path.join(repo_root, ".shiki", "state", "worktree-pool.json")
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def _load_state(self) -> Dict[str, str]:
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                return json.load(f).get("idle_since", {})
+        except (json.JSONDecodeError, OSError, AttributeError):
+            return {}
+
+    def _save_state(self, idle_since: Dict[str, str]) -> None:
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"idle_since": idle_since}, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+
+    def free_slots(self, registered: Dict[str, Dict[str, Any]]) -> List[str]:
+        """Registered pool slots, most recently released first."""
+        idle_since = self._load_state()
+        slots = [path for path in registered if path.startswith(self.dir + os.sep)]
+        return sorted(slots, key=lambda path: idle_since.get(path, ""), reverse=True)
+
+    def _slot_path(self, registered: Dict[str, Dict[str, Any]]) -> str:
+        n = 0
+        while True:
+            path = os.path.join(self.dir, f"slot-{n}")
+            if path not in registered and not os.path.exists(path):
+                return path
+            n += 1
+
+    def expire(self, registered: Dict[str, Dict[str, Any]]) -> int:
+        """Remove slots idle longer than max_idle_minutes or beyond the pool size."""
+        idle_since = self._load_state()
+        cutoff = datetime.now(timezone.utc) - timedelta(minutes=self.max_idle_minutes)
+        removed = 0
+        for i, path in enumerate(self.free_slots(registered)):
+            try:
+                stale = datetime.fromisoformat(idle_since[path]) < cutoff
+            except (KeyError, ValueError):
+                stale = False
+            if i >= self.size or stale:
+                run_git(["worktree", "remove", "--force", path], cwd=self.repo_root, check=False)
+                registered.pop(path, None)
+                idle_since.pop(path, None)
+                removed += 1
+        if removed:
+            self._save_state(idle_since)
+        return removed
+
+    def claim(self, targets: List[str], registered: Dict[str, Dict[str, Any]]) -> List[str]:
+        """Move free slots to target paths (in order). Returns the targets that got one."""
+        self.expire(registered)
+        idle_since = self._load_state()
+        claimed = []
+        for slot, target in zip(self.free_slots(registered), targets):
+            rc, _, stderr = run_git(["worktree", "move", slot, target], cwd=self.repo_root, check=False)
+            if rc != 0:
+                print(f"[WARN] Could not claim pool worktree {slot}: {stderr}")
+                continue
+            registered[target] = registered.pop(slot)
+            idle_since.pop(slot, None)
+            claimed.append(target)
+        if claimed:
+            self._save_state(idle_since)
+        return claimed
+
+    def release(self, worktree_path: str, registered: Dict[str, Dict[str, Any]]) -> bool:
+        """Move a cleaned, detached worktree into the pool. False if the pool is full."""
+        if len(self.free_slots(registered)) >= self.size:
+            return False
+        os.makedirs(self.dir, exist_ok=True)
+        slot = self._slot_path(registered)
+        rc, _, stderr = run_git(["worktree", "move", worktree_path, slot], cwd=self.repo_root, check=False)
+        if rc != 0:
+            print(f"[WARN] Could not return {worktree_path} to the pool: {stderr}")
+            return False
+        registered[slot] = registered.pop(os.path.abspath(worktree_path), {"path": slot})
+        idle_since = self._load_state()
+        idle_since[slot] = datetime.now(timezone.utc).isoformat()
+        self._save_state(idle_since)
+        return True
+
+    def add(self, count: int, registered: Dict[str, Dict[str, Any]]) -> List[str]:
+        """Register count new detached slots at HEAD (not checked out yet)."""
+        os.makedirs(self.dir, exist_ok=True)
+        idle_since = self._load_state()
+        slots = []
+        for _ in range(count):
+            slot = self._slot_path(registered)
+            run_git(["worktree", "add", "--detach", "--no-checkout", slot, "HEAD"], cwd=self.repo_root)
+            registered[slot] = {"path": slot, "detached": True}
+            idle_since[slot] = datetime.now(timezone.utc).isoformat()
+            slots.append(slot)
+        if slots:
+            self._save_state(idle_since)
+        return slots
+
+
+def _checkout_in_parallel(worktrees: List[Any], checkout, jobs: int) -> None:
+    if worktrees:
+        with ThreadPoolExecutor(max_workers=min(max(jobs, 1), len(worktrees))) as pool:
+            list(pool.map(checkout, worktrees))
+
+
+def create_worktrees(specs: List[Tuple[str, str]], jobs: Optional[int] = None,
+                     sparse: Optional[bool] = None) -> Dict[str, str]:
+    """Create worktrees for many (branch, task_id) pairs at once.
+
+    The repo root, config, worktree list and branch existence are resolved
+    once for the whole batch. Every change to `.git/worktrees` happens under
+    worktree_lock(): full checkouts first claim warm slots from the
+    WorktreePool, the rest are registered with `git worktree add
+    --no-checkout`. The checkouts then run in a pool of `jobs` threads.
+
+    Args:
+        specs: (branch, task_id) pairs
+        jobs: Parallel checkouts (default: github.worktree.provision_jobs)
+        sparse: Limit checkouts to context.target_files + shared_paths
+            (default: github.worktree.sparse_checkout)
+
+    Returns:
+        branch -> worktree path (new or already existing)
+    """
+    repo_root = get_repo_root()
+    settings = read_worktree_settings(repo_root)
+    base_dir = get_worktree_base_dir(repo_root)
+    os.makedirs(base_dir, exist_ok=True)
+    if jobs is None:
+        jobs = _int_setting(settings, "provision_jobs", DEFAULT_PROVISION_JOBS) or DEFAULT_PROVISION_JOBS
+    if sparse is None:
+        sparse = settings.get("sparse_checkout", "").lower() == "true"
+
+    registered = registered_worktrees(repo_root)
+    paths: Dict[str, str] = {}
+    pending: List[Tuple[str, str, str]] = []
+    queued: Set[str] = set()
+    for branch, task_id in specs:
+        worktree_path = worktree_path_for(base_dir, branch)
+        paths[branch] = worktree_path
+        if os.path.abspath(worktree_path) in registered:
+            print(f"[WARN] Worktree already exists at: {worktree_path}")
+        elif branch not in queued:
+            queued.add(branch)
+            pending.append((branch, task_id, worktree_path))
+    if not pending:
+        return paths
+
+    branches_present = existing_refs([branch for branch, _, _ in pending] + ["HEAD"], repo_root)
+    patterns: Dict[str, Optional[List[str]]] = {}
+    if sparse:
+        shared_paths = _setting_list(settings.get("shared_paths"), DEFAULT_SHARED_PATHS)
+        patterns = _load_task_sparse_patterns(repo_root, [task_id for _, task_id, _ in pending], shared_paths)
+
+    pool = WorktreePool(repo_root, base_dir, settings)
+    pooled: Set[str] = set()
+    start_point = "HEAD"
+
+    # Phase 1: registration touches .git/worktrees and the refs, so one at a time
+    first_sparse = next((item for item in pending if patterns.get(item[1])), None)
+    with worktree_lock(repo_root):
+        if pool.enabled:
+            # Sparse worktrees are cheap already; warm slots are full checkouts
+            targets = [os.path.abspath(path) for _, task_id, path in pending if not patterns.get(task_id)]
+            pooled = set(pool.claim(targets, registered))
+            if pooled and "HEAD" in branches_present:
+                # New branches start where `git worktree add -b` would: this worktree's HEAD
+                _, start_point, _ = run_git(["rev-parse", "HEAD"], cwd=repo_root)
+        for branch, _, worktree_path in pending:
+            if os.path.abspath(worktree_path) in pooled:
+                continue
+            if branch in branches_present:
+                run_git(["worktree", "add", "--no-checkout", worktree_path, branch], cwd=repo_root)
+            else:
+                run_git(["worktree", "add", "--no-checkout", "-b", branch, worktree_path], cwd=repo_root)
+        if first_sparse is not None:
+            # The first `sparse-checkout set` turns on extensions.worktreeConfig
+            # in the shared config; the others then only write their own config.worktree
+            run_git(["sparse-checkout", "set", "--no-cone"] + patterns[first_sparse[1]],
+                    cwd=first_sparse[2])
+
+    # Phase 2: checkouts write only inside their own worktree and index
+    def checkout(item: Tuple[str, str, str]) -> None:
+        branch, task_id, worktree_path = item
+        origin = "existing branch" if branch in branches_present else "new branch"
+        task_patterns = patterns.get(task_id)
+        if os.path.abspath(worktree_path) in pooled:
+            # Fast reset: only files that differ from the slot's last commit are rewritten
+            if branch in branches_present:
+                run_git(["switch", "--discard-changes", branch], cwd=worktree_path)
+            else:
+                run_git(["switch", "--discard-changes", "-c", branch, start_point], cwd=worktree_path)
+            how = " (from pool)"
+        else:
+            if task_patterns and item is not first_sparse:
+                run_git(["sparse-checkout", "set", "--no-cone"] + task_patterns, cwd=worktree_path)
+            run_git(["read-tree", "-mu", "HEAD"], cwd=worktree_path)
+            how = f" (sparse: {len(task_patterns)} paths)" if task_patterns else ""
+        print(f"[OK] Created worktree from {origin} '{branch}' at: {worktree_path}{how}")
+        _write_worktree_metadata(worktree_path, branch, task_id, task_patterns)
+
+    _checkout_in_parallel(pending, checkout, jobs)
+    return paths
+
+
+def create_worktree(branch: str, task_id: str, sparse: Optional[bool] = None) -> str:
+    """Create a new git worktree for a task.
+
+    Args:
+        branch: Branch name (e.g., 'shiki/task-T-0001')
+        task_id: Task ID for metadata tracking
+        sparse: Sparse checkout (default: github.worktree.sparse_checkout)
+
+    Returns:
+        Path of the (new or already existing) worktree
+    """
+    return create_worktrees([(branch, task_id)], sparse=sparse)[branch]
+
+
+def _is_sparse_worktree(worktree_path: str) -> bool:
+    """Whether worktree_manager created this worktree with a sparse checkout."""
+    import glob
+    for meta_file in glob.glob(os.path.join(worktree_path, ".shiki", "state", "worktree-*.json")):
+        try:
+            with open(meta_file, encoding="utf-8") as f:
+                if json.load(f).get("sparse_paths") is not None:
+                    return True
+        except (json.JSONDecodeError, OSError):
+            pass
+    return False
+
+
+def _recycle_worktree(worktree_path: str) -> bool:
+    """Detach a worktree and remove everything not in its commit. False on failure."""
+    for args in (["switch", "--detach", "--discard-changes"], ["clean", "-fdxq"]):
+        rc, _, stderr = run_git(args, cwd=worktree_path, check=False)
+        if rc != 0:
+            print(f"[WARN] Could not recycle {worktree_path}: {stderr}")
+            return False
+    return True
+
+
+def cleanup_worktrees(branches: List[str], warn_dirty: bool = True) -> None:
+    """Safely remove the worktrees of many branches at once.
+
+    The repo root, config and worktree list are resolved once and
+    `git worktree prune` runs once at the end. With a warm pool
+    (github.worktree.pool_size > 0) full-checkout worktrees are cleaned,
+    detached and handed back to the pool instead, until it is full.
+
+    Args:
+        branches: Branch names of the worktrees to remove
+        warn_dirty: Report uncommitted changes before removing (one
+            `git status` per worktree)
+    """
+    repo_root = get_repo_root()
+    base_dir = get_worktree_base_dir(repo_root)
+    registered = registered_worktrees(repo_root)
+    pool = WorktreePool(repo_root, base_dir, read_worktree_settings(repo_root))
+
+    removed_any = False
+    for branch in branches:
+        worktree_path = worktree_path_for(base_dir, branch)
+
+        if os.path.abspath(worktree_path) not in registered:
+            print(f"[WARN] Worktree not found at: {worktree_path}")
+            # Still try to clean up the directory if it exists
+            if os.path.exists(worktree_path):
+                print(f"[INFO] Directory exists, removing: {worktree_path}")
+                import shutil
+                shutil.rmtree(worktree_path, ignore_errors=True)
+            continue
+
+        # Check for uncommitted changes
+        if warn_dirty:
+            rc, status, _ = run_git(["status", "--porcelain"], cwd=worktree_path, check=False)
+            if status:
+                print(f"[WARN] Worktree has uncommitted changes:")
+                print(f"  {status[:500]}")
+                print(f"[WARN] Proceeding; uncommitted changes are discarded")
+
+        if pool.enabled and not _is_sparse_worktree(worktree_path) and _recycle_worktree(worktree_path):
+            with worktree_lock(repo_root):
+                returned = pool.release(worktree_path, registered)
+            if returned:
+                print(f"[OK] Returned worktree to the pool: {worktree_path}")
+                continue
+
+        # Remove worktree
+        try:
+            run_git(["worktree", "remove", worktree_path, "--force"], cwd=repo_root)
+            print(f"[OK] Removed worktree: {worktree_path}")
+        except subprocess.CalledProcessError as e:
+            print(f"[ERROR] Failed to remove worktree: {e.stderr}")
+            # Force cleanup
+            run_git(["worktree", "remove", worktree_path, "--force"], cwd=repo_root, check=False)
+            print(f"[OK] Force-removed worktree: {worktree_path}")
+        registered.pop(os.path.abspath(worktree_path), None)
+        removed_any = True
+
+    if pool.enabled:
+        with worktree_lock(repo_root):
+            removed_any = pool.expire(registered) > 0 or removed_any
+
+    if removed_any:
+        # Prune stale worktree references
+        run_git(["worktree", "prune"], cwd=repo_root, check=False)
+        print(f"[OK] Pruned stale worktree references")
+
+
+def fill_worktree_pool(jobs: Optional[int] = None) -> List[str]:
+    """Pre-create detached worktrees until the pool holds pool_size slots.
+
+    Returns:
+        Paths of the new slots
+    """
+    repo_root = get_repo_root()
+    settings = read_worktree_settings(repo_root)
+    pool = WorktreePool(repo_root, get_worktree_base_dir(repo_root), settings)
+    if not pool.enabled:
+        print("[INFO] Worktree pool disabled (github.worktree.pool_size: 0)")
+        return []
+    if jobs is None:
+        jobs = _int_setting(settings, "provision_jobs", DEFAULT_PROVISION_JOBS) or DEFAULT_PROVISION_JOBS
+
+    registered = registered_worktrees(repo_root)
+    with worktree_lock(repo_root):
+        pool.expire(registered)
+        slots = pool.add(pool.size - len(pool.free_slots(registered)), registered)
+
+    def checkout(slot: str) -> None:
+        run_git(["read-tree", "-mu", "HEAD"], cwd=slot)
+        print(f"[OK] Added pool worktree: {slot}")
+
+    _checkout_in_parallel(slots, checkout, jobs)
+    return slots
+
+
+def drain_worktree_pool() -> int:
+    """Remove every free pool worktree. Returns how many were removed."""
+    repo_root = get_repo_root()
+    settings = dict(read_worktree_settings(repo_root), pool_size="0")
+    pool = WorktreePool(repo_root, get_worktree_base_dir(repo_root), settings)
+    with worktree_lock(repo_root):
+        removed = pool.expire(registered_worktrees(repo_root))
+    if removed:
+        run_git(["worktree", "prune"], cwd=repo_root, check=False)
+    return removed
+
+
+def pool_status() -> None:
+    """Print the free pool worktrees and how long each has been idle."""
+    repo_root = get_repo_root()
+    settings = read_worktree_settings(repo_root)
+    pool = WorktreePool(repo_root, get_worktree_base_dir(repo_root), settings)
+    registered = registered_worktrees(repo_root)
+    slots = pool.free_slots(registered)
+    idle_since = pool._load_state()
+    print(f"Pool: {len(slots)}/{pool.size} free worktrees (max idle {pool.max_idle_minutes} min)")
+    now = datetime.now(timezone.utc)
+    for slot in slots:
+        try:
+            idle = f"{(now - datetime.fromisoformat(idle_since[slot])).total_seconds() / 60:.0f} min"
+        except (KeyError, ValueError):
+            idle = "unknown"
+        print(f"  {slot:<60} {registered[slot].get('head', '')[:12]:<14} idle {idle}")
+
+
+def cleanup_worktree(branch: str, warn_dirty: bool = True) -> None:
     """Safely remove a worktree and optionally its branch.
 
     Args:
         branch: Branch name of the worktree to remove
+        warn_dirty: Report uncommitted changes before removing
     """
-    repo_root = get_repo_root()
-    base_dir = get_worktree_base_dir()
-    worktree_path = os.path.join(base_dir, branch.replace("/", "_"))
-
-    # Check if worktree exists
-    _, list_out, _ = run_git(["worktree", "list", "--porcelain"], check=False)
-    if worktree_path not in list_out:
-        print(f"[WARN] Worktree not found at: {worktree_path}")
-        # Still try to clean up the directory if it exists
-        if os.path.exists(worktree_path):
-            print(f"[INFO] Directory exists, removing: {worktree_path}")
-            import shutil
-            shutil.rmtree(worktree_path, ignore_errors=True)
-        return
+    cleanup_worktrees([branch], warn_dirty=warn_dirty)
 
-    # Check for uncommitted changes
-    rc, status, _ = run_git(["status", "--porcelain"], cwd=worktree_path, check=False)
-    if status:
-        print(f"[WARN] Worktree has uncommitted changes:")
-        print(f"  {status[:500]}")
-        print(f"[WARN] Proceeding with forced removal")
 
-    # Remove worktree
-    try:
-        run_git(["worktree", "remove", worktree_path, "--force"])
-        print(f"[OK] Removed worktree: {worktree_path}")
-    except subprocess.CalledProcessError as e:
-        print(f"[ERROR] Failed to remove worktree: {e.stderr}")
-        # Force cleanup
-        run_git(["worktree", "remove", worktree_path, "--force"], check=False)
-        print(f"[OK] Force-removed worktree: {worktree_path}")
+# A change with no line ranges (binary files) overlaps everything in the file
+WHOLE_FILE = (0, sys.maxsize)
+
+
+def _unquote_git_path(path: str) -> str:
+    """Undo git's C-style quoting ("a/\\346\\227\\245.md" -> a/日.md); plain paths pass through."""
+    if len(path) < 2 or not (path.startswith('"') and path.endswith('"')):
+        return path
+    return codecs.escape_decode(path[1:-1].encode("utf-8"))[0].decode("utf-8", "replace")
+
 
-    # Prune stale worktree references
-    run_git(["worktree", "prune"], check=False)
-    print(f"[OK] Pruned stale worktree references")
+def _diff_header_path(rest: str) -> Optional[str]:
+    """Path from the part of a `diff --git ` header after the prefix, or None."""
+    if rest.startswith('"'):
+        match = re.match(r'"((?:[^"\\]|\\.)*)"', rest)
+        side = _unquote_git_path(match.group(0)) if match else ""
+    else:
+        # Without renames both sides name the same path: "a/<path> b/<path>"
+        side = rest[:(len(rest) - 1) // 2]
+    return side[2:] if side.startswith("a/") else None
+
+
+def parse_diff_hunks(diff: str) -> Dict[str, List[Tuple[int, int]]]:
+    """Base-side line ranges per file from `git diff -U0 --no-renames` output.
+
+    A hunk replacing lines a..a+n-1 gives (a, a+n-1); a pure insertion after
+    line a gives (a, a). Binary files get WHOLE_FILE. Paths are taken from
+    the ---/+++ lines (quoted or not) and every `diff --git` line starts a new
+    file, so hunks are never credited to the previous one.
+
+    >>> parse_diff_hunks('''diff --git "a/docs/\\\\346\\\\227\\\\245.md" "b/docs/\\\\346\\\\227\\\\245.md"
+    ... --- "a/docs/\\\\346\\\\227\\\\245.md"
+    ... +++ "b/docs/\\\\346\\\\227\\\\245.md"
+    ... @@ -10 +10 @@
+    ... diff --git a/my notes.md b/my notes.md
+    ... --- a/my notes.md\\t
+    ... +++ b/my notes.md\\t
+    ... @@ -3,2 +3,0 @@
+    ... diff --git a/docs/a.md b/docs/a.md
+    ... --- a/docs/a.md
+    ... +++ b/docs/a.md
+    ... @@ -40 +40 @@''')
+    {'docs/日.md': [(10, 10)], 'my notes.md': [(3, 4)], 'docs/a.md': [(40, 40)]}
+    """
+    hunks: Dict[str, List[Tuple[int, int]]] = {}
+    path = None
+    for line in diff.split("\n"):
+        if line.startswith("diff --git "):
+            path = _diff_header_path(line[len("diff --git "):])
+            if path is not None:
+                hunks.setdefault(path, [])
+        elif line.startswith(("--- ", "+++ ")):
+            # Authoritative name (git appends a tab to names containing spaces)
+            side = _unquote_git_path(line[4:].rstrip("\t"))
+            if side[:2] in ("a/", "b/"):
+                if path is not None and not hunks[path]:
+                    del hunks[path]
+                path = side[2:]
+                hunks.setdefault(path, [])
+        elif path is None:
+            continue
+        elif line.startswith("@@ -"):
+            old = line[4:].split(" ", 1)[0]
+            start, _, count = old.partition(",")
+            start_line = int(start)
+            count_lines = int(count) if count else 1
+            hunks[path].append((start_line, start_line + max(count_lines, 1) - 1))
+        elif line.startswith("Binary files "):
+            hunks[path].append(WHOLE_FILE)
+    return hunks
 
 
-def detect_conflicts(branches: List[str]) -> None:
+def file_overlaps(branch_files: Dict[str, Set[str]]) -> Dict[Tuple[str, str], List[str]]:
+    """(branch, branch) -> files both modify, via a file -> branches index.
+
+    Linear in the total number of changed paths plus the size of the result.
+    """
+    touched_by: Dict[str, List[str]] = {}
+    for branch, files in branch_files.items():
+        for path in files:
+            touched_by.setdefault(path, []).append(branch)
+
+    overlaps: Dict[Tuple[str, str], List[str]] = {}
+    for path, owners in touched_by.items():
+        for i in range(len(owners)):
+            for j in range(i + 1, len(owners)):
+                pair = tuple(sorted((owners[i], owners[j])))
+                overlaps.setdefault(pair, []).append(path)
+    return overlaps
+
+
+def hunk_overlaps(
+    branch_hunks: Dict[str, Dict[str, List[Tuple[int, int]]]],
+) -> Dict[Tuple[str, str], List[Tuple[str, Tuple[int, int], Tuple[int, int]]]]:
+    """(branch, branch) -> (file, range, range) for line ranges that overlap.
+
+    Only files touched by two or more branches are compared, with a sweep
+    over their ranges sorted by start line. Adjacent ranges count as
+    overlapping, as they do for git merge.
+    """
+    touched_by: Dict[str, List[str]] = {}
+    for branch, files in branch_hunks.items():
+        for path in files:
+            touched_by.setdefault(path, []).append(branch)
+
+    overlaps: Dict[Tuple[str, str], List[Tuple[str, Tuple[int, int], Tuple[int, int]]]] = {}
+    for path, owners in touched_by.items():
+        if len(owners) < 2:
+            continue
+        spans = sorted(
+            (span[0], span[1], branch)
+            for branch in owners
+            for span in (branch_hunks[branch][path] or [WHOLE_FILE])
+        )
+        active: List[Tuple[int, int, str]] = []
+        for start, end, branch in spans:
+            active = [span for span in active if span[1] + 1 >= start]
+            for other_start, other_end, other in active:
+                if other != branch:
+                    if other < branch:
+                        key, first, second = (other, branch), (other_start, other_end), (start, end)
+                    else:
+                        key, first, second = (branch, other), (start, end), (other_start, other_end)
+                    overlaps.setdefault(key, []).append((path, first, second))
+            active.append((start, end, branch))
+    return overlaps
+
+
+def _format_range(span: Tuple[int, int]) -> str:
+    if span == WHOLE_FILE:
+        return "whole file"
+    return f"line {span[0]}" if span[0] == span[1] else f"lines {span[0]}-{span[1]}"
+
+
+def detect_conflicts(branches: List[str], hunks: bool = False, jobs: int = 8) -> None:
     """Check for file conflicts between worktree branches.
 
-    Compares the set of modified files in each branch against the common base
-    to identify potential merge conflicts.
+    Diffs each branch against the common base (in parallel) and reports
+    files changed by more than one branch. With hunks=True only files whose
+    changed line ranges overlap are reported.
 
     Args:
         branches: List of branch names to check
+        hunks: Compare `git diff -U0` line ranges instead of whole files
+        jobs: Parallel `git diff` processes
     """
     if len(branches) < 2:
         print("[ERROR] Need at least 2 branches to check conflicts")
@@ -182,44 +823,45 @@ def detect_conflicts(branches: List[str]) -> None:
         # Fall back to HEAD
         _, base, _ = run_git(["rev-parse", "HEAD"])
 
-    # Get modified files for each branch
-    branch_files: dict[str, set[str]] = {}
-
+    present = existing_refs(branches, os.getcwd())
     for branch in branches:
-        rc, _, _ = run_git(["rev-parse", "--verify", branch], check=False)
-        if rc != 0:
+        if branch not in present:
             print(f"[WARN] Branch '{branch}' not found, skipping")
-            continue
-
-        _, diff_out, _ = run_git(["diff", "--name-only", base, branch], check=False)
-        files = set(f for f in diff_out.split("\n") if f)
-        branch_files[branch] = files
-        print(f"  {branch}: {len(files)} modified files")
-
-    # Find overlapping files
-    conflicts_found = False
-    checked_pairs = set()
-
-    for b1 in branch_files:
-        for b2 in branch_files:
-            if b1 == b2:
-                continue
-            pair = tuple(sorted([b1, b2]))
-            if pair in checked_pairs:
-                continue
-            checked_pairs.add(pair)
+    found = [branch for branch in dict.fromkeys(branches) if branch in present]
+
+    def diff(branch: str) -> Dict[str, List[Tuple[int, int]]]:
+        if hunks:
+            _, diff_out, _ = run_git(["-c", "core.quotePath=false", "diff", "-U0", "--no-renames", "--no-color", base, branch],
+                                   check=False)
+            return parse_diff_hunks(diff_out)
+        _, diff_out, _ = run_git(["-c", "core.quotePath=false", "diff", "--name-only", base, branch], check=False)
+        return {f: [] for f in diff_out.split("\n") if f}
+
+    # Get modified files (and line ranges) for each branch
+    with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(found) or 1))) as pool:
+        branch_hunks = dict(zip(found, pool.map(diff, found)))
+    for branch in found:
+        print(f"  {branch}: {len(branch_hunks[branch])} modified files")
+
+    if hunks:
+        overlaps = hunk_overlaps(branch_hunks)
+    else:
+        overlaps = file_overlaps({branch: set(files) for branch, files in branch_hunks.items()})
 
-            overlap = branch_files[b1] & branch_files[b2]
-            if overlap:
-                conflicts_found = True
-                print(f"\n[CONFLICT] Potential conflicts between '{b1}' and '{b2}':")
-                for f in sorted(overlap):
-                    print(f"  - {f}")
+    for (b1, b2), entries in sorted(overlaps.items()):
+        print(f"\n[CONFLICT] Potential conflicts between '{b1}' and '{b2}':")
+        if hunks:
+            for path, first, second in sorted(entries):
+                print(f"  - {path} ({_format_range(first)} / {_format_range(second)})")
+        else:
+            for f in sorted(entries):
+                print(f"  - {f}")
 
-    if not conflicts_found:
+    if not overlaps:
         print("\n[OK] No file conflicts detected between branches")
     else:
-        print(f"\n[WARN] Found potential conflicts in {len(checked_pairs)} branch pairs")
+        print(f"\n[WARN] Found potential conflicts in {len(overlaps)} of "
+              f"{len(found) * (len(found) - 1) // 2} branch pairs")
         sys.exit(1)
 
 
@@ -273,8 +915,8 @@ def merge_worktree(branch: str, target: str = "main") -> None:
     print(f"[OK] Merged '{branch}' into '{target}'")
 
     # Optionally clean up the worktree
-    base_dir = get_worktree_base_dir()
-    worktree_path = os.path.join(base_dir, branch.replace("/", "_"))
+    base_dir = get_worktree_base_dir(repo_root)
+    worktree_path = worktree_path_for(base_dir, branch)
     if os.path.exists(worktree_path):
         # Check config for cleanup_on_merge
         config_path = os.path.join(repo_root, ".shiki", "config.yaml")
@@ -303,26 +945,11 @@ def list_worktrees() -> None:
         print("[INFO] No worktrees found")
         return
 
-    worktrees = []
-    current_wt: dict = {}
+    worktrees = parse_worktree_list(list_out)
 
-    for line in list_out.split("\n"):
-        line = line.strip()
-        if line.startswith("worktree "):
-            if current_wt:
-                worktrees.append(current_wt)
-            current_wt = {"path": line[9:]}
-        elif line.startswith("HEAD "):
-            current_wt["head"] = line[5:8] + "..."
-        elif line.startswith("branch "):
-            current_wt["branch"] = line[7:]
-        elif line == "bare":
-            current_wt["bare"] = True
-        elif line == "detached":
-            current_wt["detached"] = True
-
-    if current_wt:
-        worktrees.append(current_wt)
+    # Task statuses come from the shared task index (one refresh for all worktrees)
+    repo_root = get_repo_root()
+    index = open_index(os.path.join(repo_root, ".shiki", "tasks"))
 
     # Find task associations
     print(f"{'Branch':<40} {'Path':<50} {'Task':<12} {'Status'}")
@@ -352,20 +979,16 @@ def list_worktrees() -> None:
 
         # Try to read task status
         if task_id:
-            repo_root = get_repo_root()
-            task_file = os.path.join(repo_root, ".shiki", "tasks", f"{task_id}.json")
-            if os.path.exists(task_file):
-                try:
-                    with open(task_file, encoding="utf-8") as f:
-                        task = json.load(f)
-                    status = task.get("status", "unknown")
-                except (json.JSONDecodeError, OSError):
-                    status = "error"
+            task = index.get(task_id)
+            if task is not None:
+                status = "error" if "error" in task else task.get("status", "unknown")
 
         bare = " (bare)" if wt.get("bare") else ""
         detached = " (detached)" if wt.get("detached") else ""
         print(f"{branch:<40} {path:<50} {task_id:<12} {status}{bare}{detached}")
 
+    index.close()
+
 
 def main() -> int:
     parser = argparse.ArgumentParser(
@@ -374,9 +997,13 @@ def main() -> int:
         epilog="""
 Examples:
   %(prog)s create --branch shiki/task-T-0001 --task-id T-0001
-  %(prog)s cleanup --branch shiki/task-T-0001
+  %(prog)s create-batch --task-ids T-0001 T-0002 T-0003
+  %(prog)s create-batch --task-ids T-0001 T-0002 --jobs 8 --sparse
+  %(prog)s cleanup --branch shiki/task-T-0001 shiki/task-T-0002
+  %(prog)s pool fill
   %(prog)s merge --branch shiki/task-T-0001 --target main
   %(prog)s conflicts --branches shiki/task-T-0001 shiki/task-T-0002
+  %(prog)s conflicts --branches shiki/task-T-0001 shiki/task-T-0002 --hunks
   %(prog)s list
         """,
     )
@@ -387,10 +1014,30 @@ Examples:
     create_parser = subparsers.add_parser("create", help="Create a new worktree for a task")
     create_parser.add_argument("--branch", required=True, help="Branch name for the worktree")
     create_parser.add_argument("--task-id", required=True, help="Task ID to associate")
+    create_parser.add_argument("--sparse", action=argparse.BooleanOptionalAction, default=None,
+                               help="Check out only context.target_files + shared_paths "
+                                    "(default: github.worktree.sparse_checkout)")
+
+    # create-batch
+    batch_parser = subparsers.add_parser("create-batch",
+                                         help="Create worktrees for several tasks (branches shiki/task-<id>)")
+    batch_parser.add_argument("--task-ids", nargs="+", required=True, help="Task IDs")
+    batch_parser.add_argument("--jobs", type=int, default=None,
+                              help="Parallel checkouts (default: github.worktree.provision_jobs)")
+    batch_parser.add_argument("--sparse", action=argparse.BooleanOptionalAction, default=None,
+                              help="Check out only context.target_files + shared_paths "
+                                   "(default: github.worktree.sparse_checkout)")
 
     # cleanup
-    cleanup_parser = subparsers.add_parser("cleanup", help="Remove a worktree safely")
-    cleanup_parser.add_argument("--branch", required=True, help="Branch name of the worktree")
+    cleanup_parser = subparsers.add_parser("cleanup", help="Remove worktrees safely")
+    cleanup_parser.add_argument("--branch", nargs="+", required=True, help="Branch name(s) of the worktrees")
+
+    # pool
+    pool_parser = subparsers.add_parser("pool", help="Manage the warm worktree pool")
+    pool_parser.add_argument("action", choices=["fill", "status", "drain"],
+                             help="fill: create slots up to pool_size, drain: remove free slots")
+    pool_parser.add_argument("--jobs", type=int, default=None,
+                             help="Parallel checkouts for fill (default: github.worktree.provision_jobs)")
 
     # merge
     merge_parser = subparsers.add_parser("merge", help="Merge a worktree branch back")
@@ -400,6 +1047,9 @@ Examples:
     # conflicts
     conflicts_parser = subparsers.add_parser("conflicts", help="Check for file conflicts between branches")
     conflicts_parser.add_argument("--branches", nargs="+", required=True, help="Branches to check")
+    conflicts_parser.add_argument("--hunks", action="store_true",
+                                  help="Report only overlapping changed line ranges (git diff -U0)")
+    conflicts_parser.add_argument("--jobs", type=int, default=8, help="Parallel git diff processes")
 
     # list
     subparsers.add_parser("list", help="List active worktrees with task associations")
@@ -412,13 +1062,22 @@ Examples:
 
     try:
         if args.command == "create":
-            create_worktree(args.branch, args.task_id)
+            create_worktree(args.branch, args.task_id, sparse=args.sparse)
+        elif args.command == "create-batch":
+            create_worktrees([(f"shiki/task-{task_id}", task_id) for task_id in args.task_ids],
+                             jobs=args.jobs, sparse=args.sparse)
         elif args.command == "cleanup":
-            cleanup_worktree(args.branch)
+            cleanup_worktrees(args.branch)
+        elif args.command == "pool":
+            if args.action == "fill":
+                fill_worktree_pool(args.jobs)
+            elif args.action == "drain":
+                print(f"[OK] Removed {drain_worktree_pool()} pool worktrees")
+            pool_status()
         elif args.command == "merge":
             merge_worktree(args.branch, args.target)
         elif args.command == "conflicts":
-            detect_conflicts(args.branches)
+            detect_conflicts(args.branches, hunks=args.hunks, jobs=args.jobs)
         elif args.command == "list":
             list_worktrees()
         else: